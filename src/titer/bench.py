@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Mapping, Sequence
+
+from .engines.extraction import find_urls
+from .engines.factory import EngineFactory
+from .evaluator import EvaluationResult, _count_domains, _count_keywords, run_evaluation
+from .matching import DomainMatcher, KeywordMatcher
+from .sheets import prepare_sheet_row
+
+# A task produces one row, so row builders are looped to get measurable timings.
+ROW_REPEATS = 20
+
+
+@dataclass
+class StageTiming:
+    """Median timing of one benchmark stage over its repeats."""
+
+    stage: str
+    calls: int
+    seconds: float
+
+    @property
+    def per_call_us(self) -> float:
+        return self.seconds / self.calls * 1e6 if self.calls else 0.0
+
+    @property
+    def per_second(self) -> float:
+        return self.calls / self.seconds if self.seconds else float("inf")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "per_call_us": self.per_call_us, "per_second": self.per_second}
+
+
+def run_benchmarks(
+    profile: str = "typical",
+    prompts: int = 50,
+    runs: int = 3,
+    keywords: int = 20,
+    domains: int = 10,
+    concurrency: int = 8,
+    repeat: int = 5,
+) -> List[StageTiming]:
+    """Time titer's own overhead against the in-process ``fake/<profile>`` engine.
+
+    ``run_evaluation`` is timed end to end (``prompts * runs`` calls); the other stages
+    are timed over the responses it produced, so they isolate scoring, extraction and
+    row building. Each stage reports the median of ``repeat`` rounds.
+    """
+    engine_name = f"fake/{profile}"
+    prompt_texts = [f"Benchmark prompt {index}: which vector databases do you recommend?" for index in range(prompts)]
+    keyword_list = _keywords(keywords)
+    domain_list = [f"*.site{index}.example.com" if index % 2 else f"site{index}.example.com" for index in range(domains)]
+
+    result: EvaluationResult | None = None
+
+    def evaluate() -> None:
+        nonlocal result
+        result = run_evaluation(prompt_texts, [engine_name], keyword_list, domain_list, runs=runs, concurrency=concurrency)
+
+    timings = [_time("run_evaluation", prompts * runs, evaluate, repeat)]
+    assert result is not None
+    records = result.raw_responses
+    contents = [record["content"] for record in records]
+    cites = [record["cites"] for record in records]
+    engine = EngineFactory.shared().create(engine_name)
+    raws = [engine.run(prompt).raw for prompt in prompt_texts]
+    keyword_matcher = KeywordMatcher(keyword_list)
+    domain_matcher = DomainMatcher(domain_list)
+    row = result.as_row()
+    fieldnames = list(row.keys())
+
+    stages: Sequence[tuple[str, int, Callable[[], Any]]] = (
+        ("_count_keywords", len(contents), lambda: [_count_keywords(text, keyword_list) for text in contents]),
+        ("keyword_matcher.count", len(contents), lambda: [keyword_matcher.count(text) for text in contents]),
+        ("_count_domains", len(cites), lambda: [_count_domains(urls, domain_list) for urls in cites]),
+        ("domain_matcher.count", len(cites), lambda: [domain_matcher.count(urls) for urls in cites]),
+        ("find_urls", len(raws), lambda: [find_urls(raw) for raw in raws]),
+        ("as_row (csv)", ROW_REPEATS, lambda: [result.as_row() for _ in range(ROW_REPEATS)]),  # type: ignore[union-attr]
+        ("prepare_sheet_row", ROW_REPEATS, lambda: [prepare_sheet_row(row, fieldnames) for _ in range(ROW_REPEATS)]),
+    )
+    for stage, calls, fn in stages:
+        timings.append(_time(stage, calls, fn, repeat))
+    return timings
+
+
+def compare(current: Sequence[StageTiming], baseline: Sequence[Mapping[str, Any]], tolerance: float) -> List[str]:
+    """Describe every stage whose per-call time grew by more than ``tolerance`` (0.2 = 20%)."""
+    previous = {entry["stage"]: float(entry["per_call_us"]) for entry in baseline}
+    regressions: List[str] = []
+    for timing in current:
+        before = previous.get(timing.stage)
+        if before and timing.per_call_us > before * (1 + tolerance):
+            regressions.append(
+                f"{timing.stage}: {timing.per_call_us:.1f}us per call vs {before:.1f}us baseline "
+                f"(+{(timing.per_call_us / before - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def format_table(timings: Sequence[StageTiming]) -> str:
+    lines = [f"{'stage':<24} {'calls':>7} {'total ms':>10} {'per call us':>12} {'per second':>12}"]
+    for timing in timings:
+        lines.append(
+            f"{timing.stage:<24} {timing.calls:>7} {timing.seconds * 1000:>10.2f} "
+            f"{timing.per_call_us:>12.1f} {timing.per_second:>12.0f}"
+        )
+    return "\n".join(lines)
+
+
+def _time(stage: str, calls: int, fn: Callable[[], Any], repeat: int) -> StageTiming:
+    samples = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return StageTiming(stage=stage, calls=calls, seconds=statistics.median(samples))
+
+
+def _keywords(count: int) -> List[str]:
+    base = ["vector", "vector database", "search", "embedding", "open source", "latency", "hybrid", "api"]
+    return [base[index] if index < len(base) else f"term{index}" for index in range(count)]
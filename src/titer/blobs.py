@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+RAW_INLINE = "inline"
+RAW_BLOB = "blob"
+RAW_DROP = "drop"
+RAW_MODES = (RAW_INLINE, RAW_BLOB, RAW_DROP)
+
+DEFAULT_BLOB_DIR = Path(".titer-blobs")
+BLOB_KEY = "blob"
+
+
+class BlobStore:
+    """Content-addressed directory of gzip-compressed JSON payloads.
+
+    Payloads are hashed over their canonical JSON form, so identical payloads (for
+    example responses replayed from the cache) are stored once. References look like
+    ``sha256:<hex>``.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_BLOB_DIR) -> None:
+        self.directory = Path(directory)
+
+    def put(self, payload: Any) -> str:
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+        digest = hashlib.sha256(encoded).hexdigest()
+        path = self._path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(gzip.compress(encoded))
+            os.replace(tmp_name, path)
+        return f"sha256:{digest}"
+
+    def get(self, ref: str) -> Any:
+        algorithm, _, digest = ref.partition(":")
+        if algorithm != "sha256" or not digest:
+            raise ValueError(f"Unsupported blob reference '{ref}'.")
+        with gzip.open(self._path(digest), "rt", encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.json.gz"
+
+
+@dataclass(frozen=True)
+class RawOptions:
+    """How raw provider payloads are kept in ``raw_responses``.
+
+    ``inline`` keeps the full payload (the historical behaviour), ``blob`` writes it to
+    a :class:`BlobStore` and keeps ``{"blob": "sha256:..."}``, and ``drop`` keeps
+    ``None``. Content and citations are kept inline unless ``records`` is off, in which
+    case ``raw_responses`` stays empty. ``breakdown`` adds per-engine and per-prompt
+    statistics (:class:`~titer.stats.Breakdown`) to the result.
+    """
+
+    mode: str = RAW_INLINE
+    store: Optional[BlobStore] = None
+    records: bool = True
+    breakdown: bool = False
+
+    def __post_init__(self) -> None:
+        if self.mode not in RAW_MODES:
+            raise ValueError(f"Unsupported raw payload mode '{self.mode}'.")
+        if self.mode == RAW_BLOB and self.store is None:
+            raise ValueError("Blob mode needs a BlobStore.")
+
+    def encode(self, payload: Mapping[str, Any]) -> Optional[Mapping[str, Any]]:
+        if self.mode == RAW_DROP:
+            return None
+        if self.mode == RAW_BLOB:
+            return {BLOB_KEY: self.store.put(payload)}  # type: ignore[union-attr]
+        return payload
+
+
+def blob_ref(raw: Any) -> Optional[str]:
+    """Return the blob reference stored in a ``raw`` field, if it is one."""
+    if isinstance(raw, Mapping) and len(raw) == 1 and isinstance(raw.get(BLOB_KEY), str):
+        return raw[BLOB_KEY]
+    return None
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Protocol, Tuple
+
+from .engines.base import Engine, EngineResponse
+from .telemetry import note_shared
+
+CACHE_USE = "use"
+CACHE_ONLY = "only"
+CACHE_MODES = (CACHE_USE, CACHE_ONLY)
+
+DEFAULT_CACHE_DIR = Path(".titer-cache")
+# Finished units kept for reuse by later tasks of a batch; sheets tend to put rows that
+# share prompts next to each other, so a modest window catches most repeats.
+DEFAULT_SHARE_WINDOW = 1024
+
+SharedKey = Tuple[str, str, int]
+
+
+class CacheMissError(LookupError):
+    """Raised in replay mode when a work unit has no cached response."""
+
+
+class ResponseSource(Protocol):
+    """Anything that can stand between a work unit and its engine call."""
+
+    def fetch(self, engine: Engine, prompt: str, run: int, call: Callable[[], EngineResponse]) -> EngineResponse: ...
+
+    async def afetch(
+        self,
+        engine: Engine,
+        prompt: str,
+        run: int,
+        call: Callable[[], Awaitable[EngineResponse]],
+    ) -> EngineResponse: ...
+
+
+class ResponseCache:
+    """Content-addressed, gzip-compressed on-disk cache of engine responses.
+
+    Entries are keyed on the engine's request fingerprint (provider, model and tool
+    config), the prompt and the run index, so ``runs=3`` still replays three distinct
+    samples. Expired entries (``ttl_seconds``) are treated as misses, and once the
+    directory grows past ``max_bytes`` the least recently used entries are evicted.
+    In ``only`` mode misses raise :class:`CacheMissError` instead of calling the engine.
+    """
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_CACHE_DIR,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        mode: str = CACHE_USE,
+    ) -> None:
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unsupported cache mode '{mode}'.")
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def key(self, engine: Engine, prompt: str, run: int) -> str:
+        identity = {"engine": engine.fingerprint(), "prompt": prompt, "run": run}
+        encoded = json.dumps(identity, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: str) -> Optional[EngineResponse]:
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                entry = json.load(handle)
+            payload = entry["response"]
+            response = EngineResponse(content=payload["content"], cites=list(payload["cites"]), raw=payload["raw"])
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, KeyError, TypeError):
+            # Truncated or corrupt entry (e.g. a crash mid-write on a filesystem without
+            # atomic rename); drop it so the unit is fetched and cached again.
+            self._remove(path)
+            return None
+        if self.ttl_seconds is not None and time.time() - entry.get("created", 0) > self.ttl_seconds:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)  # Refresh mtime so eviction is least-recently-used.
+        except OSError:
+            pass
+        return response
+
+    def put(self, key: str, response: EngineResponse) -> None:
+        entry = {
+            "created": time.time(),
+            "response": {"content": response.content, "cites": list(response.cites), "raw": response.raw},
+        }
+        data = gzip.compress(json.dumps(entry, default=str).encode("utf-8"))
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        previous = _file_size(path)
+        os.replace(tmp_name, path)
+        self._account(len(data) - previous)
+
+    def fetch(self, engine: Engine, prompt: str, run: int, call: Callable[[], EngineResponse]) -> EngineResponse:
+        key = self.key(engine, prompt, run)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        self._check_replay(engine, prompt, run)
+        response = call()
+        self.put(key, response)
+        return response
+
+    async def afetch(
+        self,
+        engine: Engine,
+        prompt: str,
+        run: int,
+        call: Callable[[], Awaitable[EngineResponse]],
+    ) -> EngineResponse:
+        key = self.key(engine, prompt, run)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        self._check_replay(engine, prompt, run)
+        response = await call()
+        self.put(key, response)
+        return response
+
+    def _check_replay(self, engine: Engine, prompt: str, run: int) -> None:
+        if self.mode == CACHE_ONLY:
+            raise CacheMissError(f"No cached response for {engine.name} run {run}: {prompt[:80]!r}")
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json.gz"
+
+    def _account(self, delta: int) -> None:
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, _, size in self._entries())
+            else:
+                self._size += delta
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        # Trim to 90% of the cap so we do not evict again on the very next write.
+        target = int(self.max_bytes * 0.9) if self.max_bytes else 0
+        for _, path, size in entries:
+            if total <= target:
+                break
+            if self._remove(path):
+                total -= size
+        self._size = total
+
+    def _entries(self) -> list[Tuple[float, Path, int]]:
+        entries: list[Tuple[float, Path, int]] = []
+        if not self.directory.exists():
+            return entries
+        for path in self.directory.glob("*/*.json.gz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    @staticmethod
+    def _remove(path: Path) -> bool:
+        try:
+            path.unlink()
+            return True
+        except OSError:
+            return False
+
+
+class SharedResponses:
+    """Run each (engine, prompt, run) unit once per batch and hand its response to every task.
+
+    Task rows often repeat the same prompts and engines with different keyword or domain
+    sets. A unit requested while an identical one is in flight waits for that call, and
+    the last ``window`` finished units are kept in memory for later rows, so shared
+    units are paid for once and scored against each row's own keywords. Lookups that
+    miss go to ``cache`` (the on-disk :class:`ResponseCache`) if given.
+    """
+
+    def __init__(self, cache: Optional[ResponseSource] = None, window: int = DEFAULT_SHARE_WINDOW) -> None:
+        if window < 0:
+            raise ValueError("Share window cannot be negative.")
+        self.cache = cache
+        self.window = window
+        self.calls = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._finished: "OrderedDict[SharedKey, EngineResponse]" = OrderedDict()
+        self._in_flight: Dict[SharedKey, Any] = {}
+
+    def fetch(self, engine: Engine, prompt: str, run: int, call: Callable[[], EngineResponse]) -> EngineResponse:
+        key = (engine.name, prompt, run)
+        with self._lock:
+            response = self._reuse(key)
+            if response is not None:
+                return response
+            pending = self._in_flight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._in_flight[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+                note_shared()
+        if not leader:
+            return pending.result()
+        try:
+            response = self.cache.fetch(engine, prompt, run, call) if self.cache is not None else call()
+        except BaseException as exc:
+            self._settle(key, None)
+            pending.set_exception(exc)
+            raise
+        self._settle(key, response)
+        pending.set_result(response)
+        return response
+
+    async def afetch(
+        self,
+        engine: Engine,
+        prompt: str,
+        run: int,
+        call: Callable[[], Awaitable[EngineResponse]],
+    ) -> EngineResponse:
+        key = (engine.name, prompt, run)
+        with self._lock:
+            response = self._reuse(key)
+            if response is not None:
+                return response
+            pending = self._in_flight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._in_flight[key] = asyncio.get_running_loop().create_future()
+                self.calls += 1
+            else:
+                self.shared += 1
+                note_shared()
+        if not leader:
+            return await asyncio.shield(pending)
+        try:
+            response = await (self.cache.afetch(engine, prompt, run, call) if self.cache is not None else call())
+        except BaseException as exc:
+            self._settle(key, None)
+            pending.set_exception(exc)
+            pending.exception()  # Mark retrieved; waiters (if any) re-raise it themselves.
+            raise
+        self._settle(key, response)
+        pending.set_result(response)
+        return response
+
+    def _reuse(self, key: SharedKey) -> Optional[EngineResponse]:
+        response = self._finished.get(key)
+        if response is not None:
+            self._finished.move_to_end(key)
+            self.shared += 1
+            note_shared()
+        return response
+
+    def _settle(self, key: SharedKey, response: Optional[EngineResponse]) -> None:
+        with self._lock:
+            del self._in_flight[key]
+            if response is not None and self.window:
+                self._finished[key] = response
+                while len(self._finished) > self.window:
+                    self._finished.popitem(last=False)
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
@@ -1,25 +1,472 @@
 from __future__ import annotations
 
+import asyncio
 import csv
+import functools
+import io
 import json
+import os
+import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Sized
 
 import click
 
-from .evaluator import EvaluationResult, run_evaluation
+from .blobs import DEFAULT_BLOB_DIR, RAW_BLOB, RAW_INLINE, RAW_MODES, BlobStore, RawOptions
+from .cache import CACHE_ONLY, CACHE_USE, DEFAULT_CACHE_DIR, DEFAULT_SHARE_WINDOW, CacheMissError, ResponseCache
+from .engines.factory import close_shared_factory
+from .engines.ratelimit import RateLimitPolicy, parse_rate_limit, rate_limits
+from .engines.transport import http_transport, parse_base_url
+from .evaluator import EvaluationResult, arun_evaluation, run_evaluation
+from .journal import RunJournal
+from .matching import MatchOptions
+from .results_db import BUCKETS, ResultStore
+from .scheduler import parse_provider_concurrency
+from .stats import CONFIDENCE_LEVELS, AdaptiveRuns
+from .sheets import SheetsResultWriter
+from .profiling import DEFAULT_SAMPLE_INTERVAL, Profiler
+from .provider_batch import DEFAULT_POLL_SECONDS, EXECUTION_MODES, MODE_INTERACTIVE, MODE_PROVIDER_BATCH, ProviderBatchRunner
+from .rescore import DEFAULT_CHUNK_ROWS, rescore_stored
+from .telemetry import METRICS_FORMATS, opentelemetry_span_hook, telemetry
 from .task_runner import (
+    iter_results,
     load_tasks_from_csv,
-    load_tasks_from_sheet,
-    run_tasks,
-    write_results_to_csv,
-    write_results_to_sheet,
+    iter_tasks_from_sheet,
+    open_output_worksheet,
 )
+from .writers import (
+    CsvResultWriter,
+    FanOutWriter,
+    JsonlResultWriter,
+    ResultWriter,
+    SqliteResultWriter,
+    stdout_ndjson_writer,
+)
+
+
+def _cache_options(command: Callable[..., Any]) -> Callable[..., Any]:
+    """Add the response cache options and pass the resulting ``cache`` to the command.
+
+    A replay miss under ``--cache-only`` ends the command with a plain error message.
+    """
+
+    @functools.wraps(command)
+    def wrapper(
+        *args: Any,
+        use_cache: bool,
+        cache_only: bool,
+        cache_dir: Path,
+        cache_ttl: Optional[float],
+        cache_max_mb: Optional[float],
+        **kwargs: Any,
+    ) -> Any:
+        cache = None
+        if use_cache or cache_only:
+            cache = ResponseCache(
+                directory=cache_dir,
+                ttl_seconds=cache_ttl,
+                max_bytes=int(cache_max_mb * 1024 * 1024) if cache_max_mb else None,
+                mode=CACHE_ONLY if cache_only else CACHE_USE,
+            )
+        try:
+            return command(*args, cache=cache, **kwargs)
+        except CacheMissError as exc:
+            raise click.ClickException(str(exc)) from exc
+
+    options = [
+        click.option(
+            "--cache/--no-cache",
+            "use_cache",
+            default=False,
+            show_default=True,
+            help="Reuse stored responses for identical (engine, prompt, run) calls and store new ones.",
+        ),
+        click.option(
+            "--cache-only",
+            is_flag=True,
+            default=False,
+            help="Replay from the response cache only; fail instead of calling an engine on a miss.",
+        ),
+        click.option(
+            "--cache-dir",
+            default=DEFAULT_CACHE_DIR,
+            show_default=True,
+            type=click.Path(file_okay=False, dir_okay=True, path_type=Path),
+            help="Directory for the response cache.",
+        ),
+        click.option(
+            "--cache-ttl",
+            type=click.FloatRange(min=0),
+            help="Seconds after which cached responses expire (default: never).",
+        ),
+        click.option(
+            "--cache-max-mb",
+            type=click.FloatRange(min=0),
+            help="Size cap for the cache directory; least recently used entries are evicted.",
+        ),
+    ]
+    for option in reversed(options):
+        wrapper = option(wrapper)
+    return wrapper
+
+
+def _match_options(command: Callable[..., Any]) -> Callable[..., Any]:
+    """Add keyword matching switches and pass them to the command as ``match_options``."""
+
+    @functools.wraps(command)
+    def wrapper(*args: Any, whole_word: bool, casefold: bool, **kwargs: Any) -> Any:
+        return command(*args, match_options=MatchOptions(whole_word=whole_word, casefold=casefold), **kwargs)
+
+    wrapper = click.option(
+        "--casefold",
+        is_flag=True,
+        default=False,
+        help="Match keywords with full Unicode case folding (e.g., 'Straße' matches 'strasse').",
+    )(wrapper)
+    wrapper = click.option(
+        "--whole-word",
+        is_flag=True,
+        default=False,
+        help="Only count keyword matches that are not part of a longer word.",
+    )(wrapper)
+    return wrapper
+
+
+def _adaptive_options(command: Callable[..., Any]) -> Callable[..., Any]:
+    """Add adaptive run options and pass the resulting policy to the command as ``adaptive``."""
+
+    @functools.wraps(command)
+    def wrapper(
+        *args: Any,
+        max_runs: Optional[int],
+        min_runs: int,
+        target_ci: Optional[float],
+        target_rel_error: Optional[float],
+        confidence: str,
+        **kwargs: Any,
+    ) -> Any:
+        adaptive = None
+        if max_runs is not None:
+            if target_ci is None and target_rel_error is None:
+                raise click.UsageError("--max-runs needs --target-ci and/or --target-rel-error.")
+            try:
+                adaptive = AdaptiveRuns(
+                    max_runs=max_runs,
+                    min_runs=min_runs,
+                    ci_width=target_ci,
+                    rel_error=target_rel_error,
+                    confidence=float(confidence),
+                )
+            except ValueError as exc:
+                raise click.UsageError(str(exc)) from exc
+        elif target_ci is not None or target_rel_error is not None:
+            raise click.UsageError("--target-ci and --target-rel-error need --max-runs.")
+        return command(*args, adaptive=adaptive, **kwargs)
+
+    options = [
+        click.option(
+            "--max-runs",
+            type=click.IntRange(min=2),
+            help="Sample adaptively instead of a fixed --runs: add runs per (engine, prompt) pair, up to this many, "
+            "until every keyword and domain average is stable.",
+        ),
+        click.option(
+            "--min-runs",
+            default=2,
+            type=click.IntRange(min=2),
+            show_default=True,
+            help="Runs every pair gets before it may stop.",
+        ),
+        click.option(
+            "--target-ci",
+            type=click.FloatRange(min=0),
+            help="Stop a pair once every count's confidence interval half-width is at most this many mentions.",
+        ),
+        click.option(
+            "--target-rel-error",
+            type=click.FloatRange(min=0),
+            help="Stop a pair once every half-width is at most this fraction of its mean (e.g., 0.1).",
+        ),
+        click.option(
+            "--confidence",
+            type=click.Choice([str(level) for level in CONFIDENCE_LEVELS]),
+            default="0.95",
+            show_default=True,
+            help="Confidence level of the intervals.",
+        ),
+    ]
+    for option in reversed(options):
+        wrapper = option(wrapper)
+    return wrapper
+
+
+def _parse_rate_limits(ctx: click.Context, param: click.Parameter, specs: Sequence[str]) -> Dict[str, RateLimitPolicy]:
+    try:
+        return dict(parse_rate_limit(spec) for spec in specs)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), ctx=ctx, param=param) from exc
+
+
+def _raw_options(command: Callable[..., Any]) -> Callable[..., Any]:
+    """Add raw payload storage options and pass them to the command as ``raw_options``."""
+
+    @functools.wraps(command)
+    def wrapper(*args: Any, raw_mode: str, blob_dir: Path, records: bool, breakdown: bool, **kwargs: Any) -> Any:
+        store = BlobStore(blob_dir) if raw_mode == RAW_BLOB else None
+        raw_options = RawOptions(mode=raw_mode, store=store, records=records, breakdown=breakdown)
+        return command(*args, raw_options=raw_options, **kwargs)
+
+    wrapper = click.option(
+        "--breakdown",
+        is_flag=True,
+        default=False,
+        help="Add per-engine and per-prompt statistics (mean, std, 95% CI, min, max of every count) to each result.",
+    )(wrapper)
+    wrapper = click.option(
+        "--records/--no-records",
+        default=True,
+        show_default=True,
+        help="Keep per-response records in raw_responses; --no-records keeps only the aggregates (results cannot be rescored).",
+    )(wrapper)
+    wrapper = click.option(
+        "--blob-dir",
+        default=DEFAULT_BLOB_DIR,
+        show_default=True,
+        type=click.Path(file_okay=False, dir_okay=True, path_type=Path),
+        help="Directory for raw payload blobs (used with --raw-mode blob).",
+    )(wrapper)
+    wrapper = click.option(
+        "--raw-mode",
+        type=click.Choice(RAW_MODES),
+        default=RAW_INLINE,
+        show_default=True,
+        help="Keep raw provider payloads inline, store them as deduplicated blobs and keep references, or drop them.",
+    )(wrapper)
+    return wrapper
+
+
+def _transport_options(command: Callable[..., Any]) -> Callable[..., Any]:
+    """Add HTTP transport options; they override the ``TITER_*`` environment variables."""
+
+    @functools.wraps(command)
+    def wrapper(
+        *args: Any,
+        max_connections: Optional[int],
+        max_keepalive_connections: Optional[int],
+        keepalive_expiry: Optional[float],
+        http2: Optional[bool],
+        connect_timeout: Optional[float],
+        read_timeout: Optional[float],
+        total_timeout: Optional[float],
+        base_urls: List[str],
+        **kwargs: Any,
+    ) -> Any:
+        try:
+            http_transport.configure(
+                {
+                    "max_connections": max_connections,
+                    "max_keepalive_connections": max_keepalive_connections,
+                    "keepalive_expiry": keepalive_expiry,
+                    "http2": http2,
+                    "connect_timeout": connect_timeout,
+                    "read_timeout": read_timeout,
+                    "total_timeout": total_timeout,
+                },
+                dict(parse_base_url(value) for value in base_urls),
+            )
+        except ValueError as exc:
+            raise click.UsageError(str(exc)) from exc
+        return command(*args, **kwargs)
+
+    options = [
+        click.option(
+            "--max-connections",
+            type=click.IntRange(min=1),
+            help="Connection pool size per provider client [env TITER_MAX_CONNECTIONS; default 100].",
+        ),
+        click.option(
+            "--max-keepalive-connections",
+            type=click.IntRange(min=0),
+            help="Idle connections kept open per provider client [env TITER_MAX_KEEPALIVE_CONNECTIONS; default 20].",
+        ),
+        click.option(
+            "--keepalive-expiry",
+            type=click.FloatRange(min=0),
+            help="Seconds an idle connection is kept [env TITER_KEEPALIVE_EXPIRY; default 30].",
+        ),
+        click.option(
+            "--http2/--http1",
+            default=None,
+            help="Use HTTP/2 (needs 'h2') [env TITER_HTTP2; default HTTP/1.1].",
+        ),
+        click.option(
+            "--connect-timeout",
+            type=click.FloatRange(min=0),
+            help="Seconds to establish a connection [env TITER_CONNECT_TIMEOUT; default 10].",
+        ),
+        click.option(
+            "--read-timeout",
+            type=click.FloatRange(min=0),
+            help="Seconds to wait for each chunk of a response [env TITER_READ_TIMEOUT; default 180].",
+        ),
+        click.option(
+            "--total-timeout",
+            type=click.FloatRange(min=0),
+            help="Seconds for a whole engine call (enforced in --async mode) [env TITER_TOTAL_TIMEOUT; default 600].",
+        ),
+        click.option(
+            "--base-url",
+            "base_urls",
+            multiple=True,
+            help="Send a provider's requests elsewhere as '<provider>=<url>' [env TITER_<PROVIDER>_BASE_URL].",
+        ),
+    ]
+    for option in reversed(options):
+        wrapper = option(wrapper)
+    return wrapper
+
+
+def _telemetry_options(command: Callable[..., Any]) -> Callable[..., Any]:
+    """Add per-call telemetry options: summary on stderr, metrics file, unit timings, spans."""
+
+    @functools.wraps(command)
+    def wrapper(
+        *args: Any,
+        show_telemetry: bool,
+        metrics_file: Optional[Path],
+        metrics_format: str,
+        metrics_interval: float,
+        unit_timings: bool,
+        otel: bool,
+        **kwargs: Any,
+    ) -> Any:
+        if not (show_telemetry or metrics_file or unit_timings or otel):
+            return command(*args, **kwargs)
+        try:
+            span_hook = opentelemetry_span_hook() if otel else None
+        except ImportError as exc:
+            raise click.UsageError("--otel needs the 'opentelemetry-api' package.") from exc
+        telemetry.reset()
+        telemetry.configure(enabled=True, unit_timings=unit_timings, span_hook=span_hook)
+        stop = threading.Event()
+        if metrics_file:
+            # Refresh the textfile while the command runs so quota trouble shows up live.
+            def _export() -> None:
+                while not stop.wait(metrics_interval):
+                    telemetry.write_metrics(metrics_file, metrics_format)
+
+            threading.Thread(target=_export, name="titer-metrics", daemon=True).start()
+        try:
+            return command(*args, **kwargs)
+        finally:
+            stop.set()
+            if metrics_file:
+                telemetry.write_metrics(metrics_file, metrics_format)
+            if show_telemetry:
+                click.echo(telemetry.format_summary(), err=True)
+            telemetry.configure(enabled=False)
+
+    options = [
+        click.option(
+            "--telemetry",
+            "show_telemetry",
+            is_flag=True,
+            default=False,
+            help="Print per-engine latency percentiles, retries, 429s, tokens and bytes, plus stage timings, to stderr.",
+        ),
+        click.option(
+            "--metrics-file",
+            type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+            help="Write engine metrics to this Prometheus textfile, refreshed while running.",
+        ),
+        click.option(
+            "--metrics-format",
+            type=click.Choice(METRICS_FORMATS),
+            default="prometheus",
+            show_default=True,
+            help="Format of --metrics-file.",
+        ),
+        click.option(
+            "--metrics-interval",
+            type=click.FloatRange(min=0.1),
+            default=15.0,
+            show_default=True,
+            help="Seconds between --metrics-file refreshes.",
+        ),
+        click.option(
+            "--unit-timings",
+            is_flag=True,
+            default=False,
+            help="Add a 'timing' object (latency, retries, tokens, bytes, cached) to every raw_responses entry.",
+        ),
+        click.option(
+            "--otel",
+            is_flag=True,
+            default=False,
+            help="Emit an OpenTelemetry span per engine call (needs 'opentelemetry-api' and a configured SDK).",
+        ),
+    ]
+    for option in reversed(options):
+        wrapper = option(wrapper)
+    return wrapper
+
+
+def _profile_options(command: Callable[..., Any]) -> Callable[..., Any]:
+    """Add --profile: cProfile the command, time its stages and optionally sample stacks."""
+
+    @functools.wraps(command)
+    def wrapper(
+        *args: Any,
+        profile_path: Optional[Path],
+        profile_collapsed: Optional[Path],
+        profile_interval: float,
+        **kwargs: Any,
+    ) -> Any:
+        if not (profile_path or profile_collapsed):
+            return command(*args, **kwargs)
+        telemetry.reset()
+        telemetry.configure(enabled=True)
+        try:
+            with Profiler(profile_path, profile_collapsed, interval=profile_interval / 1000):
+                return command(*args, **kwargs)
+        finally:
+            # --telemetry already printed the same table.
+            if not kwargs.get("show_telemetry"):
+                click.echo(telemetry.format_summary(), err=True)
+            telemetry.configure(enabled=False)
+
+    options = [
+        click.option(
+            "--profile",
+            "profile_path",
+            type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+            help="Profile the command with cProfile (all threads) and write a pstats file; "
+            "stage timings are printed to stderr.",
+        ),
+        click.option(
+            "--profile-collapsed",
+            type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+            help="Also sample call stacks and write them in collapsed format for flame graphs.",
+        ),
+        click.option(
+            "--profile-interval",
+            type=click.FloatRange(min=0.5),
+            default=DEFAULT_SAMPLE_INTERVAL * 1000,
+            show_default=True,
+            help="Milliseconds between stack samples for --profile-collapsed.",
+        ),
+    ]
+    for option in reversed(options):
+        wrapper = option(wrapper)
+    return wrapper
 
 
 @click.group()
-def cli() -> None:
+@click.pass_context
+def cli(ctx: click.Context) -> None:
     """Run titer evaluations."""
+    # Engines and their SDK clients are pooled for the whole process; release them on exit.
+    ctx.call_on_close(close_shared_factory)
 
 
 @cli.command()
@@ -33,30 +480,98 @@ def cli() -> None:
     help="Domain wildcard to match against citations (e.g., '*.example.com'). Repeat for more.",
 )
 @click.option("--runs", default=1, type=click.IntRange(min=1), show_default=True, help="Number of iterations to average.")
+@click.option(
+    "--concurrency",
+    default=1,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Maximum number of engine calls to run in parallel.",
+)
+@click.option(
+    "--async/--threads",
+    "use_async",
+    default=False,
+    show_default=True,
+    help="Drive engine calls from one asyncio event loop instead of a thread pool.",
+)
+@click.option(
+    "--rate-limit",
+    "rate_limit_policies",
+    multiple=True,
+    callback=_parse_rate_limits,
+    help="Budget as '<provider>[/<model>]=rpm:N,tpm:N,concurrency:N' (e.g., 'gemini=rpm:10'). Repeat for more.",
+)
 @click.option(
     "--output-csv",
     type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
     help="Optional path to append the result row as CSV.",
 )
+@click.option(
+    "--output-db",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    help="Optional SQLite results database to add the result to (see 'titer query').",
+)
+@_match_options
+@_adaptive_options
+@_raw_options
+@_cache_options
+@_transport_options
+@_profile_options
+@_telemetry_options
 def run(
     prompts: List[str],
     engines: List[str],
     keywords: List[str],
     domain_wildcards: List[str],
     runs: int,
+    concurrency: int,
+    use_async: bool,
+    rate_limit_policies: Dict[str, RateLimitPolicy],
     output_csv: Optional[Path],
+    output_db: Optional[Path],
+    cache: Optional[ResponseCache],
+    raw_options: RawOptions,
+    adaptive: Optional[AdaptiveRuns],
+    match_options: MatchOptions,
 ) -> None:
     """Execute a single evaluation."""
-    result = run_evaluation(
-        prompts=prompts,
-        engine_names=engines,
-        keywords=keywords,
-        domain_wildcards=domain_wildcards,
-        runs=runs,
-    )
-    if output_csv:
-        _append_row(output_csv, result)
-    click.echo(json.dumps(result.as_dict(), indent=2))
+    _check_output_db(output_db, raw_options)
+    rate_limits.configure(rate_limit_policies)
+    if use_async:
+        result = asyncio.run(
+            arun_evaluation(
+                prompts=prompts,
+                engine_names=engines,
+                keywords=keywords,
+                domain_wildcards=domain_wildcards,
+                runs=runs,
+                concurrency=concurrency,
+                cache=cache,
+                match_options=match_options,
+                raw_options=raw_options,
+                adaptive=adaptive,
+            )
+        )
+    else:
+        result = run_evaluation(
+            prompts=prompts,
+            engine_names=engines,
+            keywords=keywords,
+            domain_wildcards=domain_wildcards,
+            runs=runs,
+            concurrency=concurrency,
+            cache=cache,
+            match_options=match_options,
+            raw_options=raw_options,
+            adaptive=adaptive,
+        )
+    with telemetry.stage("write"):
+        if output_csv:
+            _append_row(output_csv, result)
+        if output_db:
+            with SqliteResultWriter(output_db, match_options=match_options, label="run") as writer:
+                writer.write(result)
+        click.echo(json.dumps(result.as_dict(), indent=2))
 
 
 @cli.command(name="batch")
@@ -80,7 +595,27 @@ def run(
     "--output-file",
     required=False,
     type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
-    help="CSV file to write aggregated results.",
+    help="CSV file to write aggregated results (one row streamed per finished task).",
+)
+@click.option(
+    "--output-jsonl",
+    required=False,
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    help="JSONL file to stream full results to, one line per finished task.",
+)
+@click.option(
+    "--output-db",
+    required=False,
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    help="SQLite results database to add this batch to, one transaction per finished task (see 'titer query').",
+)
+@click.option(
+    "--stdout",
+    "stdout_format",
+    type=click.Choice(["json", "ndjson", "none"]),
+    default="json",
+    show_default=True,
+    help="stdout format: one JSON array at the end (keeps every result in memory), NDJSON per task, or nothing.",
 )
 @click.option(
     "--output-sheet",
@@ -92,6 +627,11 @@ def run(
     required=False,
     help="Worksheet name for output sheet (defaults to first).",
 )
+@click.option(
+    "--output-sheet-flush-seconds",
+    type=click.FloatRange(min=0),
+    help="Also push finished rows to the output sheet at most every N seconds while the batch runs.",
+)
 @click.option(
     "--service-account",
     required=False,
@@ -104,51 +644,543 @@ def run(
     show_default=True,
     help="Whether to make the output sheet publicly readable.",
 )
+@click.option(
+    "--concurrency",
+    default=1,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Maximum number of engine calls to run in parallel.",
+)
+@click.option(
+    "--async/--threads",
+    "use_async",
+    default=False,
+    show_default=True,
+    help="Drive engine calls from one asyncio event loop instead of a thread pool.",
+)
+@click.option(
+    "--mode",
+    "execution_mode",
+    type=click.Choice(EXECUTION_MODES),
+    default=MODE_INTERACTIVE,
+    show_default=True,
+    help="Call engines one prompt at a time, or submit every unit as OpenAI/Gemini batch jobs and wait for them.",
+)
+@click.option(
+    "--batch-poll-interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=DEFAULT_POLL_SECONDS,
+    show_default=True,
+    help="Seconds between status checks of provider batch jobs (--mode provider-batch).",
+)
+@click.option(
+    "--batch-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Cancel provider batch jobs still running after this many seconds (default: wait for the provider).",
+)
+@click.option(
+    "--rate-limit",
+    "rate_limit_policies",
+    multiple=True,
+    callback=_parse_rate_limits,
+    help="Budget as '<provider>[/<model>]=rpm:N,tpm:N,concurrency:N' (e.g., 'gemini=rpm:10'). Repeat for more.",
+)
+@click.option(
+    "--lanes/--no-lanes",
+    default=False,
+    show_default=True,
+    help="Schedule work units from all tasks on per-provider lanes instead of task by task.",
+)
+@click.option(
+    "--provider-concurrency",
+    "provider_concurrency",
+    multiple=True,
+    help="Per-provider lane limit as '<provider>=<N>' (e.g., 'gemini=2'). Defaults to --concurrency. Implies --lanes.",
+)
+@click.option(
+    "--share-units/--no-share-units",
+    default=False,
+    show_default=True,
+    help="Call identical (engine, prompt, run) units once and score the response for every row that needs it, "
+    "instead of sampling each row independently.",
+)
+@click.option(
+    "--share-window",
+    type=click.IntRange(min=0),
+    default=DEFAULT_SHARE_WINDOW,
+    show_default=True,
+    help="With --share-units, finished responses kept in memory for reuse by later rows (0 shares only calls in flight).",
+)
+@click.option(
+    "--journal",
+    "journal_path",
+    required=False,
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    help="Append every completed work unit to this JSONL journal so an interrupted batch can be resumed.",
+)
+@click.option(
+    "--resume",
+    "resume_path",
+    required=False,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path),
+    help="Resume from a journal written by an earlier --journal run; finished units are replayed, not re-run.",
+)
+@_match_options
+@_adaptive_options
+@_raw_options
+@_cache_options
+@_transport_options
+@_profile_options
+@_telemetry_options
 def batch(
     task_file: Path | None,
     task_sheet: str | None,
     task_sheet_worksheet: str | None,
     output_file: Path | None,
+    output_jsonl: Path | None,
+    output_db: Path | None,
+    stdout_format: str,
     output_sheet: str | None,
     output_sheet_worksheet: str | None,
+    output_sheet_flush_seconds: float | None,
     service_account: Path | None,
     share_output_sheet: bool,
+    concurrency: int,
+    use_async: bool,
+    execution_mode: str,
+    batch_poll_interval: float,
+    batch_timeout: float | None,
+    rate_limit_policies: Dict[str, RateLimitPolicy],
+    lanes: bool,
+    provider_concurrency: List[str],
+    share_units: bool,
+    share_window: int,
+    journal_path: Path | None,
+    resume_path: Path | None,
+    cache: Optional[ResponseCache],
+    raw_options: RawOptions,
+    adaptive: Optional[AdaptiveRuns],
+    match_options: MatchOptions,
 ) -> None:
     """Run evaluations for each row in a task CSV or Google Sheet."""
     if not task_file and not task_sheet:
         raise click.UsageError("One of --task-file or --task-sheet is required.")
     if task_file and task_sheet:
         raise click.UsageError("Provide only one of --task-file or --task-sheet.")
-    if not output_file and not output_sheet:
-        raise click.UsageError("One of --output-file or --output-sheet is required.")
+    if not output_file and not output_jsonl and not output_db and not output_sheet:
+        raise click.UsageError("One of --output-file, --output-jsonl, --output-db or --output-sheet is required.")
+    _check_output_db(output_db, raw_options)
+    try:
+        provider_limits = parse_provider_concurrency(provider_concurrency)
+    except ValueError as exc:
+        raise click.UsageError(str(exc)) from exc
+    rate_limits.configure(rate_limit_policies)
+    lanes = lanes or bool(provider_limits)
+    if lanes and use_async:
+        raise click.UsageError("--lanes cannot be combined with --async.")
+    if lanes and adaptive:
+        raise click.UsageError("--lanes cannot be combined with --max-runs.")
+    provider_batch = execution_mode == MODE_PROVIDER_BATCH
+    if provider_batch and (lanes or use_async or adaptive):
+        raise click.UsageError("--mode provider-batch cannot be combined with --lanes, --async or --max-runs.")
+    if journal_path and resume_path and journal_path.resolve() != resume_path.resolve():
+        raise click.UsageError("--resume keeps appending to its journal; pass the same path to --journal or omit it.")
 
+    tasks: Iterable[Dict[str, Any]]
     if task_sheet:
-        tasks = load_tasks_from_sheet(task_sheet, worksheet=task_sheet_worksheet, service_account_path=service_account)
+        # Rows are read page by page while the first tasks already run.
+        tasks = telemetry.timed_iter(
+            iter_tasks_from_sheet(task_sheet, worksheet=task_sheet_worksheet, service_account_path=service_account),
+            "load",
+        )
     else:
-        tasks = load_tasks_from_csv(task_file)  # type: ignore[arg-type]
-
-    results = run_tasks(tasks)
-    rows = [result.as_row() for result in results]
+        with telemetry.stage("load"):
+            tasks = load_tasks_from_csv(task_file)  # type: ignore[arg-type]
 
+    writers: List[ResultWriter] = []
     if output_file:
-        write_results_to_csv(output_file, rows)
-    sheet_url = None
+        writers.append(CsvResultWriter(output_file))
+    if output_jsonl:
+        writers.append(JsonlResultWriter(output_jsonl))
+    if output_db:
+        writers.append(SqliteResultWriter(output_db, match_options=match_options, label=str(task_file or task_sheet)))
+    sheet = None
+    sheet_writer = None
     if output_sheet is not None:
-        sheet_url = write_results_to_sheet(
+        # Open the output sheet before any engine call so credential problems fail fast.
+        sheet, worksheet = open_output_worksheet(
             output_sheet,
-            rows,
             worksheet=output_sheet_worksheet,
             service_account_path=service_account,
             share_public=share_output_sheet,
             place_first=True,
         )
+        sheet_writer = SheetsResultWriter(
+            worksheet,
+            expected_rows=len(tasks) if isinstance(tasks, Sized) else None,
+            flush_seconds=output_sheet_flush_seconds,
+        )
+        writers.append(sheet_writer)
+    stdout_writer = stdout_ndjson_writer() if stdout_format == "ndjson" else None
+    if stdout_writer:
+        writers.append(stdout_writer)
+    payload: List[Any] = []
+
+    journal = RunJournal(resume_path or journal_path) if (resume_path or journal_path) else None
+    results: Iterable[EvaluationResult]
+    if provider_batch:
+        results = ProviderBatchRunner(
+            cache=cache,
+            journal=journal,
+            match_options=match_options,
+            raw_options=raw_options,
+            poll_interval=batch_poll_interval,
+            timeout=batch_timeout,
+            concurrency=concurrency,
+            share_units=share_units,
+            progress=lambda message: click.echo(message, err=True),
+        ).run(tasks)
+    else:
+        results = iter_results(
+            tasks,
+            concurrency=concurrency,
+            use_async=use_async,
+            lanes=lanes,
+            provider_concurrency=provider_limits,
+            share_window=share_window if share_units else None,
+            adaptive=adaptive,
+            cache=cache,
+            journal=journal,
+            match_options=match_options,
+            raw_options=raw_options,
+        )
+    try:
+        with FanOutWriter(writers) as sink:
+            for result in results:
+                sink.write(result)
+                if stdout_format == "json":
+                    payload.append(result.as_dict())
+    finally:
+        if journal:
+            journal.close()
+
+    sheet_url = sheet.url if sheet is not None and sheet_writer and sheet_writer.rows_written else None
+
+    if stdout_writer:
+        if sheet_url:
+            stdout_writer.write_payload({"output_sheet_url": sheet_url})
+    elif stdout_format == "json":
+        if sheet_url:
+            payload.append({"output_sheet_url": sheet_url})
+        click.echo(json.dumps(payload, indent=2))
+
+
+@cli.group()
+def query() -> None:
+    """Aggregate trends from a SQLite results database written with --output-db."""
+
+
+def _trend_options(command: Callable[..., Any]) -> Callable[..., Any]:
+    options = [
+        click.option(
+            "--db",
+            "db_path",
+            required=True,
+            type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path),
+            help="SQLite results database.",
+        ),
+        click.option("--engine", "engines", multiple=True, help="Only this engine ('<provider>/<model>'). Repeat for more."),
+        click.option("--prompt", "prompts", multiple=True, help="Only this prompt. Repeat for more."),
+        click.option("--since", help="Earliest date or ISO timestamp (UTC, inclusive)."),
+        click.option("--until", help="Latest date or ISO timestamp (UTC, inclusive)."),
+        click.option(
+            "--bucket",
+            type=click.Choice(list(BUCKETS)),
+            default="day",
+            show_default=True,
+            help="Time bucket to aggregate by.",
+        ),
+        click.option(
+            "--format",
+            "output_format",
+            type=click.Choice(["json", "csv"]),
+            default="json",
+            show_default=True,
+            help="Output format.",
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+@query.command(name="keywords")
+@click.option("--keyword", "keywords", multiple=True, help="Only this keyword. Repeat for more.")
+@_trend_options
+def query_keywords(
+    keywords: List[str],
+    db_path: Path,
+    engines: List[str],
+    prompts: List[str],
+    since: Optional[str],
+    until: Optional[str],
+    bucket: str,
+    output_format: str,
+) -> None:
+    """Keyword mentions per response, by time bucket and engine."""
+    with ResultStore(db_path) as store:
+        rows = store.keyword_trend(keywords, engines, prompts, since=since, until=until, bucket=bucket)
+    _echo_rows(rows, output_format)
+
+
+@query.command(name="domains")
+@click.option("--domain", "domains", multiple=True, help="Only this domain wildcard. Repeat for more.")
+@_trend_options
+def query_domains(
+    domains: List[str],
+    db_path: Path,
+    engines: List[str],
+    prompts: List[str],
+    since: Optional[str],
+    until: Optional[str],
+    bucket: str,
+    output_format: str,
+) -> None:
+    """Matching citations per response, by time bucket and engine."""
+    with ResultStore(db_path) as store:
+        rows = store.domain_trend(domains, engines, prompts, since=since, until=until, bucket=bucket)
+    _echo_rows(rows, output_format)
+
+
+@query.command(name="runs")
+@click.option(
+    "--db",
+    "db_path",
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path),
+    help="SQLite results database.",
+)
+@click.option("--format", "output_format", type=click.Choice(["json", "csv"]), default="json", show_default=True)
+def query_runs(db_path: Path, output_format: str) -> None:
+    """List the batches stored in the database."""
+    with ResultStore(db_path) as store:
+        rows = store.list_runs()
+    _echo_rows(rows, output_format)
+
+
+@cli.command(name="rescore")
+@click.argument(
+    "inputs",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path),
+)
+@click.option("--keyword", "keywords", multiple=True, help="Keyword to count instead of each row's own. Repeat for more.")
+@click.option(
+    "--domain",
+    "domain_wildcards",
+    multiple=True,
+    help="Domain wildcard to match instead of each row's own. Repeat for more.",
+)
+@click.option(
+    "--output-file",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    help="Write rescored rows to this CSV file.",
+)
+@click.option(
+    "--output-jsonl",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    help="Write rescored results to this JSONL file.",
+)
+@click.option(
+    "--output-db",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    help="Add rescored results to this SQLite results database (see 'titer query').",
+)
+@click.option(
+    "--stdout",
+    "stdout_format",
+    type=click.Choice(["ndjson", "none"]),
+    default="none",
+    show_default=True,
+    help="Also print each rescored result as NDJSON.",
+)
+@click.option(
+    "--workers",
+    default=os.cpu_count() or 1,
+    type=click.IntRange(min=1),
+    show_default="CPU count",
+    help="Worker processes that decode and rescore rows.",
+)
+@click.option(
+    "--chunk-rows",
+    default=DEFAULT_CHUNK_ROWS,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Rows handed to a worker at a time.",
+)
+@_match_options
+def rescore(
+    inputs: List[Path],
+    keywords: List[str],
+    domain_wildcards: List[str],
+    output_file: Optional[Path],
+    output_jsonl: Optional[Path],
+    output_db: Optional[Path],
+    stdout_format: str,
+    workers: int,
+    chunk_rows: int,
+    match_options: MatchOptions,
+) -> None:
+    """Recount keywords and domains in stored results (CSV or JSONL outputs) without calling engines.
+
+    Rows keep their original timestamps, prompts, engines and raw responses; omitted
+    --keyword or --domain sets keep each row's own.
+    """
+    if not output_file and not output_jsonl and not output_db and stdout_format == "none":
+        raise click.UsageError("One of --output-file, --output-jsonl, --output-db or --stdout ndjson is required.")
+    resolved = {path.resolve() for path in inputs}
+    for output in (output_file, output_jsonl):
+        if output is not None and output.resolve() in resolved:
+            raise click.UsageError(f"{output} is also an input; write rescored rows to a new file.")
+
+    writers: List[ResultWriter] = []
+    if output_file:
+        writers.append(CsvResultWriter(output_file))
+    if output_jsonl:
+        writers.append(JsonlResultWriter(output_jsonl))
+    if output_db:
+        writers.append(SqliteResultWriter(output_db, match_options=match_options, label="rescore"))
+    if stdout_format == "ndjson":
+        writers.append(stdout_ndjson_writer())
+    rows = 0
+    with FanOutWriter(writers) as sink:
+        try:
+            for result in rescore_stored(
+                inputs,
+                keywords=keywords or None,
+                domain_wildcards=domain_wildcards or None,
+                match_options=match_options,
+                workers=workers,
+                chunk_rows=chunk_rows,
+            ):
+                sink.write(result)
+                rows += 1
+        except ValueError as exc:
+            raise click.ClickException(f"{exc} Rows written with --no-records keep only aggregates.") from exc
+    click.echo(f"Rescored {rows} rows.", err=True)
+
 
-    payload = [result.as_dict() for result in results]
-    if sheet_url:
-        payload.append({"output_sheet_url": sheet_url})
+@cli.command(name="bench")
+@click.option(
+    "--profile",
+    default="typical",
+    show_default=True,
+    help="Fake engine profile: 'tiny', 'typical' or 'heavy', optionally with overrides like 'heavy,latency=50'.",
+)
+@click.option("--prompts", default=50, type=click.IntRange(min=1), show_default=True, help="Prompts per evaluation.")
+@click.option("--runs", default=3, type=click.IntRange(min=1), show_default=True, help="Runs per evaluation.")
+@click.option("--keywords", default=20, type=click.IntRange(min=0), show_default=True, help="Keywords to count.")
+@click.option("--domains", default=10, type=click.IntRange(min=0), show_default=True, help="Domain wildcards to match.")
+@click.option("--concurrency", default=8, type=click.IntRange(min=1), show_default=True, help="run_evaluation concurrency.")
+@click.option("--repeat", default=5, type=click.IntRange(min=1), show_default=True, help="Rounds per stage (median is reported).")
+@click.option("--format", "output_format", type=click.Choice(["table", "json"]), default="table", show_default=True)
+@click.option(
+    "--save",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    help="Write the timings as JSON, e.g. to use as a later --baseline.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path),
+    help="Timings JSON from an earlier --save; exit with an error if a stage regressed.",
+)
+@click.option(
+    "--tolerance",
+    default=0.25,
+    type=click.FloatRange(min=0),
+    show_default=True,
+    help="Allowed per-call slowdown against --baseline (0.25 = 25%).",
+)
+def bench(
+    profile: str,
+    prompts: int,
+    runs: int,
+    keywords: int,
+    domains: int,
+    concurrency: int,
+    repeat: int,
+    output_format: str,
+    save: Optional[Path],
+    baseline: Optional[Path],
+    tolerance: float,
+) -> None:
+    """Measure titer's own overhead with the in-process fake engine (no API calls)."""
+    from .bench import compare, format_table, run_benchmarks
+
+    params = {
+        "profile": profile,
+        "prompts": prompts,
+        "runs": runs,
+        "keywords": keywords,
+        "domains": domains,
+        "concurrency": concurrency,
+    }
+    previous = json.loads(baseline.read_text(encoding="utf-8")) if baseline else None
+    if previous is not None and previous.get("params") != params:
+        raise click.UsageError(f"--baseline was recorded with different settings: {previous.get('params')}.")
+    try:
+        timings = run_benchmarks(repeat=repeat, **params)  # type: ignore[arg-type]
+    except ValueError as exc:
+        raise click.UsageError(str(exc)) from exc
+    data = {"params": params, "stages": [timing.as_dict() for timing in timings]}
+    if save:
+        save.parent.mkdir(parents=True, exist_ok=True)
+        save.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    click.echo(json.dumps(data, indent=2) if output_format == "json" else format_table(timings))
+    if previous is not None:
+        regressions = compare(timings, previous["stages"], tolerance)
+        if regressions:
+            raise click.ClickException("Performance regressions:\n" + "\n".join(regressions))
+
+
+@cli.command(name="blob")
+@click.argument("ref")
+@click.option(
+    "--blob-dir",
+    default=DEFAULT_BLOB_DIR,
+    show_default=True,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
+    help="Directory the blobs were written to.",
+)
+def show_blob(ref: str, blob_dir: Path) -> None:
+    """Print the raw payload stored under a 'sha256:...' reference."""
+    try:
+        payload = BlobStore(blob_dir).get(ref)
+    except FileNotFoundError as exc:
+        raise click.ClickException(f"No blob '{ref}' in {blob_dir}.") from exc
+    except ValueError as exc:
+        raise click.UsageError(str(exc)) from exc
     click.echo(json.dumps(payload, indent=2))
 
 
+def _check_output_db(output_db: Path | None, raw_options: RawOptions) -> None:
+    if output_db and not raw_options.records:
+        raise click.UsageError("--output-db stores counts per engine call, which --no-records drops; omit one of them.")
+
+
+def _echo_rows(rows: List[dict], output_format: str) -> None:
+    if output_format == "json":
+        click.echo(json.dumps(rows, indent=2))
+        return
+    if rows:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+        click.echo(buffer.getvalue(), nl=False)
+
+
 def _append_row(path: Path, result: EvaluationResult) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     row = result.as_row()
@@ -1,17 +1,26 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, List, Mapping, Sequence
+from typing import TYPE_CHECKING, Any, List, Mapping, Optional, Sequence
+
+if TYPE_CHECKING:
+    from .batch import ProviderBatch
 
 
 @dataclass
 class EngineResponse:
-    """Normalized LLM response."""
+    """Normalized LLM response.
+
+    ``timing`` is only set when per-unit telemetry timings are enabled; it is not
+    cached or journaled.
+    """
 
     content: str
     cites: List[str]
     raw: Mapping[str, Any]
+    timing: Optional[Mapping[str, Any]] = None
 
 
 class Engine(ABC):
@@ -24,6 +33,29 @@ class Engine(ABC):
         """Execute the prompt and return a normalized response."""
         raise NotImplementedError
 
+    def fingerprint(self) -> Mapping[str, Any]:
+        """Describe everything besides the prompt that shapes a response (model, tools).
+
+        Used to key cached responses; engines with request options should extend it.
+        """
+        return {"engine": self.name}
+
+    async def arun(self, prompt: str) -> EngineResponse:
+        """Async variant of :meth:`run`.
+
+        Engines backed by an async SDK client should override this. The default
+        adapter runs the blocking :meth:`run` in a worker thread so existing
+        engines keep working on the async evaluator path.
+        """
+        return await asyncio.to_thread(self.run, prompt)
+
+    def provider_batch(self) -> "ProviderBatch | None":
+        """The provider's batch API for this engine, or ``None`` if it has none.
+
+        Engines without one are called one prompt at a time in provider-batch mode.
+        """
+        return None
+
 
 def count_engines(engine_names: Sequence[str]) -> Mapping[str, int]:
     """Utility for validation in the CLI."""
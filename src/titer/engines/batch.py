@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Mapping, Optional, Sequence, Tuple, Union
+
+from .base import EngineResponse
+
+# Requests per job; the OpenAI Batch API accepts at most 50,000 lines per input file.
+BATCH_MAX_REQUESTS = 50_000
+
+# (custom id, prompt) as submitted, and (custom id, response or error message) as collected.
+BatchRequest = Tuple[str, str]
+BatchOutcome = Tuple[str, Union[EngineResponse, str]]
+
+
+@dataclass(frozen=True)
+class BatchStatus:
+    """Provider-reported state of a submitted batch job.
+
+    ``done`` is set once the job stopped (completed, failed, expired or cancelled);
+    results may then be collected, and requests without one are reported as failed.
+    ``message`` carries the provider's error for jobs that failed as a whole.
+    """
+
+    state: str
+    done: bool
+    completed: Optional[int] = None
+    total: Optional[int] = None
+    message: Optional[str] = None
+
+
+class ProviderBatch(ABC):
+    """One engine's access to its provider's asynchronous batch API.
+
+    Prompts are submitted as a JSONL job, the job is polled until the provider is done
+    with it, and its responses are normalized like interactive calls. Jobs typically
+    finish within hours at a discount and under a quota separate from interactive calls.
+    """
+
+    max_requests: int = BATCH_MAX_REQUESTS
+
+    @abstractmethod
+    def submit(self, requests: Sequence[BatchRequest]) -> str:
+        """Upload and start one job; returns the provider's job id."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def status(self, job_id: str) -> BatchStatus:
+        raise NotImplementedError
+
+    @abstractmethod
+    def results(self, job_id: str) -> Iterator[BatchOutcome]:
+        """Yield the outcome of every request the finished job reported on."""
+        raise NotImplementedError
+
+    def cancel(self, job_id: str) -> None:
+        """Ask the provider to stop a job; best effort."""
+
+
+def encode_jsonl(lines: Iterable[Mapping[str, Any]]) -> bytes:
+    return "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines).encode("utf-8")
+
+
+def decode_jsonl(data: Union[bytes, str]) -> Iterator[Mapping[str, Any]]:
+    text = data.decode("utf-8") if isinstance(data, bytes) else data
+    for line in text.splitlines():
+        if line.strip():
+            yield json.loads(line)
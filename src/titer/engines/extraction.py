@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable, List, Mapping, Sequence, Tuple
+from urllib.parse import urlparse
+
+from ..telemetry import telemetry
+
+
+def serialize_response(response: Any) -> Mapping[str, Any]:
+    """Dump an SDK response object to plain JSON-like data."""
+    if hasattr(response, "model_dump"):
+        dumped = response.model_dump()
+        if isinstance(dumped, Mapping):
+            return dumped
+    if hasattr(response, "model_dump_json"):
+        try:
+            data = json.loads(response.model_dump_json())
+            if isinstance(data, Mapping):
+                return data
+        except Exception:
+            pass
+    if isinstance(response, Mapping):
+        return response
+    return {"repr": repr(response)}
+
+
+def find_urls(raw: Any) -> List[str]:
+    """Collect every absolute URL string in ``raw`` in depth-first order.
+
+    Strings without ``://`` cannot have both a scheme and a netloc, so they are
+    rejected before paying for ``urlparse``.
+    """
+    urls: List[str] = []
+    stack: List[Any] = [raw]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            if "://" in value:
+                parsed = urlparse(value)
+                if parsed.scheme and parsed.netloc:
+                    urls.append(value)
+        elif isinstance(value, Mapping):
+            stack.extend(reversed(list(value.values())))
+        elif isinstance(value, Sequence) and not isinstance(value, (bytes, bytearray)):
+            stack.extend(reversed(value))
+    return urls
+
+
+def extract_payload(response: Any, explicit_cites: Iterable[str] = ()) -> Tuple[Mapping[str, Any], List[str]]:
+    """Serialize ``response`` once and derive both the raw payload and its citations.
+
+    ``explicit_cites`` (provider citation objects) come first, followed by every URL
+    found in the dump, de-duplicated in order.
+    """
+    with telemetry.stage("serialize"):
+        raw = serialize_response(response)
+    with telemetry.stage("extract"):
+        cites = list(explicit_cites)
+        cites.extend(find_urls(raw))
+        return raw, dedupe(cites)
+
+
+def dedupe(items: Sequence[str]) -> List[str]:
+    seen: set[str] = set()
+    ordered: List[str] = []
+    for item in items:
+        if item in seen:
+            continue
+        seen.add(item)
+        ordered.append(item)
+    return ordered
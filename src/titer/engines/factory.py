@@ -1,27 +1,101 @@
 from __future__ import annotations
 
-from typing import Callable, Dict
+import asyncio
+import threading
+import weakref
+from importlib import metadata
+from typing import Any, Callable, ClassVar, Dict
 
 from .base import Engine
-from .openai_engine import OpenAIEngine
-from .gemini_engine import GeminiEngine
+from .transport import http_transport
+
+ENTRY_POINT_GROUP = "titer.engines"
 
 
 class EngineFactory:
-    """Factory to resolve engine names to instances."""
+    """Factory to resolve engine names to instances.
+
+    Engines are cached per ``<provider>/<model>`` and every engine of a provider shares
+    one SDK client (one async client per event loop), built with the provider's
+    :mod:`transport <titer.engines.transport>` settings, so repeated evaluations reuse
+    the same HTTP connection pool. ``EngineFactory.shared()`` returns the process-wide instance; call ``close()`` to
+    release the pooled clients. All methods are safe to call from multiple threads.
+
+    Provider SDKs are imported only when their provider is first used. Third-party
+    engines can be registered with :meth:`register` or exposed through an entry point
+    in the ``titer.engines`` group (name = provider, value = a callable taking the
+    model name and returning an :class:`Engine`); entry points are only resolved when
+    an unknown provider is requested.
+    """
+
+    _shared: ClassVar["EngineFactory | None"] = None
+    _shared_lock: ClassVar[threading.Lock] = threading.Lock()
 
     def __init__(self) -> None:
         self._registry: Dict[str, Callable[[str], Engine]] = {
             "openai": self._build_openai,
             "gemini": self._build_gemini,
+            "fake": self._build_fake,
         }
+        self._lock = threading.RLock()
+        self._engines: Dict[str, Engine] = {}
+        self._clients: Dict[str, Any] = {}
+        self._async_clients: Dict[str, "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]"] = {}
+
+    @classmethod
+    def shared(cls) -> "EngineFactory":
+        """Return the process-wide factory, creating it on first use."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def register(self, provider: str, builder: Callable[[str], Engine]) -> None:
+        """Register (or replace) the builder used for ``<provider>/<model>`` names."""
+        with self._lock:
+            self._registry[provider] = builder
+
+    def unregister(self, provider: str) -> None:
+        """Forget ``provider``'s builder and the engines already built with it."""
+        with self._lock:
+            self._registry.pop(provider, None)
+            for key in [key for key in self._engines if key.split("/", 1)[0] == provider]:
+                del self._engines[key]
 
     def create(self, engine_name: str) -> Engine:
         provider, model = self._split_engine_name(engine_name)
-        builder = self._registry.get(provider)
-        if not builder:
-            raise ValueError(f"Unsupported provider '{provider}'.")
-        return builder(model)
+        key = f"{provider}/{model}"
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                return engine
+            builder = self._registry.get(provider) or self._load_entry_point(provider)
+            if not builder:
+                raise ValueError(f"Unsupported provider '{provider}'.")
+            engine = self._engines[key] = builder(model)
+            return engine
+
+    def close(self) -> None:
+        """Close pooled SDK clients and drop cached engines."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            # Async clients belong to their event loops and are released with them.
+            self._async_clients.clear()
+            self._engines.clear()
+        for client in clients:
+            close = getattr(client, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception:
+                    pass  # Closing is best effort; the process is usually exiting.
+
+    def __enter__(self) -> "EngineFactory":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
     def _split_engine_name(self, engine_name: str) -> tuple[str, str]:
         if "/" not in engine_name:
@@ -31,8 +105,70 @@ class EngineFactory:
             raise ValueError("Engine name must include both provider and model.")
         return provider, model
 
+    def _client(self, provider: str, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            client = self._clients.get(provider)
+            if client is None:
+                client = self._clients[provider] = build()
+            return client
+
+    def _async_client(self, provider: str, build: Callable[[], Any]) -> Any:
+        """Per-provider async client for the running event loop (httpx async pools are loop-bound)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.setdefault(provider, weakref.WeakKeyDictionary())
+            client = clients.get(loop)
+            if client is None:
+                client = clients[loop] = build()
+            return client
+
+    def _load_entry_point(self, provider: str) -> Callable[[str], Engine] | None:
+        for entry_point in metadata.entry_points(group=ENTRY_POINT_GROUP):
+            if entry_point.name == provider:
+                builder = entry_point.load()
+                self._registry[provider] = builder
+                return builder
+        return None
+
     def _build_openai(self, model: str) -> Engine:
-        return OpenAIEngine(model=model)
+        from openai import AsyncOpenAI, OpenAI
+
+        from .openai_engine import OpenAIEngine
+
+        transport = http_transport.for_provider("openai")
+        return OpenAIEngine(
+            model=model,
+            client=self._client("openai", lambda: OpenAI(**transport.openai_client_kwargs())),
+            transport=transport,
+            async_client_factory=lambda: self._async_client(
+                "openai", lambda: AsyncOpenAI(**transport.openai_client_kwargs(asynchronous=True))
+            ),
+        )
 
     def _build_gemini(self, model: str) -> Engine:
-        return GeminiEngine(model=model)
+        from google import genai
+
+        from .gemini_engine import GeminiEngine
+
+        transport = http_transport.for_provider("gemini")
+        return GeminiEngine(
+            model=model,
+            client=self._client("gemini", lambda: genai.Client(http_options=transport.gemini_http_options())),
+            transport=transport,
+            async_client_factory=lambda: self._async_client(
+                "gemini", lambda: genai.Client(http_options=transport.gemini_http_options())
+            ),
+        )
+
+    def _build_fake(self, model: str) -> Engine:
+        from .fake_engine import FakeEngine
+
+        return FakeEngine(profile=model)
+
+
+def close_shared_factory() -> None:
+    """Close the process-wide factory if it was ever created."""
+    with EngineFactory._shared_lock:
+        factory, EngineFactory._shared = EngineFactory._shared, None
+    if factory is not None:
+        factory.close()
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import random
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Mapping
+
+from .base import Engine, EngineResponse
+from .extraction import extract_payload
+from .ratelimit import EngineLimiter, rate_limits
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "lognormal")
+
+_WORDS = (
+    "vector database search index embedding query latency cloud open source scalable "
+    "retrieval model ranking hybrid filter cluster storage analytics platform api"
+).split()
+
+
+@dataclass(frozen=True)
+class FakeProfile:
+    """Shape of the synthetic responses produced by :class:`FakeEngine`.
+
+    ``latency_ms`` is the mean simulated call latency; ``jitter_ms`` spreads it
+    uniformly (``uniform``) or is the standard deviation of a log-normal with that mean
+    (``lognormal``).
+    """
+
+    content_chars: int = 2000
+    cites: int = 5
+    depth: int = 4
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    distribution: str = "constant"
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Seconds to wait for one call."""
+        mean = self.latency_ms / 1000
+        spread = self.jitter_ms / 1000
+        if mean <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            return max(0.0, rng.uniform(mean - spread, mean + spread))
+        if self.distribution == "lognormal" and spread > 0:
+            # Pick mu and sigma so the distribution has the requested mean and deviation.
+            sigma2 = math.log1p((spread / mean) ** 2)
+            return rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+        return mean
+
+
+PROFILES: Dict[str, FakeProfile] = {
+    "tiny": FakeProfile(content_chars=200, cites=1, depth=1),
+    "typical": FakeProfile(content_chars=2000, cites=5, depth=4),
+    "heavy": FakeProfile(content_chars=20000, cites=40, depth=8),
+}
+
+_FIELDS = {
+    "content": ("content_chars", int),
+    "cites": ("cites", int),
+    "depth": ("depth", int),
+    "latency": ("latency_ms", float),
+    "jitter": ("jitter_ms", float),
+    "dist": ("distribution", str),
+}
+
+
+def parse_profile(spec: str) -> FakeProfile:
+    """Parse ``<preset>[,key=value...]`` (e.g. ``heavy,latency=300,jitter=100,dist=lognormal``).
+
+    Presets are ``tiny``, ``typical`` and ``heavy``; keys are ``content`` (characters),
+    ``cites``, ``depth``, ``latency`` and ``jitter`` (milliseconds) and ``dist``
+    (``constant``, ``uniform`` or ``lognormal``). A spec made only of overrides starts
+    from ``typical``.
+    """
+    parts = [part.strip() for part in spec.split(",") if part.strip()]
+    profile = PROFILES["typical"]
+    if parts and "=" not in parts[0]:
+        name = parts.pop(0)
+        if name not in PROFILES:
+            raise ValueError(f"Unknown fake profile '{name}'. Choose from: {', '.join(PROFILES)}.")
+        profile = PROFILES[name]
+    overrides: Dict[str, Any] = {}
+    for part in parts:
+        key, sep, value = part.partition("=")
+        if not sep or key not in _FIELDS:
+            raise ValueError(f"Unknown fake profile setting '{part}'.")
+        field, cast = _FIELDS[key]
+        try:
+            overrides[field] = cast(value)
+        except ValueError as exc:
+            raise ValueError(f"Invalid value for '{key}' in fake profile '{spec}'.") from exc
+    profile = replace(profile, **overrides)
+    if profile.distribution not in LATENCY_DISTRIBUTIONS:
+        raise ValueError(f"Unknown latency distribution '{profile.distribution}'.")
+    return profile
+
+
+class FakeEngine(Engine):
+    """In-process engine returning synthetic responses, for benchmarks and dry runs.
+
+    Responses are deterministic per prompt: content is drawn from a small vocabulary,
+    citations are ``https://siteN.example.com/...`` URLs, and the raw payload nests them
+    ``depth`` levels deep so citation extraction does realistic work. Calls go through
+    the ``fake`` rate limiter like real engines do.
+    """
+
+    def __init__(self, profile: str = "typical", limiter: EngineLimiter | None = None) -> None:
+        self.profile = parse_profile(profile)
+        self.limiter = limiter or rate_limits.for_engine("fake", profile)
+        self.name = f"fake/{profile}"
+        self._latency_rng = random.Random()
+
+    def run(self, prompt: str) -> EngineResponse:
+        def _call() -> EngineResponse:
+            delay = self.profile.sample_latency(self._latency_rng)
+            if delay:
+                time.sleep(delay)
+            return self._build(prompt)
+
+        return self.limiter.call(_call, tokens=self.limiter.estimate_tokens(prompt))
+
+    async def arun(self, prompt: str) -> EngineResponse:
+        async def _call() -> EngineResponse:
+            delay = self.profile.sample_latency(self._latency_rng)
+            if delay:
+                await asyncio.sleep(delay)
+            return self._build(prompt)
+
+        return await self.limiter.acall(_call, tokens=self.limiter.estimate_tokens(prompt))
+
+    def _build(self, prompt: str) -> EngineResponse:
+        seed = int.from_bytes(hashlib.sha256(f"{self.name}\0{prompt}".encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        content = _synthetic_text(rng, self.profile.content_chars)
+        urls = [f"https://site{rng.randrange(50)}.example.com/page/{index}" for index in range(self.profile.cites)]
+        payload = {
+            "id": f"fake-{seed:016x}",
+            "model": self.name,
+            "output": [{"type": "message", "content": [{"type": "output_text", "text": content}]}],
+            "sources": _nest(urls, self.profile.depth),
+        }
+        raw, cites = extract_payload(payload, urls[: len(urls) // 2])
+        return EngineResponse(content=content, cites=cites, raw=raw)
+
+
+def _synthetic_text(rng: random.Random, size: int) -> str:
+    words: List[str] = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def _nest(urls: List[str], depth: int) -> Mapping[str, Any]:
+    node: Dict[str, Any] = {"urls": [{"url": url, "title": f"Result {index}"} for index, url in enumerate(urls)]}
+    for level in range(max(depth - 1, 0)):
+        node = {"level": level, "children": [node], "meta": {"note": "synthetic"}}
+    return node
+
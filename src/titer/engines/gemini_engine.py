@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-import time
-from typing import Any, List, Mapping, MutableSequence, Sequence
-from urllib.parse import urlparse
+import asyncio
+import io
+from typing import Any, Callable, Iterator, List, Mapping, MutableSequence, Sequence
 
 from google import genai
 from google.genai import types
 
 from .base import Engine, EngineResponse
+from .batch import BatchOutcome, BatchRequest, BatchStatus, ProviderBatch, decode_jsonl, encode_jsonl
+from .extraction import extract_payload
+from .ratelimit import EngineLimiter, rate_limits
+from .transport import TransportOptions, http_transport
 
 
 class GeminiEngine(Engine):
@@ -19,42 +23,165 @@ class GeminiEngine(Engine):
         client: genai.Client | None = None,
         max_retries: int = 3,
         backoff_seconds: float = 2.0,
+        limiter: EngineLimiter | None = None,
+        transport: TransportOptions | None = None,
+        async_client_factory: Callable[[], genai.Client] | None = None,
     ) -> None:
         self.model = model
-        self.client = client or genai.Client()
+        self.transport = transport or http_transport.for_provider("gemini")
+        self.client = client or genai.Client(http_options=self.transport.gemini_http_options())
+        # A caller-supplied client is used as is; otherwise the async side gets a client
+        # per event loop, because the ``.aio`` httpx pool is bound to the loop that first used it.
+        self._owns_client = client is None
+        self._async_client_factory = async_client_factory
+        self._async_client: genai.Client | None = None
+        self._async_loop: asyncio.AbstractEventLoop | None = None
         self.max_retries = max_retries
         self.backoff_seconds = backoff_seconds
+        # Retry for rate limits / transient errors because free plan is bursty.
+        self.limiter = limiter or rate_limits.for_engine(
+            "gemini", model, max_retries=max_retries, backoff_seconds=backoff_seconds
+        )
         self.name = f"gemini/{model}"
 
+    def fingerprint(self) -> Mapping[str, Any]:
+        return {"engine": self.name, "tools": _request_config().model_dump(mode="json", exclude_none=True)}
+
     def run(self, prompt: str) -> EngineResponse:
-        # Retry for rate limits / transient errors because free plan is bursty.
-        last_err: Exception | None = None
-        for attempt in range(self.max_retries):
-            try:
-                tool = types.Tool(google_search=types.GoogleSearch())
-                config = types.GenerateContentConfig(tools=[tool])
-                response = self.client.models.generate_content(
+        try:
+            response = self.limiter.call(
+                lambda: self.client.models.generate_content(
                     model=self.model,
                     contents=prompt,
-                    config=config,
-                )
-                content = _extract_content(response)
-                cites = _extract_citations(response)
-                raw_payload = _serialize_response(response)
-                return EngineResponse(content=content, cites=cites, raw=raw_payload)
-            except Exception as exc:  # noqa: BLE001
-                last_err = exc
-                if attempt + 1 >= self.max_retries or not _is_retryable(exc):
-                    raise RuntimeError(f"Gemini request failed: {exc}") from exc
-                sleep_for = self.backoff_seconds * (2**attempt)
-                time.sleep(sleep_for)
-        raise RuntimeError(f"Gemini request failed: {last_err}")  # defensive
-
-
-def _is_retryable(exc: Exception) -> bool:
-    text = str(exc).lower()
-    retry_tokens = ("rate", "quota", "429", "resource exhausted", "exceeded")
-    return any(token in text for token in retry_tokens)
+                    config=_request_config(),
+                ),
+                tokens=self.limiter.estimate_tokens(prompt),
+                usage=_usage_tokens,
+            )
+        except Exception as exc:  # noqa: BLE001
+            raise RuntimeError(f"Gemini request failed: {exc}") from exc
+        return _build_response(response)
+
+    async def arun(self, prompt: str) -> EngineResponse:
+        client = self._get_async_client()
+        try:
+            response = await self.limiter.acall(
+                lambda: self.transport.with_deadline(
+                    client.aio.models.generate_content(
+                        model=self.model,
+                        contents=prompt,
+                        config=_request_config(),
+                    )
+                ),
+                tokens=self.limiter.estimate_tokens(prompt),
+                usage=_usage_tokens,
+            )
+        except Exception as exc:  # noqa: BLE001
+            raise RuntimeError(f"Gemini request failed: {exc}") from exc
+        return _build_response(response)
+
+    def _get_async_client(self) -> genai.Client:
+        if self._async_client_factory is not None:
+            return self._async_client_factory()
+        if not self._owns_client:
+            return self.client
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = genai.Client(http_options=self.transport.gemini_http_options())
+            self._async_loop = loop
+        return self._async_client
+
+    def provider_batch(self) -> "GeminiBatch":
+        return GeminiBatch(self)
+
+
+_BATCH_DONE = (
+    types.JobState.JOB_STATE_SUCCEEDED,
+    types.JobState.JOB_STATE_PARTIALLY_SUCCEEDED,
+    types.JobState.JOB_STATE_FAILED,
+    types.JobState.JOB_STATE_CANCELLED,
+    types.JobState.JOB_STATE_EXPIRED,
+)
+
+
+class GeminiBatch(ProviderBatch):
+    """generateContent calls through Gemini batch mode (uploaded JSONL file in, JSONL file out)."""
+
+    def __init__(self, engine: GeminiEngine) -> None:
+        self.engine = engine
+        self.client = engine.client
+
+    def submit(self, requests: Sequence[BatchRequest]) -> str:
+        # Batch lines are REST requests, so the tool config uses the API's field names.
+        tools = [tool.model_dump(mode="json", exclude_none=True, by_alias=True) for tool in _request_config().tools or []]
+        lines = (
+            {"key": key, "request": {"contents": [{"role": "user", "parts": [{"text": prompt}]}], "tools": tools}}
+            for key, prompt in requests
+        )
+        try:
+            upload = self.client.files.upload(
+                file=io.BytesIO(encode_jsonl(lines)),
+                config=types.UploadFileConfig(display_name="titer-batch", mime_type="jsonl"),
+            )
+            job = self.client.batches.create(
+                model=self.engine.model,
+                src=upload.name,
+                config=types.CreateBatchJobConfig(display_name=f"titer {self.engine.name}"),
+            )
+        except Exception as exc:  # noqa: BLE001
+            raise RuntimeError(f"Gemini batch submission failed: {exc}") from exc
+        return str(job.name)
+
+    def status(self, job_id: str) -> BatchStatus:
+        try:
+            job = self.client.batches.get(name=job_id)
+        except Exception as exc:  # noqa: BLE001
+            raise RuntimeError(f"Gemini batch status failed: {exc}") from exc
+        state = job.state or types.JobState.JOB_STATE_UNSPECIFIED
+        return BatchStatus(
+            state=state.value,
+            done=state in _BATCH_DONE,
+            message=job.error.message if job.error else None,
+        )
+
+    def results(self, job_id: str) -> Iterator[BatchOutcome]:
+        try:
+            job = self.client.batches.get(name=job_id)
+            file_name = job.dest.file_name if job.dest else None
+            content = self.client.files.download(file=file_name) if file_name else b""
+        except Exception as exc:  # noqa: BLE001
+            raise RuntimeError(f"Gemini batch results failed: {exc}") from exc
+        for line in decode_jsonl(content):
+            key = str(line.get("key"))
+            if line.get("error") or not line.get("response"):
+                error = line.get("error") or {}
+                message = error.get("message") if isinstance(error, Mapping) else error
+                yield key, f"Gemini batch request failed: {message or 'no response'}"
+                continue
+            yield key, _build_response(types.GenerateContentResponse.model_validate(line["response"]))
+
+    def cancel(self, job_id: str) -> None:
+        try:
+            self.client.batches.cancel(name=job_id)
+        except Exception:  # noqa: BLE001
+            pass
+
+
+def _request_config() -> types.GenerateContentConfig:
+    tool = types.Tool(google_search=types.GoogleSearch())
+    return types.GenerateContentConfig(tools=[tool])
+
+
+def _build_response(response: Any) -> EngineResponse:
+    content = _extract_content(response)
+    raw_payload, cites = extract_payload(response, _grounding_citations(response))
+    return EngineResponse(content=content, cites=cites, raw=raw_payload)
+
+
+def _usage_tokens(response: Any) -> int | None:
+    usage = getattr(response, "usage_metadata", None)
+    total = getattr(usage, "total_token_count", None)
+    return total if isinstance(total, int) else None
 
 
 def _extract_content(response: Any) -> str:
@@ -75,7 +202,7 @@ def _extract_content(response: Any) -> str:
     return str(response)
 
 
-def _extract_citations(response: Any) -> List[str]:
+def _grounding_citations(response: Any) -> List[str]:
     cites: List[str] = []
 
     # Try explicit citation objects if present.
@@ -86,57 +213,4 @@ def _extract_citations(response: Any) -> List[str]:
                 for item in grounded.supporting_contents or []:
                     if hasattr(item, "uri") and item.uri:
                         cites.append(str(item.uri))
-
-    # Fallback: search entire payload for URLs.
-    raw = _serialize_response(response)
-    cites.extend(_find_urls_in_mapping(raw))
-    return _dedupe(cites)
-
-
-def _find_urls_in_mapping(raw: Mapping[str, Any]) -> List[str]:
-    urls: List[str] = []
-
-    def _walk(value: Any) -> None:
-        if isinstance(value, str):
-            parsed = urlparse(value)
-            if parsed.scheme and parsed.netloc:
-                urls.append(value)
-        elif isinstance(value, Mapping):
-            for nested in value.values():
-                _walk(nested)
-        elif isinstance(value, Sequence) and not isinstance(value, (str, bytes, bytearray)):
-            for item in value:
-                _walk(item)
-
-    _walk(raw)
-    return urls
-
-
-def _dedupe(items: Sequence[str]) -> List[str]:
-    seen: set[str] = set()
-    ordered: List[str] = []
-    for item in items:
-        if item in seen:
-            continue
-        seen.add(item)
-        ordered.append(item)
-    return ordered
-
-
-def _serialize_response(response: Any) -> Mapping[str, Any]:
-    if hasattr(response, "model_dump"):
-        dumped = response.model_dump()
-        if isinstance(dumped, Mapping):
-            return dumped
-    if hasattr(response, "model_dump_json"):
-        import json
-
-        try:
-            data = json.loads(response.model_dump_json())
-            if isinstance(data, Mapping):
-                return data
-        except Exception:
-            pass
-    if isinstance(response, Mapping):
-        return response
-    return {"repr": repr(response)}
+    return cites
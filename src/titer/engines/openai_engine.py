@@ -1,12 +1,25 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Mapping, MutableSequence, Sequence
-from urllib.parse import urlparse
+import asyncio
+from typing import Any, Callable, Iterator, List, Mapping, MutableSequence, Sequence
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from openai._exceptions import BadRequestError, OpenAIError
+from openai._models import construct_type
+from openai.types.responses import Response
 
 from .base import Engine, EngineResponse
+from .batch import BatchOutcome, BatchRequest, BatchStatus, ProviderBatch, decode_jsonl, encode_jsonl
+from .extraction import extract_payload
+from .ratelimit import EngineLimiter, rate_limits
+from .transport import TransportOptions, http_transport
+
+
+WEB_SEARCH_TOOLS = [{"type": "web_search"}]
+RESPONSES_ENDPOINT = "/v1/responses"
+BATCH_WINDOW = "24h"
+BATCH_SDK_RETRIES = 2
+_BATCH_DONE = ("completed", "failed", "expired", "cancelled")
 
 
 class OpenAIEngine(Engine):
@@ -16,30 +29,164 @@ class OpenAIEngine(Engine):
         self,
         model: str = "gpt-4.1",
         client: OpenAI | None = None,
+        async_client: AsyncOpenAI | None = None,
+        limiter: EngineLimiter | None = None,
+        transport: TransportOptions | None = None,
+        async_client_factory: Callable[[], AsyncOpenAI] | None = None,
     ) -> None:
         self.model = model
-        self.client = client or OpenAI()
+        self.transport = transport or http_transport.for_provider("openai")
+        self.client = client or OpenAI(**self.transport.openai_client_kwargs())
+        self.limiter = limiter or rate_limits.for_engine("openai", model)
         self.name = f"openai/{model}"
+        self._async_client = async_client
+        self._async_client_factory = async_client_factory
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+
+    def fingerprint(self) -> Mapping[str, Any]:
+        return {"engine": self.name, "tools": WEB_SEARCH_TOOLS}
 
     def run(self, prompt: str) -> EngineResponse:
         try:
-            response = self.client.responses.create(
-                model=self.model,
-                input=prompt,
-                tools=[{"type": "web_search"}],
+            response = self.limiter.call(
+                lambda: self.client.responses.create(
+                    model=self.model,
+                    input=prompt,
+                    tools=WEB_SEARCH_TOOLS,
+                ),
+                tokens=self.limiter.estimate_tokens(prompt),
+                usage=_usage_tokens,
+            )
+        except OpenAIError as exc:
+            raise _wrap_error(exc) from exc
+        return _build_response(response)
+
+    async def arun(self, prompt: str) -> EngineResponse:
+        client = self._get_async_client()
+        try:
+            response = await self.limiter.acall(
+                lambda: self.transport.with_deadline(
+                    client.responses.create(
+                        model=self.model,
+                        input=prompt,
+                        tools=WEB_SEARCH_TOOLS,
+                    )
+                ),
+                tokens=self.limiter.estimate_tokens(prompt),
+                usage=_usage_tokens,
             )
         except OpenAIError as exc:
-            if isinstance(exc, BadRequestError) and "web_search" in str(exc).lower():
-                raise RuntimeError(
-                    "OpenAI request failed: web_search is not enabled for this account or plan. "
-                    "Enable the capability on your OpenAI plan to continue."
-                ) from exc
-            raise RuntimeError(f"OpenAI request failed: {exc}") from exc
+            raise _wrap_error(exc) from exc
+        except asyncio.TimeoutError as exc:
+            raise RuntimeError(f"OpenAI request failed: no response within {self.transport.total_timeout}s.") from exc
+        return _build_response(response)
+
+    def provider_batch(self) -> "OpenAIBatch":
+        return OpenAIBatch(self)
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        if self._async_client_factory is not None:
+            return self._async_client_factory()
+        # httpx async pools are bound to the loop that first used them, so build
+        # the default client lazily and rebuild it if we are driven by a new loop.
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or (self._async_loop is not None and self._async_loop is not loop):
+            self._async_client = AsyncOpenAI(**self.transport.openai_client_kwargs(asynchronous=True))
+            self._async_loop = loop
+        return self._async_client
+
+
+class OpenAIBatch(ProviderBatch):
+    """Responses API calls through the OpenAI Batch API (JSONL file in, JSONL file out)."""
+
+    def __init__(self, engine: OpenAIEngine) -> None:
+        self.engine = engine
+        # Batch calls bypass the rate limiter, so they keep the SDK's own retries.
+        self.client = engine.client.with_options(max_retries=BATCH_SDK_RETRIES)
+
+    def submit(self, requests: Sequence[BatchRequest]) -> str:
+        lines = (
+            {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": RESPONSES_ENDPOINT,
+                "body": {"model": self.engine.model, "input": prompt, "tools": WEB_SEARCH_TOOLS},
+            }
+            for custom_id, prompt in requests
+        )
+        try:
+            upload = self.client.files.create(file=("titer-batch.jsonl", encode_jsonl(lines)), purpose="batch")
+            job = self.client.batches.create(
+                input_file_id=upload.id,
+                endpoint=RESPONSES_ENDPOINT,  # type: ignore[arg-type]
+                completion_window=BATCH_WINDOW,
+                metadata={"engine": self.engine.name},
+            )
+        except OpenAIError as exc:
+            raise _wrap_error(exc) from exc
+        return job.id
+
+    def status(self, job_id: str) -> BatchStatus:
+        try:
+            job = self.client.batches.retrieve(job_id)
+        except OpenAIError as exc:
+            raise _wrap_error(exc) from exc
+        counts = job.request_counts
+        errors = getattr(job.errors, "data", None) or []
+        return BatchStatus(
+            state=job.status,
+            done=job.status in _BATCH_DONE,
+            completed=counts.completed + counts.failed if counts else None,
+            total=counts.total if counts else None,
+            message="; ".join(str(error.message) for error in errors if error.message) or None,
+        )
+
+    def results(self, job_id: str) -> Iterator[BatchOutcome]:
+        try:
+            job = self.client.batches.retrieve(job_id)
+            files = [file_id for file_id in (job.output_file_id, job.error_file_id) if file_id]
+            contents = [self.client.files.content(file_id).content for file_id in files]
+        except OpenAIError as exc:
+            raise _wrap_error(exc) from exc
+        for content in contents:
+            for line in decode_jsonl(content):
+                custom_id = str(line.get("custom_id"))
+                response = line.get("response") or {}
+                body = response.get("body") or {}
+                if line.get("error") or response.get("status_code") != 200:
+                    error = line.get("error") or body.get("error") or {}
+                    message = error.get("message") if isinstance(error, Mapping) else error
+                    yield custom_id, f"OpenAI batch request failed: {message or response.get('status_code')}"
+                    continue
+                # Built the way the SDK builds HTTP responses: leniently, without validation.
+                yield custom_id, _build_response(construct_type(type_=Response, value=body))
+
+    def cancel(self, job_id: str) -> None:
+        try:
+            self.client.batches.cancel(job_id)
+        except OpenAIError:
+            pass
+
+
+def _build_response(response: Any) -> EngineResponse:
+    content = _extract_content(response)
+    raw_payload, cites = extract_payload(response, _annotation_citations(response))
+    return EngineResponse(content=content, cites=cites, raw=raw_payload)
+
+
+def _usage_tokens(response: Any) -> int | None:
+    usage = getattr(response, "usage", None)
+    total = getattr(usage, "total_tokens", None)
+    return total if isinstance(total, int) else None
 
-        content = _extract_content(response)
-        cites = _extract_citations(response)
-        raw_payload = _serialize_response(response)
-        return EngineResponse(content=content, cites=cites, raw=raw_payload)
+
+def _wrap_error(exc: OpenAIError) -> RuntimeError:
+    if isinstance(exc, BadRequestError) and "web_search" in str(exc).lower():
+        return RuntimeError(
+            "OpenAI request failed: web_search is not enabled for this account or plan. "
+            "Enable the capability on your OpenAI plan to continue."
+        )
+    return RuntimeError(f"OpenAI request failed: {exc}")
 
 
 def _extract_content(response: Any) -> str:
@@ -70,7 +217,7 @@ def _extract_content(response: Any) -> str:
     return str(response)
 
 
-def _extract_citations(response: Any) -> List[str]:
+def _annotation_citations(response: Any) -> List[str]:
     cites: List[str] = []
 
     if hasattr(response, "output") and response.output:
@@ -84,10 +231,7 @@ def _extract_citations(response: Any) -> List[str]:
                     cite = _pull_citation(annotation)
                     if cite:
                         cites.append(cite)
-
-    raw = _serialize_response(response)
-    cites.extend(_find_urls_in_mapping(raw))
-    return _dedupe(cites)
+    return cites
 
 
 def _pull_citation(annotation: Any) -> str | None:
@@ -101,52 +245,3 @@ def _pull_citation(annotation: Any) -> str | None:
             if uri:
                 return str(uri)
     return None
-
-
-def _find_urls_in_mapping(raw: Mapping[str, Any]) -> List[str]:
-    urls: List[str] = []
-
-    def _walk(value: Any) -> None:
-        if isinstance(value, str):
-            parsed = urlparse(value)
-            if parsed.scheme and parsed.netloc:
-                urls.append(value)
-        elif isinstance(value, Mapping):
-            for nested in value.values():
-                _walk(nested)
-        elif isinstance(value, Sequence) and not isinstance(value, (str, bytes, bytearray)):
-            for item in value:
-                _walk(item)
-
-    _walk(raw)
-    return urls
-
-
-def _dedupe(items: Sequence[str]) -> List[str]:
-    seen: set[str] = set()
-    ordered: List[str] = []
-    for item in items:
-        if item in seen:
-            continue
-        seen.add(item)
-        ordered.append(item)
-    return ordered
-
-
-def _serialize_response(response: Any) -> Mapping[str, Any]:
-    if hasattr(response, "model_dump"):
-        dumped = response.model_dump()
-        if isinstance(dumped, Mapping):
-            return dumped
-    if hasattr(response, "model_dump_json"):
-        import json
-
-        try:
-            data = json.loads(response.model_dump_json())
-            if isinstance(data, Mapping):
-                return data
-        except Exception:
-            pass
-    if isinstance(response, Mapping):
-        return response
-    return {"repr": repr(response)}
@@ -0,0 +1,427 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple, TypeVar
+
+from ..telemetry import note_retry, note_tokens
+
+T = TypeVar("T")
+
+# Throttling errors by SDK exception name (openai, google-api-core) and by message, for
+# errors that carry neither a type nor a status code we recognise.
+_RATE_LIMIT_ERRORS = ("RateLimitError", "TooManyRequests", "ResourceExhausted")
+_RATE_LIMIT_TEXT = re.compile(
+    r"\b429\b|rate[ _-]?limit|too many requests|quota exceeded|exceeded your current quota|resource[ _]exhausted"
+)
+# Transient failures worth retrying without cutting concurrency.
+_TRANSIENT_ERRORS = (
+    "APIConnectionError",
+    "APITimeoutError",
+    "InternalServerError",
+    "ServerError",
+    "ConnectError",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "RemoteProtocolError",
+)
+_TRANSIENT_STATUS = (408, 409, 500, 502, 503, 504)
+# Longest Retry-After honoured; a bogus header must not park a worker for hours.
+MAX_RETRY_AFTER_SECONDS = 120.0
+
+
+@dataclass
+class RateLimitPolicy:
+    """Budget for a provider (``openai``) or a single model (``openai/gpt-4.1``)."""
+
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    max_concurrency: int = 64
+    min_concurrency: int = 1
+    estimated_output_tokens: int = 1024
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``per_minute / 60`` tokens per second.
+
+    ``reserve`` debits immediately (the balance may go negative) and returns how long the
+    caller has to wait, so the same bucket serves blocking and asyncio callers.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None) -> None:
+        if per_minute <= 0:
+            raise ValueError("Rate must be positive.")
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self._lock:
+            self._refill()
+            self._tokens -= min(amount, self.capacity)
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """Give back (positive) or take (negative) tokens once the real cost is known."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + delta)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class AdaptiveConcurrency:
+    """Concurrency limit that grows additively on success and halves on throttling (AIMD)."""
+
+    def __init__(self, max_limit: int, min_limit: int = 1, cooldown_seconds: float = 1.0) -> None:
+        if min_limit < 1 or max_limit < min_limit:
+            raise ValueError("Concurrency limits must satisfy 1 <= min <= max.")
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.cooldown_seconds = cooldown_seconds
+        self._limit = max_limit
+        self._active = 0
+        self._successes = 0
+        self._last_cut = 0.0
+        self._cond = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = []
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._active >= self._limit:
+                self._cond.wait()
+            self._active += 1
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self._active >= self._limit:
+                return False
+            self._active += 1
+            return True
+
+    async def aacquire(self) -> None:
+        """Like :meth:`acquire`, but parks the calling task instead of the thread."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._active < self._limit:
+                    self._active += 1
+                    return
+                waiter: "asyncio.Future[None]" = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self, throttled: bool = False) -> None:
+        with self._cond:
+            self._active -= 1
+            now = time.monotonic()
+            if throttled:
+                self._successes = 0
+                # A burst of 429s from calls already in flight should only cut the limit once.
+                if now - self._last_cut >= self.cooldown_seconds:
+                    self._limit = max(self.min_limit, self._limit // 2)
+                    self._last_cut = now
+            else:
+                self._successes += 1
+                if self._successes >= self._limit and self._limit < self.max_limit:
+                    self._limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                pass  # The waiter's loop is closed; nobody is waiting any more.
+
+
+class RateLimiter:
+    """Request/token budgets plus adaptive concurrency for one key."""
+
+    def __init__(self, key: str, policy: RateLimitPolicy) -> None:
+        self.key = key
+        self.policy = policy
+        self.requests = TokenBucket(policy.requests_per_minute) if policy.requests_per_minute else None
+        self.tokens = TokenBucket(policy.tokens_per_minute) if policy.tokens_per_minute else None
+        self.concurrency = AdaptiveConcurrency(policy.max_concurrency, policy.min_concurrency)
+
+    def reserve(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+
+class RateLimitRegistry:
+    """Process-wide limiters keyed by provider and by ``provider/model``.
+
+    Every provider gets an adaptive concurrency limiter by default; request and token
+    budgets only apply to keys configured through :meth:`configure`.
+    """
+
+    def __init__(self) -> None:
+        self._policies: Dict[str, RateLimitPolicy] = {}
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, policies: Mapping[str, RateLimitPolicy]) -> None:
+        with self._lock:
+            for key, policy in policies.items():
+                self._policies[key] = policy
+                self._limiters.pop(key, None)
+
+    def limiters_for(self, provider: str, model: str) -> List[RateLimiter]:
+        limiters: List[RateLimiter] = []
+        with self._lock:
+            for key in (provider, f"{provider}/{model}"):
+                limiter = self._limiters.get(key)
+                if limiter is None:
+                    policy = self._policies.get(key)
+                    if policy is None and key != provider:
+                        continue
+                    limiter = self._limiters[key] = RateLimiter(key, policy or RateLimitPolicy())
+                limiters.append(limiter)
+        return limiters
+
+    def for_engine(
+        self,
+        provider: str,
+        model: str,
+        max_retries: int = 3,
+        backoff_seconds: float = 2.0,
+    ) -> "EngineLimiter":
+        return EngineLimiter(self, provider, model, max_retries=max_retries, backoff_seconds=backoff_seconds)
+
+
+class EngineLimiter:
+    """Wraps engine calls with budgets, adaptive concurrency and retries with backoff.
+
+    Throttling errors (429, quota) are retried and halve the adaptive concurrency;
+    transient server and connection errors are retried without cutting it. The limiter
+    owns retries, so the SDK clients it wraps are built with their own retries off.
+    """
+
+    def __init__(
+        self,
+        registry: RateLimitRegistry,
+        provider: str,
+        model: str,
+        max_retries: int = 3,
+        backoff_seconds: float = 2.0,
+    ) -> None:
+        self.registry = registry
+        self.provider = provider
+        self.model = model
+        self.max_retries = max(1, max_retries)
+        self.backoff_seconds = backoff_seconds
+
+    def estimate_tokens(self, prompt: str) -> int:
+        limiters = self.registry.limiters_for(self.provider, self.model)
+        output_tokens = max(limiter.policy.estimated_output_tokens for limiter in limiters)
+        return len(prompt) // 4 + output_tokens
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        tokens: int = 0,
+        usage: Callable[[T], Optional[int]] | None = None,
+    ) -> T:
+        for attempt in range(self.max_retries):
+            limiters = self._acquire(tokens)
+            try:
+                result = fn()
+            except Exception as exc:
+                throttled = is_rate_limit_error(exc)
+                _release(limiters, throttled)
+                if not (throttled or is_transient_error(exc)) or attempt + 1 >= self.max_retries:
+                    raise
+                note_retry(throttled)
+                time.sleep(self._backoff(exc, attempt))
+                continue
+            _release(limiters, False)
+            actual = usage(result) if usage else None
+            note_tokens(actual)
+            _reconcile(limiters, tokens, actual)
+            return result
+        raise AssertionError("unreachable")  # defensive
+
+    async def acall(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        tokens: int = 0,
+        usage: Callable[[T], Optional[int]] | None = None,
+    ) -> T:
+        for attempt in range(self.max_retries):
+            limiters = await self._aacquire(tokens)
+            try:
+                result = await fn()
+            except Exception as exc:
+                throttled = is_rate_limit_error(exc)
+                _release(limiters, throttled)
+                if not (throttled or is_transient_error(exc)) or attempt + 1 >= self.max_retries:
+                    raise
+                note_retry(throttled)
+                await asyncio.sleep(self._backoff(exc, attempt))
+                continue
+            _release(limiters, False)
+            actual = usage(result) if usage else None
+            note_tokens(actual)
+            _reconcile(limiters, tokens, actual)
+            return result
+        raise AssertionError("unreachable")  # defensive
+
+    def _acquire(self, tokens: int) -> List[RateLimiter]:
+        limiters = self.registry.limiters_for(self.provider, self.model)
+        for limiter in limiters:
+            limiter.concurrency.acquire()
+        wait = max(limiter.reserve(tokens) for limiter in limiters)
+        if wait > 0:
+            time.sleep(wait)
+        return limiters
+
+    async def _aacquire(self, tokens: int) -> List[RateLimiter]:
+        limiters = self.registry.limiters_for(self.provider, self.model)
+        acquired: List[RateLimiter] = []
+        try:
+            for limiter in limiters:
+                await limiter.concurrency.aacquire()
+                acquired.append(limiter)
+        except BaseException:
+            _release(acquired, False)
+            raise
+        wait = max(limiter.reserve(tokens) for limiter in limiters)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return limiters
+
+    def _backoff(self, exc: Exception, attempt: int) -> float:
+        retry_after = retry_after_seconds(exc)
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), MAX_RETRY_AFTER_SECONDS)
+        delay = self.backoff_seconds * (2**attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """Detect 429 / quota errors from any provider SDK.
+
+    Exception types and HTTP status codes decide first; the message is only consulted
+    for errors that carry neither.
+    """
+    if type(exc).__name__ in _RATE_LIMIT_ERRORS:
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status == 429
+    return _RATE_LIMIT_TEXT.search(str(exc).lower()) is not None
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Detect server-side and connection failures that a retry may get past."""
+    if type(exc).__name__ in _TRANSIENT_ERRORS:
+        return True
+    status = _status_code(exc)
+    return status is not None and (status in _TRANSIENT_STATUS or status >= 500)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for status in (
+        getattr(exc, "status_code", None),
+        getattr(exc, "code", None),
+        getattr(getattr(exc, "response", None), "status_code", None),
+    ):
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def parse_rate_limit(value: str) -> Tuple[str, RateLimitPolicy]:
+    """Parse ``<key>=rpm:N,tpm:N,concurrency:N`` as given on the command line.
+
+    Every value must be positive, counts must be whole numbers, and ``min-concurrency``
+    may not exceed ``concurrency`` (64 unless given).
+    """
+    key, sep, spec = value.partition("=")
+    key = key.strip()
+    if not sep or not key:
+        raise ValueError(f"Expected '<provider>[/<model>]=rpm:N,tpm:N,concurrency:N', got '{value}'.")
+    fields: Dict[str, Any] = {}
+    names = {
+        "rpm": "requests_per_minute",
+        "tpm": "tokens_per_minute",
+        "concurrency": "max_concurrency",
+        "min-concurrency": "min_concurrency",
+        "output-tokens": "estimated_output_tokens",
+    }
+    for part in spec.split(","):
+        name, _, raw = part.strip().partition(":")
+        if name not in names:
+            raise ValueError(f"Unknown rate limit setting '{name}' in '{value}'.")
+        try:
+            number = float(raw)
+        except ValueError as exc:
+            raise ValueError(f"Invalid number for '{name}' in '{value}'.") from exc
+        if not number > 0 or number == float("inf"):
+            raise ValueError(f"'{name}' must be positive in '{value}'.")
+        if name not in ("rpm", "tpm"):
+            if not number.is_integer():
+                raise ValueError(f"'{name}' must be a whole number in '{value}'.")
+            number = int(number)
+        fields[names[name]] = number
+    policy = RateLimitPolicy(**fields)
+    if policy.min_concurrency > policy.max_concurrency:
+        raise ValueError(
+            f"'min-concurrency' ({policy.min_concurrency}) exceeds 'concurrency' ({policy.max_concurrency}) in '{value}'."
+        )
+    return key, policy
+
+
+def _wake(waiter: "asyncio.Future[None]") -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def _release(limiters: List[RateLimiter], throttled: bool) -> None:
+    for limiter in limiters:
+        limiter.concurrency.release(throttled=throttled)
+
+
+def _reconcile(limiters: List[RateLimiter], estimated: int, actual: Optional[int]) -> None:
+    if actual is None:
+        return
+    for limiter in limiters:
+        if limiter.tokens:
+            limiter.tokens.adjust(estimated - actual)
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Seconds requested by a ``Retry-After`` header on the error's HTTP response, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+rate_limits = RateLimitRegistry()
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import math
+import os
+import threading
+from dataclasses import dataclass, fields, replace
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, TypeVar
+
+T = TypeVar("T")
+
+ENV_PREFIX = "TITER_"
+_FLAGS = {"1": True, "true": True, "yes": True, "on": True, "0": False, "false": False, "no": False, "off": False}
+
+
+def _at_least(cast: Callable[[str], Any], minimum: float) -> Callable[[str], Any]:
+    def parse(raw: str) -> Any:
+        value = cast(raw.strip())
+        if not math.isfinite(value) or value < minimum:
+            raise ValueError(f"expected a number of at least {minimum:g}")
+        return value
+
+    return parse
+
+
+def _flag(raw: str) -> bool:
+    try:
+        return _FLAGS[raw.strip().lower()]
+    except KeyError:
+        raise ValueError("expected 1/0, true/false, yes/no or on/off") from None
+
+
+# Same ranges as the matching CLI options.
+_ENV_FIELDS = {
+    "max_connections": ("MAX_CONNECTIONS", _at_least(int, 1)),
+    "max_keepalive_connections": ("MAX_KEEPALIVE_CONNECTIONS", _at_least(int, 0)),
+    "keepalive_expiry": ("KEEPALIVE_EXPIRY", _at_least(float, 0)),
+    "http2": ("HTTP2", _flag),
+    "connect_timeout": ("CONNECT_TIMEOUT", _at_least(float, 0)),
+    "read_timeout": ("READ_TIMEOUT", _at_least(float, 0)),
+    "total_timeout": ("TOTAL_TIMEOUT", _at_least(float, 0)),
+}
+
+
+@dataclass(frozen=True)
+class TransportOptions:
+    """HTTP connection pool and timeout settings for one provider's SDK clients.
+
+    ``read_timeout`` bounds the wait for each chunk of a response (web-search calls
+    can take a while before the first byte), ``total_timeout`` bounds a whole call and
+    is enforced around async calls. ``base_url`` points the provider SDK at another
+    endpoint, e.g. a local stand-in for load tests.
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    connect_timeout: float = 10.0
+    read_timeout: float = 180.0
+    total_timeout: Optional[float] = 600.0
+    base_url: Optional[str] = None
+
+    def validate(self) -> None:
+        if self.max_connections < 1 or self.max_keepalive_connections < 0:
+            raise ValueError("Connection limits must be positive.")
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            raise ValueError("HTTP/2 needs the 'h2' package (pip install 'httpx[http2]').")
+
+    def httpx_limits(self) -> Any:
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def httpx_timeout(self) -> Any:
+        import httpx
+
+        # httpx has no whole-request deadline; the total also caps the write and pool waits.
+        overall = self.total_timeout if self.total_timeout is not None else self.read_timeout
+        return httpx.Timeout(overall, connect=self.connect_timeout, read=self.read_timeout)
+
+    def openai_client_kwargs(self, asynchronous: bool = False) -> Dict[str, Any]:
+        """Keyword arguments for ``OpenAI(...)`` / ``AsyncOpenAI(...)``.
+
+        SDK retries are off: engine calls are retried by their rate limiter, and SDK
+        retries on top would multiply the attempts of every throttled call.
+        """
+        import openai
+
+        client_class = openai.DefaultAsyncHttpxClient if asynchronous else openai.DefaultHttpxClient
+        kwargs: Dict[str, Any] = {
+            "http_client": client_class(limits=self.httpx_limits(), timeout=self.httpx_timeout(), http2=self.http2),
+            "timeout": self.httpx_timeout(),
+            "max_retries": 0,
+        }
+        if self.base_url:
+            kwargs["base_url"] = self.base_url
+        return kwargs
+
+    def gemini_http_options(self) -> Any:
+        """``HttpOptions`` for ``genai.Client(http_options=...)``."""
+        import httpx
+        from google.genai import types
+
+        # google-genai passes HttpOptions.timeout (milliseconds) with every request, which
+        # replaces the client-level httpx timeout, so it is the per-phase read timeout here.
+        return types.HttpOptions(
+            base_url=self.base_url,
+            timeout=int(self.read_timeout * 1000),
+            client_args={"limits": self.httpx_limits(), "http2": self.http2},
+            # An explicit transport keeps the async client on httpx (with these limits)
+            # even when aiohttp is installed.
+            async_client_args={"transport": httpx.AsyncHTTPTransport(limits=self.httpx_limits(), http2=self.http2)},
+        )
+
+    async def with_deadline(self, call: Awaitable[T]) -> T:
+        """Await ``call``, cancelling it after ``total_timeout`` seconds."""
+        if self.total_timeout is None:
+            return await call
+        return await asyncio.wait_for(call, self.total_timeout)
+
+
+class TransportSettings:
+    """Process-wide transport configuration, resolved per provider.
+
+    Settings come from ``TITER_*`` environment variables (``TITER_MAX_CONNECTIONS``,
+    ``TITER_MAX_KEEPALIVE_CONNECTIONS``, ``TITER_KEEPALIVE_EXPIRY``, ``TITER_HTTP2``,
+    ``TITER_CONNECT_TIMEOUT``, ``TITER_READ_TIMEOUT``, ``TITER_TOTAL_TIMEOUT`` and
+    ``TITER_<PROVIDER>_BASE_URL``), overridden by :meth:`configure` (the CLI options).
+    Clients are built from them when a provider is first used, so configure first;
+    :meth:`configure` also checks the environment, so a bad variable fails at startup
+    with its name instead of inside the first client.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._overrides: Dict[str, Any] = {}
+        self._base_urls: Dict[str, str] = {}
+
+    def configure(
+        self,
+        overrides: Mapping[str, Any],
+        base_urls: Mapping[str, str] | None = None,
+        environ: Mapping[str, str] | None = None,
+    ) -> None:
+        unknown = set(overrides) - {field.name for field in fields(TransportOptions)}
+        if unknown:
+            raise ValueError(f"Unknown transport settings: {', '.join(sorted(unknown))}.")
+        given = {key: value for key, value in overrides.items() if value is not None}
+        from_env = _environment_values(os.environ if environ is None else environ, given)
+        _validate(replace(TransportOptions(**from_env), **given), given)
+        with self._lock:
+            self._overrides = {key: value for key, value in overrides.items() if value is not None}
+            self._base_urls = dict(base_urls or {})
+
+    def for_provider(self, provider: str, environ: Mapping[str, str] | None = None) -> TransportOptions:
+        environ = os.environ if environ is None else environ
+        with self._lock:
+            overrides = dict(self._overrides)
+            base_url = self._base_urls.get(provider, environ.get(f"{ENV_PREFIX}{provider.upper()}_BASE_URL"))
+        values = _environment_values(environ, overrides)
+        values.update(overrides)
+        options = TransportOptions(**values, base_url=base_url or None)
+        _validate(options, overrides)
+        return options
+
+
+def _environment_values(environ: Mapping[str, str], overridden: Mapping[str, Any]) -> Dict[str, Any]:
+    values: Dict[str, Any] = {}
+    for name, (suffix, parse) in _ENV_FIELDS.items():
+        raw = environ.get(ENV_PREFIX + suffix)
+        if raw and name not in overridden:
+            try:
+                values[name] = parse(raw)
+            except ValueError as exc:
+                raise ValueError(f"Invalid value for {ENV_PREFIX + suffix}: '{raw}' ({exc}).") from exc
+    return values
+
+
+def _validate(options: TransportOptions, overrides: Mapping[str, Any]) -> None:
+    # Settings that did not come from the CLI came from the environment; name the variable.
+    if options.http2 and "http2" not in overrides and importlib.util.find_spec("h2") is None:
+        raise ValueError(f"{ENV_PREFIX}HTTP2 is set, but HTTP/2 needs the 'h2' package (pip install 'httpx[http2]').")
+    options.validate()
+
+
+def parse_base_url(value: str) -> tuple[str, str]:
+    """Parse ``<provider>=<url>`` as given on the command line."""
+    provider, sep, url = value.partition("=")
+    if not sep or not provider.strip() or not url.strip():
+        raise ValueError(f"Expected '<provider>=<url>', got '{value}'.")
+    return provider.strip(), url.strip()
+
+
+http_transport = TransportSettings()
@@ -1,16 +1,33 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import json
-import re
 from collections import Counter
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
-from fnmatch import fnmatch
-from typing import Any, Dict, Iterable, List, Mapping, Sequence
-from urllib.parse import urlparse
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
-from .engines.base import EngineResponse
+from .blobs import RawOptions
+from .cache import ResponseSource
+from .engines.base import Engine, EngineResponse
 from .engines.factory import EngineFactory
+from .matching import DomainMatcher, KeywordMatcher, MatchOptions, extract_domain
+from .stats import AdaptiveRuns, Breakdown, RunningStats
+from .telemetry import telemetry
+
+if TYPE_CHECKING:
+    from .journal import TaskJournal
+
+
+@dataclass(frozen=True)
+class WorkUnit:
+    """A single engine call: one prompt sent to one engine during one run."""
+
+    run: int
+    engine: str
+    prompt: str
 
 
 @dataclass
@@ -24,9 +41,13 @@ class EvaluationResult:
     keyword_counts: Dict[str, float]
     domain_counts: Dict[str, float]
     raw_responses: List[Mapping[str, Any]]
+    # Adaptive runs only: runs each (engine, prompt) pair actually used.
+    runs_used: Optional[List[Dict[str, Any]]] = None
+    # Per engine, prompt and term statistics (RawOptions.breakdown).
+    breakdown: Optional[List[Dict[str, Any]]] = None
 
     def as_dict(self) -> Dict[str, Any]:
-        return {
+        data = {
             "timestamp": self.timestamp.isoformat(),
             "prompts": self.prompts,
             "engines": self.engines,
@@ -37,9 +58,14 @@ class EvaluationResult:
             "domain_counts": self.domain_counts,
             "raw_responses": self.raw_responses,
         }
+        if self.runs_used is not None:
+            data["runs_used"] = self.runs_used
+        if self.breakdown is not None:
+            data["breakdown"] = self.breakdown
+        return data
 
     def as_row(self) -> Dict[str, Any]:
-        return {
+        row = {
             "timestamp": self.timestamp.isoformat(),
             "prompts": json.dumps(self.prompts),
             "engines": json.dumps(self.engines),
@@ -50,6 +76,11 @@ class EvaluationResult:
             "domain_counts": json.dumps(self.domain_counts),
             "raw_responses": json.dumps(self.raw_responses),
         }
+        if self.runs_used is not None:
+            row["runs_used"] = json.dumps(self.runs_used)
+        if self.breakdown is not None:
+            row["breakdown"] = json.dumps(self.breakdown)
+        return row
 
 
 def run_evaluation(
@@ -58,40 +89,275 @@ def run_evaluation(
     keywords: Sequence[str],
     domain_wildcards: Sequence[str],
     runs: int = 1,
+    concurrency: int = 1,
+    cache: ResponseSource | None = None,
+    journal: "TaskJournal | None" = None,
+    match_options: MatchOptions | None = None,
+    raw_options: RawOptions | None = None,
+    adaptive: AdaptiveRuns | None = None,
+) -> EvaluationResult:
+    """Evaluate ``prompts`` on every engine ``runs`` times.
+
+    With ``adaptive``, ``runs`` is ignored: runs are added one round at a time, up to
+    ``adaptive.max_runs``, and each (engine, prompt) pair stops once its keyword and
+    domain counts are stable (see :class:`~titer.stats.AdaptiveRuns`).
+    """
+    validate_inputs(prompts, engine_names, adaptive.max_runs if adaptive else runs, concurrency)
+    engines = _create_engines(engine_names)
+    if adaptive is not None:
+        sampler = _AdaptiveSampler(prompts, engine_names, keywords, domain_wildcards, adaptive, match_options)
+        while units := sampler.next_round():
+            sampler.record(units, _execute_units(engines, units, concurrency, cache, journal))
+        return sampler.result(engines, raw_options)
+    units = plan_work_units(prompts, engine_names, runs)
+    responses = _execute_units(engines, units, concurrency, cache, journal)
+    return build_result(
+        prompts, engine_names, keywords, domain_wildcards, runs, engines, units, responses, match_options, raw_options
+    )
+
+
+async def arun_evaluation(
+    prompts: Sequence[str],
+    engine_names: Sequence[str],
+    keywords: Sequence[str],
+    domain_wildcards: Sequence[str],
+    runs: int = 1,
+    concurrency: int = 16,
+    cache: ResponseSource | None = None,
+    journal: "TaskJournal | None" = None,
+    match_options: MatchOptions | None = None,
+    raw_options: RawOptions | None = None,
+    adaptive: AdaptiveRuns | None = None,
 ) -> EvaluationResult:
+    """Async counterpart of :func:`run_evaluation` driven by ``Engine.arun``.
+
+    Up to ``concurrency`` requests are kept in flight on the running event loop.
+    """
+    validate_inputs(prompts, engine_names, adaptive.max_runs if adaptive else runs, concurrency)
+    engines = _create_engines(engine_names)
+    if adaptive is not None:
+        sampler = _AdaptiveSampler(prompts, engine_names, keywords, domain_wildcards, adaptive, match_options)
+        while units := sampler.next_round():
+            sampler.record(units, await _aexecute_units(engines, units, concurrency, cache, journal))
+        return sampler.result(engines, raw_options)
+    units = plan_work_units(prompts, engine_names, runs)
+    responses = await _aexecute_units(engines, units, concurrency, cache, journal)
+    return build_result(
+        prompts, engine_names, keywords, domain_wildcards, runs, engines, units, responses, match_options, raw_options
+    )
+
+
+def plan_work_units(prompts: Sequence[str], engine_names: Sequence[str], runs: int) -> List[WorkUnit]:
+    """Expand an evaluation into work units in (run, engine, prompt) order."""
+    return [
+        WorkUnit(run=run_index, engine=engine_name, prompt=prompt)
+        for run_index in range(runs)
+        for engine_name in engine_names
+        for prompt in prompts
+    ]
+
+
+def validate_inputs(prompts: Sequence[str], engine_names: Sequence[str], runs: int, concurrency: int) -> None:
     if runs < 1:
         raise ValueError("Runs must be at least 1.")
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1.")
     if not prompts:
         raise ValueError("At least one prompt is required.")
     if not engine_names:
         raise ValueError("At least one engine is required.")
 
-    factory = EngineFactory()
-    engines = [factory.create(name) for name in engine_names]
 
-    keyword_totals: Counter[str] = Counter({kw: 0 for kw in keywords})
-    domain_totals: Counter[str] = Counter({pattern: 0 for pattern in domain_wildcards})
+def _create_engines(engine_names: Sequence[str]) -> Dict[str, Engine]:
+    factory = EngineFactory.shared()
+    return {name: factory.create(name) for name in engine_names}
+
+
+def run_unit(
+    engine: Engine,
+    unit: WorkUnit,
+    cache: ResponseSource | None = None,
+    journal: "TaskJournal | None" = None,
+) -> EngineResponse:
+    """Execute one work unit through the response cache, journaling the outcome if asked."""
+    with telemetry.unit(engine.name) as probe:
+        if cache is None:
+            response = probe.call(engine.run, unit.prompt)
+        else:
+            response = cache.fetch(engine, unit.prompt, unit.run, lambda: probe.call(engine.run, unit.prompt))
+    if journal is not None:
+        journal.record(unit, response)
+    return _with_timing(response, probe.timing())
+
+
+async def arun_unit(
+    engine: Engine,
+    unit: WorkUnit,
+    cache: ResponseSource | None = None,
+    journal: "TaskJournal | None" = None,
+) -> EngineResponse:
+    with telemetry.unit(engine.name) as probe:
+        if cache is None:
+            response = await probe.acall(engine.arun, unit.prompt)
+        else:
+            response = await cache.afetch(engine, unit.prompt, unit.run, lambda: probe.acall(engine.arun, unit.prompt))
+    if journal is not None:
+        journal.record(unit, response)
+    return _with_timing(response, probe.timing())
+
+
+def _with_timing(response: EngineResponse, timing: Mapping[str, Any] | None) -> EngineResponse:
+    return response if timing is None else replace(response, timing=timing)
+
+
+def _execute_units(
+    engines: Mapping[str, Engine],
+    units: Sequence[WorkUnit],
+    concurrency: int,
+    cache: ResponseSource | None = None,
+    journal: "TaskJournal | None" = None,
+) -> List[EngineResponse]:
+    """Run every unit and return responses in the same order as ``units``.
+
+    Units already present in ``journal`` are replayed instead of being called again.
+    """
+    responses = _replay(units, journal)
+    pending = [index for index, response in enumerate(responses) if response is None]
+    if concurrency <= 1 or len(pending) <= 1:
+        for index in pending:
+            unit = units[index]
+            responses[index] = run_unit(engines[unit.engine], unit, cache, journal)
+        return responses  # type: ignore[return-value]
+
+    pool = ThreadPoolExecutor(max_workers=min(concurrency, len(pending)), thread_name_prefix="titer")
+    try:
+        futures = {
+            index: pool.submit(run_unit, engines[units[index].engine], units[index], cache, journal)
+            for index in pending
+        }
+        for index, future in futures.items():
+            responses[index] = future.result()
+        return responses  # type: ignore[return-value]
+    finally:
+        # Drop queued calls if one unit failed so we do not keep paying for a doomed evaluation.
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def _aexecute_units(
+    engines: Mapping[str, Engine],
+    units: Sequence[WorkUnit],
+    concurrency: int,
+    cache: ResponseSource | None = None,
+    journal: "TaskJournal | None" = None,
+) -> List[EngineResponse]:
+    """Await every unit with at most ``concurrency`` in flight, preserving ``units`` order."""
+    semaphore = asyncio.Semaphore(concurrency)
+    responses = _replay(units, journal)
+
+    async def _call(index: int) -> None:
+        unit = units[index]
+        async with semaphore:
+            responses[index] = await arun_unit(engines[unit.engine], unit, cache, journal)
+
+    pending = [asyncio.ensure_future(_call(index)) for index, response in enumerate(responses) if response is None]
+    try:
+        await asyncio.gather(*pending)
+        return responses  # type: ignore[return-value]
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _replay(units: Sequence[WorkUnit], journal: "TaskJournal | None") -> List[Optional[EngineResponse]]:
+    if journal is None:
+        return [None] * len(units)
+    return journal.lookup(units)
+
+
+def build_result(
+    prompts: Sequence[str],
+    engine_names: Sequence[str],
+    keywords: Sequence[str],
+    domain_wildcards: Sequence[str],
+    runs: int,
+    engines: Mapping[str, Engine],
+    units: Sequence[WorkUnit],
+    responses: Sequence[EngineResponse],
+    match_options: MatchOptions | None = None,
+    raw_options: RawOptions | None = None,
+    unit_runs: Sequence[int] | None = None,
+) -> EvaluationResult:
+    """Aggregate unit responses (aligned with ``units``) into an :class:`EvaluationResult`.
+
+    ``raw_options`` decides whether each provider payload is kept inline, replaced by a
+    blob-store reference, or dropped. ``unit_runs`` (adaptive runs) gives, per unit, the
+    number of runs its (engine, prompt) pair used, which then replaces ``runs`` when
+    averaging and is recorded as ``runs_used``.
+    """
+    with telemetry.stage("score"):
+        return _build_result(
+            prompts,
+            engine_names,
+            keywords,
+            domain_wildcards,
+            runs,
+            engines,
+            units,
+            responses,
+            match_options,
+            raw_options,
+            unit_runs,
+        )
+
+
+def _build_result(
+    prompts: Sequence[str],
+    engine_names: Sequence[str],
+    keywords: Sequence[str],
+    domain_wildcards: Sequence[str],
+    runs: int,
+    engines: Mapping[str, Engine],
+    units: Sequence[WorkUnit],
+    responses: Sequence[EngineResponse],
+    match_options: MatchOptions | None,
+    raw_options: RawOptions | None,
+    unit_runs: Sequence[int] | None = None,
+) -> EvaluationResult:
+    raw_options = raw_options or RawOptions()
     raw_records: List[Mapping[str, Any]] = []
 
-    for run_index in range(runs):
-        for engine in engines:
-            for prompt in prompts:
-                response = engine.run(prompt)
-                keyword_totals.update(_count_keywords(response.content, keywords))
-                domain_totals.update(_count_domains(response.cites, domain_wildcards))
-                raw_records.append(
-                    {
-                        "run": run_index,
-                        "prompt": prompt,
-                        "engine": engine.name,
-                        "content": response.content,
-                        "cites": response.cites,
-                        "raw": response.raw,
-                    }
-                )
-
-    keyword_avgs = {kw: keyword_totals.get(kw, 0) / runs for kw in keywords}
-    domain_avgs = {pattern: domain_totals.get(pattern, 0) / runs for pattern in domain_wildcards}
+    for unit, response in zip(units, responses):
+        if not raw_options.records:
+            break
+        record = {
+            "run": unit.run,
+            "prompt": unit.prompt,
+            "engine": engines[unit.engine].name,
+            "content": response.content,
+            "cites": response.cites,
+            "raw": raw_options.encode(response.raw),
+        }
+        if telemetry.unit_timings:
+            # Units replayed from a journal have no timing.
+            record["timing"] = response.timing
+        raw_records.append(record)
+
+    breakdown = Breakdown() if raw_options.breakdown else None
+    keyword_avgs, domain_avgs = score_responses(
+        ((response.content, response.cites) for response in responses),
+        keywords,
+        domain_wildcards,
+        runs if unit_runs is None else unit_runs,
+        match_options,
+        breakdown=breakdown,
+        unit_keys=[(engines[unit.engine].name, unit.prompt) for unit in units] if breakdown else None,
+    )
+    runs_used = None
+    if unit_runs is not None:
+        used: Dict[Tuple[str, str], int] = {}
+        for unit, count in zip(units, unit_runs):
+            used[(engines[unit.engine].name, unit.prompt)] = count
+        runs_used = [{"engine": engine, "prompt": prompt, "runs": count} for (engine, prompt), count in used.items()]
 
     return EvaluationResult(
         timestamp=datetime.now(timezone.utc),
@@ -103,33 +369,134 @@ def run_evaluation(
         keyword_counts=keyword_avgs,
         domain_counts=domain_avgs,
         raw_responses=raw_records,
+        runs_used=runs_used,
+        breakdown=breakdown.as_list() if breakdown is not None else None,
     )
 
 
+def score_responses(
+    responses: Iterable[Tuple[str, Sequence[str]]],
+    keywords: Sequence[str],
+    domain_wildcards: Sequence[str],
+    runs: int | Sequence[int],
+    match_options: MatchOptions | None = None,
+    breakdown: Breakdown | None = None,
+    unit_keys: Sequence[Tuple[str, str]] | None = None,
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Average keyword and domain counts per run over ``(content, cites)`` pairs.
+
+    ``runs`` is the evaluation's run count, or one count per response when (engine,
+    prompt) pairs used different numbers of runs; each pair then contributes its own
+    per-run average. With ``breakdown``, every response's counts are also added to it
+    under its ``(engine, prompt)`` from ``unit_keys``.
+    """
+    keyword_matcher = (match_options or MatchOptions()).keyword_matcher(keywords)
+    domain_matcher = DomainMatcher(domain_wildcards)
+    divisors = itertools.repeat(runs) if isinstance(runs, int) else runs
+    # Totals are kept per divisor so fixed-run results divide exactly as before.
+    keyword_totals: Dict[int, Counter[str]] = {}
+    domain_totals: Dict[int, Counter[str]] = {}
+    for index, ((content, cites), divisor) in enumerate(zip(responses, divisors)):
+        with telemetry.stage("count"):
+            keyword_counts = keyword_matcher.count(content)
+            domain_counts = domain_matcher.count(cites)
+            keyword_totals.setdefault(divisor, Counter()).update(keyword_counts)
+            domain_totals.setdefault(divisor, Counter()).update(domain_counts)
+            if breakdown is not None:
+                engine, prompt = unit_keys[index]  # type: ignore[index]
+                breakdown.add(engine, prompt, keyword_counts, domain_counts)
+    keyword_avgs = {kw: _per_run(keyword_totals, kw) for kw in keywords}
+    domain_avgs = {pattern: _per_run(domain_totals, pattern) for pattern in domain_wildcards}
+    return keyword_avgs, domain_avgs
+
+
+def _per_run(totals: Mapping[int, Counter[str]], name: str) -> float:
+    return sum((counter.get(name, 0) / divisor for divisor, counter in totals.items()), 0.0)
+
+
+class _AdaptiveSampler:
+    """Plan runs round by round and drop (engine, prompt) pairs whose counts are stable."""
+
+    def __init__(
+        self,
+        prompts: Sequence[str],
+        engine_names: Sequence[str],
+        keywords: Sequence[str],
+        domain_wildcards: Sequence[str],
+        policy: AdaptiveRuns,
+        match_options: MatchOptions | None,
+    ) -> None:
+        self.prompts = prompts
+        self.engine_names = engine_names
+        self.keywords = keywords
+        self.domain_wildcards = domain_wildcards
+        self.policy = policy
+        self.match_options = match_options
+        self._keyword_matcher = (match_options or MatchOptions()).keyword_matcher(keywords)
+        self._domain_matcher = DomainMatcher(domain_wildcards)
+        # Pairs in plan_work_units order; a prompt listed twice is sampled as its own pair.
+        self._pairs = [(engine, prompt) for engine in engine_names for prompt in prompts]
+        self._stats = [
+            [RunningStats() for _ in range(len(keywords) + len(domain_wildcards))] for _ in self._pairs
+        ]
+        self._active = list(range(len(self._pairs)))
+        self._runs = [0] * len(self._pairs)
+        self._round = 0
+        self._round_pairs: List[int] = []
+        self.units: List[WorkUnit] = []
+        self.responses: List[EngineResponse] = []
+        self._unit_pairs: List[int] = []
+
+    def next_round(self) -> List[WorkUnit]:
+        if not self._active or self._round >= self.policy.max_runs:
+            return []
+        self._round_pairs = list(self._active)
+        units = [WorkUnit(run=self._round, engine=self._pairs[i][0], prompt=self._pairs[i][1]) for i in self._round_pairs]
+        self._round += 1
+        return units
+
+    def record(self, units: Sequence[WorkUnit], responses: Sequence[EngineResponse]) -> None:
+        for pair, response in zip(self._round_pairs, responses):
+            keyword_counts = self._keyword_matcher.count(response.content)
+            domain_counts = self._domain_matcher.count(response.cites)
+            values = [keyword_counts.get(kw, 0) for kw in self.keywords]
+            values += [domain_counts.get(pattern, 0) for pattern in self.domain_wildcards]
+            for stats, value in zip(self._stats[pair], values):
+                stats.add(value)
+            self._runs[pair] += 1
+        self.units.extend(units)
+        self.responses.extend(responses)
+        self._unit_pairs.extend(self._round_pairs)
+        self._active = [pair for pair in self._active if not self._converged(pair)]
+
+    def result(self, engines: Mapping[str, Engine], raw_options: RawOptions | None) -> EvaluationResult:
+        return build_result(
+            self.prompts,
+            self.engine_names,
+            self.keywords,
+            self.domain_wildcards,
+            self.policy.max_runs,
+            engines,
+            self.units,
+            self.responses,
+            self.match_options,
+            raw_options,
+            unit_runs=[self._runs[pair] for pair in self._unit_pairs],
+        )
+
+    def _converged(self, pair: int) -> bool:
+        if self._runs[pair] < self.policy.min_runs:
+            return False
+        return all(self.policy.converged(stats) for stats in self._stats[pair])
+
+
 def _count_keywords(content: str, keywords: Sequence[str]) -> Mapping[str, int]:
-    counts: Dict[str, int] = {}
-    for kw in keywords:
-        pattern = re.escape(kw)
-        matches = re.findall(pattern, content, flags=re.IGNORECASE)
-        counts[kw] = len(matches)
-    return counts
+    return KeywordMatcher(keywords).count(content)
 
 
 def _count_domains(cites: Iterable[str], domain_wildcards: Sequence[str]) -> Mapping[str, int]:
-    counts: Dict[str, int] = {}
-    for pattern in domain_wildcards:
-        counts[pattern] = 0
-    for cite in cites:
-        domain = _extract_domain(cite)
-        if not domain:
-            continue
-        for pattern in domain_wildcards:
-            if fnmatch(domain, pattern.lower()):
-                counts[pattern] += 1
-    return counts
+    return DomainMatcher(domain_wildcards).count(cites)
 
 
 def _extract_domain(url: str) -> str | None:
-    parsed = urlparse(url if "://" in url else f"https://{url}")
-    host = parsed.netloc.split(":")[0].lower()
-    return host or None
+    return extract_domain(url)
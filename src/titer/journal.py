@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from .engines.base import EngineResponse
+from .evaluator import WorkUnit
+
+UnitKey = Tuple[int, int, str, str]
+
+
+class RunJournal:
+    """Append-only JSONL journal of completed work units for crash-safe batch runs.
+
+    Each line records one finished engine call identified by task row, run, engine and
+    prompt, together with the normalized response. Lines are flushed and fsynced as
+    they are written, so after a crash a resumed batch replays every finished unit and
+    only pays for the rest. A torn final line from an interrupted write is ignored.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._completed: Dict[UnitKey, Deque[EngineResponse]] = defaultdict(deque)
+        if self.path.exists():
+            self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.path.open("a", encoding="utf-8")
+        if self._handle.tell() and not _ends_with_newline(self.path):
+            # Terminate a torn last line so the next record starts on its own line.
+            self._handle.write("\n")
+
+    def for_task(self, task_index: int) -> "TaskJournal":
+        return TaskJournal(self, task_index)
+
+    @property
+    def completed_units(self) -> int:
+        return sum(len(responses) for responses in self._completed.values())
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._handle.closed:
+                self._handle.close()
+
+    def __enter__(self) -> "RunJournal":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _take(self, key: UnitKey) -> Optional[EngineResponse]:
+        with self._lock:
+            responses = self._completed.get(key)
+            if not responses:
+                return None
+            return responses.popleft()
+
+    def _append(self, task_index: int, unit: WorkUnit, response: EngineResponse) -> None:
+        line = json.dumps(
+            {
+                "task": task_index,
+                "run": unit.run,
+                "engine": unit.engine,
+                "prompt": unit.prompt,
+                "content": response.content,
+                "cites": list(response.cites),
+                "raw": response.raw,
+            },
+            default=str,
+        )
+        with self._lock:
+            self._handle.write(line + "\n")
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+
+    def _load(self) -> None:
+        with self.path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                    key = (int(entry["task"]), int(entry["run"]), str(entry["engine"]), str(entry["prompt"]))
+                    response = EngineResponse(content=entry["content"], cites=list(entry["cites"]), raw=entry["raw"])
+                except (ValueError, KeyError, TypeError):
+                    continue  # Torn or foreign line; the unit simply runs again.
+                self._completed[key].append(response)
+
+
+class TaskJournal:
+    """View of a :class:`RunJournal` scoped to one task row."""
+
+    def __init__(self, journal: RunJournal, task_index: int) -> None:
+        self.journal = journal
+        self.task_index = task_index
+
+    def lookup(self, units: Sequence[WorkUnit]) -> List[Optional[EngineResponse]]:
+        """Return journaled responses aligned with ``units`` (``None`` for units still to run)."""
+        return [self.journal._take((self.task_index, unit.run, unit.engine, unit.prompt)) for unit in units]
+
+    def record(self, unit: WorkUnit, response: EngineResponse) -> None:
+        self.journal._append(self.task_index, unit, response)
+
+
+def _ends_with_newline(path: Path) -> bool:
+    with path.open("rb") as handle:
+        handle.seek(-1, os.SEEK_END)
+        return handle.read(1) == b"\n"
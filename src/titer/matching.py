@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from fnmatch import translate
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+# Lower-case letters that re.IGNORECASE also equates with another lower-case letter
+# (one sharing their upper case: "ſ" and "s" are both "S", or their case folding),
+# mapped to that letter.
+_IGNORECASE_CLASSES = str.maketrans(
+    {
+        "\u00b5": "\u03bc",  # micro sign -> mu
+        "\u0131": "i",  # dotless i
+        "\u017f": "s",  # long s
+        "\u0345": "\u03b9",  # ypogegrammeni -> iota
+        "\u03c2": "\u03c3",  # final sigma
+        "\u03d0": "\u03b2",
+        "\u03d1": "\u03b8",
+        "\u03d5": "\u03c6",
+        "\u03d6": "\u03c0",
+        "\u03f0": "\u03ba",
+        "\u03f1": "\u03c1",
+        "\u03f5": "\u03b5",
+        "\u1c80": "\u0432",  # Cyrillic letter variants
+        "\u1c81": "\u0434",
+        "\u1c82": "\u043e",
+        "\u1c83": "\u0441",
+        "\u1c84": "\u0442",
+        "\u1c85": "\u0442",
+        "\u1c86": "\u044a",
+        "\u1c87": "\u0463",
+        "\u1c88": "\ua64b",
+        "\u1e9b": "\u1e61",  # long s with dot above
+        "\u1fbe": "\u03b9",  # prosgegrammeni -> iota
+        "\u1fd3": "\u0390",  # iota with dialytika and oxia
+        "\u1fe3": "\u03b0",  # upsilon with dialytika and oxia
+        "\ufb05": "\ufb06",  # long s t ligature
+    }
+)
+
+
+@dataclass(frozen=True)
+class MatchOptions:
+    """Keyword matching switches shared by every task of a run."""
+
+    whole_word: bool = False
+    casefold: bool = False
+
+    def keyword_matcher(self, keywords: Sequence[str]) -> "KeywordMatcher":
+        return KeywordMatcher(keywords, whole_word=self.whole_word, casefold=self.casefold)
+
+
+class _TrieNode:
+    __slots__ = ("children", "keyword_ids")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _TrieNode] = {}
+        self.keyword_ids: List[int] = []
+
+
+class KeywordMatcher:
+    """Count many keywords in one pass over a response.
+
+    Built once per evaluation. Keywords are folded and stored in a trie; a compiled
+    lookahead pattern derived from the trie finds every position where some keyword
+    starts (at C speed), and only those positions are walked in Python. Per keyword,
+    matches are counted leftmost and non-overlapping, exactly like
+    ``len(re.findall(re.escape(kw), text, re.IGNORECASE))``, while different keywords
+    may still overlap (``vector`` and ``vector database`` both count). Text is folded
+    per character into re's case-insensitive classes, so ``"ſ"``, ``"K"`` (Kelvin) and
+    ``"İ"`` match ``"s"``, ``"k"`` and ``"i"`` as they do under ``re``.
+
+    ``whole_word`` only counts matches not surrounded by word characters, and
+    ``casefold`` uses full Unicode case folding (``"Straße"`` matches ``"strasse"``).
+    """
+
+    def __init__(self, keywords: Sequence[str], whole_word: bool = False, casefold: bool = False) -> None:
+        self.keywords: List[str] = list(dict.fromkeys(keywords))
+        self.whole_word = whole_word
+        self.casefold = casefold
+        self._root = _TrieNode()
+        self._empty_ids: List[int] = []
+        for keyword_id, keyword in enumerate(self.keywords):
+            folded = self._fold(keyword)
+            if not folded:
+                self._empty_ids.append(keyword_id)
+                continue
+            node = self._root
+            for char in folded:
+                node = node.children.setdefault(char, _TrieNode())
+            node.keyword_ids.append(keyword_id)
+        self._starts: Optional[re.Pattern[str]] = None
+        if self._root.children:
+            self._starts = re.compile(f"(?=(?:{_trie_pattern(self._root)}))")
+
+    def count(self, content: str) -> Dict[str, int]:
+        counts = [0] * len(self.keywords)
+        text = self._fold(content)
+        for keyword_id in self._empty_ids:
+            # re.findall("") matches at every position, including the end.
+            counts[keyword_id] = len(content) + 1
+        if self._starts is not None:
+            last_end = [0] * len(self.keywords)
+            length = len(text)
+            for match in self._starts.finditer(text):
+                start = match.start()
+                if self.whole_word and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                node = self._root
+                position = start
+                while position < length:
+                    node = node.children.get(text[position])  # type: ignore[assignment]
+                    if node is None:
+                        break
+                    position += 1
+                    if not node.keyword_ids:
+                        continue
+                    if self.whole_word and position < length and _is_word_char(text[position]):
+                        continue
+                    for keyword_id in node.keyword_ids:
+                        if start >= last_end[keyword_id]:
+                            counts[keyword_id] += 1
+                            last_end[keyword_id] = position
+        return dict(zip(self.keywords, counts))
+
+    def _fold(self, text: str) -> str:
+        if self.casefold:
+            return text.casefold()
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # "İ" lowers to "i" plus a combining dot; re compares it as plain "i", and
+            # keeping one code point per character keeps offsets aligned.
+            lowered = "".join(char.lower()[0] for char in text)
+        return lowered.translate(_IGNORECASE_CLASSES)
+
+
+class _LabelNode:
+    __slots__ = ("children", "exact_ids", "subdomain_ids")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _LabelNode] = {}
+        self.exact_ids: List[int] = []
+        self.subdomain_ids: List[int] = []
+
+
+class DomainMatcher:
+    """Match citation hostnames against many domain wildcards at once.
+
+    Literal patterns (``example.com``) and ``*.``-suffix wildcards (``*.example.com``)
+    live in a trie keyed on reversed labels, so a lookup walks the hostname's labels
+    once instead of calling ``fnmatch`` for every pattern. Any other glob
+    (``*example.com``, ``docs.?ython.org``) falls back to a compiled ``fnmatch``
+    pattern. Counts are identical to ``fnmatch(host, pattern.lower())``, including
+    duplicate patterns being counted once per occurrence.
+    """
+
+    def __init__(self, domain_wildcards: Sequence[str]) -> None:
+        self.patterns: List[str] = list(domain_wildcards)
+        self._root = _LabelNode()
+        self._globs: List[Tuple[int, re.Pattern[str]]] = []
+        self._memo: Dict[str, Tuple[int, ...]] = {}
+        for pattern_id, pattern in enumerate(self.patterns):
+            lowered = pattern.lower()
+            subdomains = lowered.startswith("*.")
+            literal = lowered[2:] if subdomains else lowered
+            if any(char in literal for char in "*?["):
+                self._globs.append((pattern_id, re.compile(translate(lowered))))
+                continue
+            node = self._root
+            for label in reversed(literal.split(".")):
+                node = node.children.setdefault(label, _LabelNode())
+            (node.subdomain_ids if subdomains else node.exact_ids).append(pattern_id)
+
+    def match(self, domain: str) -> Tuple[int, ...]:
+        """Return the ids (positions in ``patterns``) of every pattern matching ``domain``."""
+        cached = self._memo.get(domain)
+        if cached is not None:
+            return cached
+        matched: List[int] = []
+        labels = domain.split(".")
+        node: Optional[_LabelNode] = self._root
+        remaining = len(labels)
+        for label in reversed(labels):
+            node = node.children.get(label)  # type: ignore[union-attr]
+            if node is None:
+                break
+            remaining -= 1
+            if remaining == 0:
+                matched.extend(node.exact_ids)
+            else:
+                # "*." needs at least one more (possibly empty) label in front of the suffix.
+                matched.extend(node.subdomain_ids)
+        for pattern_id, compiled in self._globs:
+            if compiled.match(domain):
+                matched.append(pattern_id)
+        result = self._memo[domain] = tuple(sorted(matched))
+        return result
+
+    def count(self, cites: Iterable[str]) -> Dict[str, int]:
+        counts: Dict[str, int] = {pattern: 0 for pattern in self.patterns}
+        for cite in cites:
+            domain = extract_domain(cite)
+            if not domain:
+                continue
+            for pattern_id in self.match(domain):
+                counts[self.patterns[pattern_id]] += 1
+        return counts
+
+
+@lru_cache(maxsize=65536)
+def extract_domain(url: str) -> str | None:
+    """Lower-cased hostname of a citation URL (memoized; the same URLs recur across runs)."""
+    parsed = urlparse(url if "://" in url else f"https://{url}")
+    host = parsed.netloc.split(":")[0].lower()
+    return host or None
+
+
+def _trie_pattern(node: _TrieNode) -> str:
+    # Only "does some keyword start here" matters, so a terminal node ends the pattern.
+    alternatives = [re.escape(char) + ("" if child.keyword_ids else _trie_pattern(child)) for char, child in node.children.items()]
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return "(?:" + "|".join(alternatives) + ")"
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
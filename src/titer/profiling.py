@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Any, List, Optional
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+
+class Profiler:
+    """cProfile every thread of a command and optionally sample its stacks.
+
+    ``cProfile`` only sees the thread that enabled it on older interpreters, so each
+    thread started while profiling (the engine worker pool, for instance) gets its own
+    profiler and the results are merged into one pstats file. On interpreters where
+    cProfile already covers every thread, the extra profilers are skipped.
+
+    With ``collapsed_path`` set, a background thread also samples all stacks every
+    ``interval`` seconds and writes them in the collapsed format that ``flamegraph.pl``,
+    speedscope and similar tools read (``thread;outer;...;inner count`` per line); unlike
+    the pstats file it keeps whole call paths, including time spent waiting.
+    """
+
+    def __init__(
+        self,
+        pstats_path: Optional[Path] = None,
+        collapsed_path: Optional[Path] = None,
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+    ) -> None:
+        self.pstats_path = pstats_path
+        self.collapsed_path = collapsed_path
+        self.interval = interval
+        self._main: Optional[cProfile.Profile] = None
+        self._threads: List[tuple[threading.Thread, cProfile.Profile]] = []
+        self._lock = threading.Lock()
+        self._sampler: Optional[_StackSampler] = None
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        if self.collapsed_path:
+            # Started first so the sampler itself is not profiled.
+            self._sampler = _StackSampler(self.interval)
+            self._sampler.start()
+        if self.pstats_path:
+            self._main = cProfile.Profile()
+            threading.setprofile(self._bootstrap)
+            self._main.enable()
+
+    def stop(self) -> None:
+        if self._main is not None:
+            self._main.disable()
+            threading.setprofile(None)  # type: ignore[arg-type]
+            stats = pstats.Stats(self._main)
+            with self._lock:
+                # Threads still running cannot be stopped from here; pool workers have exited.
+                finished = [profile for thread, profile in self._threads if not thread.is_alive()]
+            for profile in finished:
+                stats.add(profile)
+            _write_atomic(self.pstats_path, lambda tmp: stats.dump_stats(tmp))  # type: ignore[arg-type]
+            self._main = None
+        if self._sampler is not None:
+            self._sampler.stop()
+            lines = self._sampler.collapsed()
+            _write_atomic(self.collapsed_path, lambda tmp: Path(tmp).write_text(lines, encoding="utf-8"))  # type: ignore[arg-type]
+            self._sampler = None
+
+    def _bootstrap(self, frame: FrameType, event: str, arg: Any) -> None:
+        # Runs once per new thread, on its first profiling event.
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # cProfile is process-wide here and the main profiler already sees this thread.
+            return
+        with self._lock:
+            self._threads.append((threading.current_thread(), profile))
+
+
+class _StackSampler(threading.Thread):
+    def __init__(self, interval: float) -> None:
+        super().__init__(name="titer-stack-sampler", daemon=True)
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self.samples[_collapse(names.get(ident, str(ident)), frame)] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+
+def _collapse(thread_name: str, frame: Optional[FrameType]) -> str:
+    labels: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        labels.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+def _short_path(filename: str) -> str:
+    parts = Path(filename).parts
+    return "/".join(parts[-2:]) if len(parts) > 1 else filename
+
+
+def _write_atomic(path: Path, write: Any) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    write(str(tmp))
+    os.replace(tmp, path)
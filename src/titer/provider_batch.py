@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .blobs import RawOptions
+from .cache import CACHE_ONLY, CacheMissError, ResponseCache
+from .engines.base import Engine, EngineResponse
+from .engines.batch import BatchOutcome, ProviderBatch
+from .engines.factory import EngineFactory
+from .evaluator import EvaluationResult, WorkUnit, build_result, plan_work_units, run_unit, validate_inputs
+from .journal import RunJournal, TaskJournal
+from .matching import MatchOptions
+from .telemetry import telemetry
+
+MODE_INTERACTIVE = "interactive"
+MODE_PROVIDER_BATCH = "provider-batch"
+EXECUTION_MODES = (MODE_INTERACTIVE, MODE_PROVIDER_BATCH)
+
+DEFAULT_POLL_SECONDS = 30.0
+# Failed status checks of one job are retried this often, backing off from the poll
+# interval up to MAX_POLL_BACKOFF_SECONDS, before the job is given up on.
+MAX_POLL_RETRIES = 6
+MAX_POLL_BACKOFF_SECONDS = 600.0
+
+Waiter = Tuple[int, int]
+
+
+@dataclass
+class _Task:
+    task: Dict[str, Any]
+    engines: Mapping[str, Engine]
+    units: List[WorkUnit]
+    responses: List[Optional[EngineResponse]]
+    journal: Optional[TaskJournal] = None
+
+
+@dataclass
+class _Pending:
+    # A unit still without a response, and the (task, position) slots it fills.
+    unit: WorkUnit
+    waiters: List[Waiter] = field(default_factory=list)
+
+
+@dataclass
+class _Job:
+    batch: ProviderBatch
+    engine: Engine
+    job_id: str
+    units: Dict[str, _Pending]
+    state: str = "submitted"
+    done: bool = False
+    poll_failures: int = 0
+    next_poll: float = 0.0
+
+
+@dataclass
+class _Plan:
+    tasks: List[_Task] = field(default_factory=list)
+    pending: List[_Pending] = field(default_factory=list)
+
+
+class ProviderBatchRunner:
+    """Run a whole batch through the providers' batch APIs instead of one call at a time.
+
+    Every task is read and planned up front, and units found in the journal or cache are
+    not submitted at all. Each task's units are requested on their own, as in an
+    interactive run; with ``share_units``, identical (engine, prompt, run) units are
+    submitted once and their response is handed to every task that asked for it.
+    Each engine's remaining units go out as JSONL jobs (split at the provider's request
+    limit), which are polled every ``poll_interval`` seconds; failed status checks are
+    retried with backoff and never cancel a job. Finished responses are cached and
+    journaled as each job completes, so a later ``--resume`` only resubmits what failed.
+    Once every job is done, tasks are scored in order like any other run. Engines
+    without a batch API (``fake``, third-party engines) are called directly,
+    ``concurrency`` at a time, while the jobs run.
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache | None = None,
+        journal: RunJournal | None = None,
+        match_options: MatchOptions | None = None,
+        raw_options: RawOptions | None = None,
+        poll_interval: float = DEFAULT_POLL_SECONDS,
+        timeout: float | None = None,
+        concurrency: int = 1,
+        share_units: bool = False,
+        progress: Callable[[str], None] | None = None,
+    ) -> None:
+        if poll_interval <= 0:
+            raise ValueError("Poll interval must be positive.")
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1.")
+        self.cache = cache
+        self.journal = journal
+        self.match_options = match_options
+        self.raw_options = raw_options
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.share_units = share_units
+        self.progress = progress
+        self._factory = EngineFactory.shared()
+
+    def run(self, tasks: Iterable[Dict[str, Any]]) -> Iterator[EvaluationResult]:
+        """Yield one result per task, in task order, after every job has finished."""
+        plan = self._plan(tasks)
+        if plan.pending:
+            self._fetch(plan)
+        for state in plan.tasks:
+            task = state.task
+            yield build_result(
+                task["prompts"],
+                task["engines"],
+                task["keywords"],
+                task["domain_wildcards"],
+                task["runs"],
+                state.engines,
+                state.units,
+                state.responses,  # type: ignore[arg-type]
+                self.match_options,
+                self.raw_options,
+            )
+
+    def _plan(self, tasks: Iterable[Dict[str, Any]]) -> _Plan:
+        plan = _Plan()
+        shared: Dict[WorkUnit, _Pending] = {}
+        for index, task in enumerate(tasks):
+            validate_inputs(task["prompts"], task["engines"], task["runs"], 1)
+            units = plan_work_units(task["prompts"], task["engines"], task["runs"])
+            engines = {name: self._factory.create(name) for name in task["engines"]}
+            journal = self.journal.for_task(index) if self.journal else None
+            responses = journal.lookup(units) if journal else [None] * len(units)
+            for position, unit in enumerate(units):
+                if responses[position] is None:
+                    responses[position] = self._cached(engines[unit.engine], unit)
+                    if responses[position] is None:
+                        pending = shared.get(unit)
+                        if pending is None:
+                            pending = _Pending(unit)
+                            plan.pending.append(pending)
+                            if self.share_units:
+                                shared[unit] = pending
+                        pending.waiters.append((index, position))
+                    elif journal is not None:
+                        journal.record(unit, responses[position])  # type: ignore[arg-type]
+            plan.tasks.append(_Task(task=task, engines=engines, units=units, responses=responses, journal=journal))
+        return plan
+
+    def _cached(self, engine: Engine, unit: WorkUnit) -> Optional[EngineResponse]:
+        if self.cache is None:
+            return None
+        response = self.cache.get(self.cache.key(engine, unit.prompt, unit.run))
+        if response is None and self.cache.mode == CACHE_ONLY:
+            raise CacheMissError(f"No cached response for {engine.name} run {unit.run}: {unit.prompt[:80]!r}")
+        return response
+
+    def _fetch(self, plan: _Plan) -> None:
+        by_engine: Dict[str, List[_Pending]] = {}
+        for pending in plan.pending:
+            by_engine.setdefault(pending.unit.engine, []).append(pending)
+        engines = {name: self._factory.create(name) for name in by_engine}
+        batches = {name: engine.provider_batch() for name, engine in engines.items()}
+        direct = [pending for name, units in by_engine.items() if batches[name] is None for pending in units]
+        jobs: List[_Job] = []
+        failures: List[str] = []
+        pool = ThreadPoolExecutor(max_workers=self.concurrency) if direct else None
+        try:
+            for name, units in by_engine.items():
+                batch = batches[name]
+                if batch is not None:
+                    jobs.extend(self._submit(batch, engines[name], units))
+            # Direct calls run while the jobs are polled; their errors are collected like
+            # failed batch requests, so one bad call does not cancel jobs already paid for.
+            calls = [
+                pool.submit(self._run_direct, plan, engines[pending.unit.engine], pending) for pending in direct
+            ] if pool else []
+            failures = self._wait(plan, jobs)
+            failures.extend(_direct_failures(direct, calls))
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            # Only an aborted run (timeout, Ctrl-C, a failed submission) gets here with
+            # jobs still running; failed polls end a job as done without cancelling it.
+            for job in jobs:
+                if not job.done:
+                    job.batch.cancel(job.job_id)
+        if failures:
+            raise RuntimeError(
+                f"{len(failures)} of {len(plan.pending)} work units got no response. Responses that arrived are kept in "
+                f"the journal and cache, when enabled, so a rerun submits only the rest. First error: {failures[0]}"
+            )
+
+    def _submit(self, batch: ProviderBatch, engine: Engine, units: List[_Pending]) -> Iterator[_Job]:
+        for start in range(0, len(units), batch.max_requests):
+            chunk = {f"titer-{start + offset}": unit for offset, unit in enumerate(units[start : start + batch.max_requests])}
+            job_id = batch.submit([(custom_id, pending.unit.prompt) for custom_id, pending in chunk.items()])
+            self._report(f"Submitted {engine.name} batch {job_id} ({len(chunk)} requests).")
+            yield _Job(batch=batch, engine=engine, job_id=job_id, units=chunk)
+
+    def _run_direct(self, plan: _Plan, engine: Engine, pending: _Pending) -> None:
+        self._deliver(plan, engine, pending, run_unit(engine, pending.unit, self.cache))
+
+    def _wait(self, plan: _Plan, jobs: List[_Job]) -> List[str]:
+        failures: List[str] = []
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        while True:
+            for job in jobs:
+                if job.done or time.monotonic() < job.next_poll:
+                    continue
+                try:
+                    status = job.batch.status(job.job_id)
+                    # Downloaded in full before anything is delivered, so a failed download is retried like a poll.
+                    outcomes = list(job.batch.results(job.job_id)) if status.done else []
+                except Exception as exc:  # noqa: BLE001
+                    failures.extend(self._poll_failed(job, exc))
+                    continue
+                job.poll_failures = 0
+                if status.state != job.state:
+                    counts = f" ({status.completed}/{status.total})" if status.total else ""
+                    self._report(f"{job.engine.name} batch {job.job_id}: {status.state}{counts}.")
+                    job.state = status.state
+                if status.done:
+                    job.done = True
+                    failures.extend(self._collect(plan, job, outcomes, status.message))
+            if all(job.done for job in jobs):
+                return failures
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Provider batch jobs still running after {self.timeout:g}s; they were cancelled.")
+            time.sleep(self.poll_interval)
+
+    def _poll_failed(self, job: _Job, exc: Exception) -> List[str]:
+        job.poll_failures += 1
+        if job.poll_failures > MAX_POLL_RETRIES:
+            # The job may still finish at the provider; it is left running, not cancelled.
+            job.done = True
+            label = f"{job.engine.name} batch {job.job_id}"
+            self._report(f"{label}: giving up after {MAX_POLL_RETRIES} failed retries ({exc}).")
+            return [f"{label}: status check failed ({exc}); the job was left running." for _ in job.units]
+        delay = min(self.poll_interval * 2**job.poll_failures, max(MAX_POLL_BACKOFF_SECONDS, self.poll_interval))
+        job.next_poll = time.monotonic() + delay
+        self._report(f"{job.engine.name} batch {job.job_id}: status check failed ({exc}); retrying in {delay:g}s.")
+        return []
+
+    def _collect(self, plan: _Plan, job: _Job, outcomes: List[BatchOutcome], message: Optional[str]) -> List[str]:
+        remaining = dict(job.units)
+        failures: List[str] = []
+        for custom_id, outcome in outcomes:
+            pending = remaining.pop(custom_id, None)
+            if pending is None:
+                continue
+            if isinstance(outcome, str):
+                failures.append(outcome)
+                continue
+            if self.cache is not None:
+                self.cache.put(self.cache.key(job.engine, pending.unit.prompt, pending.unit.run), outcome)
+            self._deliver(plan, job.engine, pending, outcome)
+        reason = message or f"job ended as {job.state}"
+        failures.extend(f"{job.engine.name} batch {job.job_id}: no result ({reason})." for _ in remaining)
+        return failures
+
+    def _deliver(self, plan: _Plan, engine: Engine, pending: _Pending, response: EngineResponse) -> None:
+        for index, (task_index, position) in enumerate(pending.waiters):
+            state = plan.tasks[task_index]
+            state.responses[position] = response
+            if index:
+                telemetry.shared(engine.name)
+            if state.journal is not None:
+                state.journal.record(pending.unit, response)
+
+    def _report(self, message: str) -> None:
+        if self.progress is not None:
+            self.progress(message)
+
+
+def _direct_failures(units: List[_Pending], calls: List["Future[None]"]) -> List[str]:
+    failures: List[str] = []
+    for pending, call in zip(units, calls):
+        try:
+            call.result()
+        except Exception as exc:  # noqa: BLE001
+            failures.append(f"{pending.unit.engine} run {pending.unit.run}: {exc}")
+    return failures
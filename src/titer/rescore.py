@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import csv
+import json
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Union
+
+from .evaluator import EvaluationResult, score_responses
+from .matching import MatchOptions
+from .stats import Breakdown
+
+DEFAULT_CHUNK_ROWS = 16
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+# A stored row: one JSONL line, or one CSV row with JSON-encoded cells.
+StoredRow = Union[str, Dict[str, str]]
+
+
+def iter_stored_rows(paths: Iterable[Path]) -> Iterator[StoredRow]:
+    """Stream result rows from earlier CSV or JSONL outputs without decoding them.
+
+    Decoding (the ``raw_responses`` JSON in particular) is left to
+    :func:`parse_stored_result`, so it can run in worker processes.
+    """
+    # raw_responses cells are far larger than the csv module's default field limit.
+    csv.field_size_limit(sys.maxsize)
+    for path in paths:
+        path = Path(path)
+        with path.open(newline="", encoding="utf-8") as handle:
+            if path.suffix.lower() in JSONL_SUFFIXES:
+                for line in handle:
+                    if line.strip():
+                        yield line
+            else:
+                yield from csv.DictReader(handle)
+
+
+def parse_stored_result(row: StoredRow) -> Optional[EvaluationResult]:
+    """Rebuild an :class:`EvaluationResult` from a stored row; ``None`` for non-result lines."""
+    data: Mapping[str, Any] = json.loads(row) if isinstance(row, str) else row
+    if not isinstance(data, Mapping) or "raw_responses" not in data:
+        # e.g. the trailing {"output_sheet_url": ...} line of NDJSON stdout.
+        return None
+
+    def decoded(name: str) -> Any:
+        value = data.get(name)
+        return json.loads(value) if isinstance(value, str) else value
+
+    return EvaluationResult(
+        timestamp=datetime.fromisoformat(data["timestamp"]),
+        prompts=list(decoded("prompts") or []),
+        engines=list(decoded("engines") or []),
+        keywords=list(decoded("keywords") or []),
+        domain_wildcards=list(decoded("domain_wildcards") or []),
+        runs=int(data["runs"]),
+        keyword_counts=dict(decoded("keyword_counts") or {}),
+        domain_counts=dict(decoded("domain_counts") or {}),
+        raw_responses=list(decoded("raw_responses") or []),
+        runs_used=decoded("runs_used") or None,
+        breakdown=decoded("breakdown") or None,
+    )
+
+
+def rescore_result(
+    result: EvaluationResult,
+    keywords: Optional[Sequence[str]] = None,
+    domain_wildcards: Optional[Sequence[str]] = None,
+    match_options: MatchOptions | None = None,
+) -> EvaluationResult:
+    """Recount a stored result against new keyword and/or domain sets.
+
+    ``None`` keeps the result's own set. Counts come from the stored ``content`` and
+    ``cites`` of every raw response, exactly as a live run computes them; the
+    timestamp and responses are kept, so trends line up with the original runs. A
+    stored breakdown is recomputed too. Results stored without per-response records
+    raise :class:`ValueError`.
+    """
+    if not result.raw_responses:
+        raise ValueError(f"Result from {result.timestamp.isoformat()} has no stored responses to rescore.")
+    keywords = result.keywords if keywords is None else list(keywords)
+    domain_wildcards = result.domain_wildcards if domain_wildcards is None else list(domain_wildcards)
+    runs: int | List[int] = result.runs
+    if result.runs_used:
+        # Adaptive results: every (engine, prompt) pair is averaged over its own runs.
+        used = {(entry["engine"], entry["prompt"]): int(entry["runs"]) for entry in result.runs_used}
+        runs = [used[(record["engine"], record["prompt"])] for record in result.raw_responses]
+    breakdown = Breakdown() if result.breakdown is not None else None
+    keyword_counts, domain_counts = score_responses(
+        ((record.get("content") or "", record.get("cites") or []) for record in result.raw_responses),
+        keywords,
+        domain_wildcards,
+        runs,
+        match_options,
+        breakdown=breakdown,
+        unit_keys=[(record["engine"], record["prompt"]) for record in result.raw_responses] if breakdown else None,
+    )
+    return replace(
+        result,
+        keywords=list(keywords),
+        domain_wildcards=list(domain_wildcards),
+        keyword_counts=keyword_counts,
+        domain_counts=domain_counts,
+        breakdown=breakdown.as_list() if breakdown is not None else None,
+    )
+
+
+def rescore_stored(
+    paths: Iterable[Path],
+    keywords: Optional[Sequence[str]] = None,
+    domain_wildcards: Optional[Sequence[str]] = None,
+    match_options: MatchOptions | None = None,
+    workers: int = 1,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[EvaluationResult]:
+    """Yield every stored result of ``paths`` rescored, in input order, without network calls.
+
+    Rows are read lazily and handed to ``workers`` processes in chunks of ``chunk_rows``;
+    at most two chunks per worker are outstanding, so memory stays flat however many
+    files are read.
+    """
+    if workers < 1 or chunk_rows < 1:
+        raise ValueError("Workers and chunk size must be at least 1.")
+    keywords = None if keywords is None else list(keywords)
+    domain_wildcards = None if domain_wildcards is None else list(domain_wildcards)
+    chunks = _chunked(iter_stored_rows(paths), chunk_rows)
+    if workers == 1:
+        for chunk in chunks:
+            yield from _rescore_chunk(chunk, keywords, domain_wildcards, match_options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Future[List[EvaluationResult]]] = deque()
+        try:
+            for chunk in chunks:
+                pending.append(pool.submit(_rescore_chunk, chunk, keywords, domain_wildcards, match_options))
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _rescore_chunk(
+    rows: Sequence[StoredRow],
+    keywords: Optional[Sequence[str]],
+    domain_wildcards: Optional[Sequence[str]],
+    match_options: MatchOptions | None,
+) -> List[EvaluationResult]:
+    rescored: List[EvaluationResult] = []
+    for row in rows:
+        result = parse_stored_result(row)
+        if result is not None:
+            rescored.append(rescore_result(result, keywords, domain_wildcards, match_options))
+    return rescored
+
+
+def _chunked(rows: Iterable[StoredRow], size: int) -> Iterator[List[StoredRow]]:
+    chunk: List[StoredRow] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .evaluator import EvaluationResult
+from .matching import DomainMatcher, MatchOptions
+
+BUCKETS = {
+    "day": "substr(u.timestamp, 1, 10)",
+    "week": "strftime('%Y-W%W', u.timestamp)",
+    "month": "substr(u.timestamp, 1, 7)",
+    "all": "'all'",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS engines (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS prompts (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS keywords (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS domains (id INTEGER PRIMARY KEY, pattern TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    task_index INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    runs INTEGER NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    task_id INTEGER NOT NULL REFERENCES tasks(id),
+    timestamp TEXT NOT NULL,
+    run INTEGER NOT NULL,
+    engine_id INTEGER NOT NULL REFERENCES engines(id),
+    prompt_id INTEGER NOT NULL REFERENCES prompts(id)
+);
+CREATE TABLE IF NOT EXISTS keyword_counts (
+    keyword_id INTEGER NOT NULL REFERENCES keywords(id),
+    unit_id INTEGER NOT NULL REFERENCES units(id),
+    count INTEGER NOT NULL,
+    PRIMARY KEY (keyword_id, unit_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS domain_counts (
+    domain_id INTEGER NOT NULL REFERENCES domains(id),
+    unit_id INTEGER NOT NULL REFERENCES units(id),
+    count INTEGER NOT NULL,
+    PRIMARY KEY (domain_id, unit_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tasks_timestamp ON tasks(timestamp);
+CREATE INDEX IF NOT EXISTS idx_tasks_run ON tasks(run_id);
+CREATE INDEX IF NOT EXISTS idx_units_timestamp ON units(timestamp);
+CREATE INDEX IF NOT EXISTS idx_units_engine ON units(engine_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_units_prompt ON units(prompt_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_units_task ON units(task_id);
+"""
+
+
+class ResultStore:
+    """SQLite store of evaluation results for trend queries across many batches.
+
+    Every task becomes a ``tasks`` row (with its full ``as_dict()`` payload minus raw
+    responses) and every engine call a ``units`` row. Keyword and domain counts are
+    stored per unit, including zeros, so the average over any slice is a plain ``AVG``.
+    Engine, prompt, keyword and domain strings are interned into lookup tables. Each
+    task is written in one transaction.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._ids: Dict[Tuple[str, str], int] = {}
+
+    def start_run(self, label: str | None = None) -> int:
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (started_at, label) VALUES (?, ?)",
+                (datetime.now(timezone.utc).isoformat(), label),
+            )
+        return int(cursor.lastrowid)  # type: ignore[arg-type]
+
+    def add_result(
+        self,
+        run_id: int,
+        task_index: int,
+        result: EvaluationResult,
+        match_options: MatchOptions | None = None,
+    ) -> int:
+        """Store one task result and its per-unit counts; returns the task id."""
+        if not result.raw_responses:
+            raise ValueError("Result has no per-response records (written with --no-records?); per-unit counts need them.")
+        keyword_matcher = (match_options or MatchOptions()).keyword_matcher(result.keywords)
+        # Duplicate patterns would be counted once per occurrence; store each once.
+        domain_matcher = DomainMatcher(list(dict.fromkeys(result.domain_wildcards)))
+        timestamp = _utc_iso(result.timestamp)
+        summary = result.as_dict()
+        summary.pop("raw_responses")
+        with self._conn:
+            task_id = int(
+                self._conn.execute(
+                    "INSERT INTO tasks (run_id, task_index, timestamp, runs, result) VALUES (?, ?, ?, ?, ?)",
+                    (run_id, task_index, timestamp, result.runs, json.dumps(summary, default=str)),
+                ).lastrowid  # type: ignore[arg-type]
+            )
+            keyword_ids = {kw: self._intern("keywords", "text", kw) for kw in keyword_matcher.keywords}
+            domain_ids = {pattern: self._intern("domains", "pattern", pattern) for pattern in domain_matcher.patterns}
+            keyword_rows: List[Tuple[int, int, int]] = []
+            domain_rows: List[Tuple[int, int, int]] = []
+            for record in result.raw_responses:
+                unit_id = int(
+                    self._conn.execute(
+                        "INSERT INTO units (task_id, timestamp, run, engine_id, prompt_id) VALUES (?, ?, ?, ?, ?)",
+                        (
+                            task_id,
+                            timestamp,
+                            record["run"],
+                            self._intern("engines", "name", record["engine"]),
+                            self._intern("prompts", "text", record["prompt"]),
+                        ),
+                    ).lastrowid  # type: ignore[arg-type]
+                )
+                for keyword, count in keyword_matcher.count(record["content"]).items():
+                    keyword_rows.append((keyword_ids[keyword], unit_id, count))
+                for pattern, count in domain_matcher.count(record["cites"]).items():
+                    domain_rows.append((domain_ids[pattern], unit_id, count))
+            self._conn.executemany("INSERT INTO keyword_counts VALUES (?, ?, ?)", keyword_rows)
+            self._conn.executemany("INSERT INTO domain_counts VALUES (?, ?, ?)", domain_rows)
+        return task_id
+
+    def keyword_trend(
+        self,
+        keywords: Sequence[str] = (),
+        engines: Sequence[str] = (),
+        prompts: Sequence[str] = (),
+        since: str | None = None,
+        until: str | None = None,
+        bucket: str = "day",
+    ) -> List[Dict[str, Any]]:
+        """Per bucket, engine and keyword: responses, total and average mentions, hit rate."""
+        return self._trend("keyword_counts", "keyword_id", "keywords", "text", keywords, engines, prompts, since, until, bucket)
+
+    def domain_trend(
+        self,
+        domains: Sequence[str] = (),
+        engines: Sequence[str] = (),
+        prompts: Sequence[str] = (),
+        since: str | None = None,
+        until: str | None = None,
+        bucket: str = "day",
+    ) -> List[Dict[str, Any]]:
+        """Per bucket, engine and domain wildcard: responses, total and average citations, hit rate."""
+        return self._trend("domain_counts", "domain_id", "domains", "pattern", domains, engines, prompts, since, until, bucket)
+
+    def list_runs(self) -> List[Dict[str, Any]]:
+        cursor = self._conn.execute(
+            """
+            SELECT r.id, r.started_at, r.label, COUNT(t.id)
+            FROM runs r LEFT JOIN tasks t ON t.run_id = r.id
+            GROUP BY r.id ORDER BY r.id
+            """
+        )
+        return [{"run_id": row[0], "started_at": row[1], "label": row[2], "tasks": row[3]} for row in cursor]
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _intern(self, table: str, column: str, value: str) -> int:
+        key = (table, value)
+        cached = self._ids.get(key)
+        if cached is not None:
+            return cached
+        self._conn.execute(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", (value,))
+        row_id = self._ids[key] = int(self._conn.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,)).fetchone()[0])
+        return row_id
+
+    def _trend(
+        self,
+        counts_table: str,
+        id_column: str,
+        names_table: str,
+        name_column: str,
+        names: Sequence[str],
+        engines: Sequence[str],
+        prompts: Sequence[str],
+        since: str | None,
+        until: str | None,
+        bucket: str,
+    ) -> List[Dict[str, Any]]:
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unsupported bucket '{bucket}'.")
+        where: List[str] = []
+        params: List[Any] = []
+        for column, table, lookup, values in (
+            (f"c.{id_column}", names_table, name_column, names),
+            ("u.engine_id", "engines", "name", engines),
+            ("u.prompt_id", "prompts", "text", prompts),
+        ):
+            if values:
+                placeholders = ", ".join("?" * len(values))
+                where.append(f"{column} IN (SELECT id FROM {table} WHERE {lookup} IN ({placeholders}))")
+                params.extend(values)
+        if since:
+            where.append("u.timestamp >= ?")
+            params.append(since)
+        if until:
+            # Dates compare as prefixes of the stored ISO timestamps, so "until" is inclusive.
+            where.append("u.timestamp < ?")
+            params.append(until + "\uffff")
+        cursor = self._conn.execute(
+            f"""
+            SELECT {BUCKETS[bucket]} AS bucket, e.name, n.{name_column},
+                   COUNT(*), SUM(c.count), AVG(c.count), AVG(c.count > 0)
+            FROM {counts_table} c
+            JOIN units u ON u.id = c.unit_id
+            JOIN engines e ON e.id = u.engine_id
+            JOIN {names_table} n ON n.id = c.{id_column}
+            {"WHERE " + " AND ".join(where) if where else ""}
+            GROUP BY bucket, e.name, n.{name_column}
+            ORDER BY bucket, e.name, n.{name_column}
+            """,
+            params,
+        )
+        label = "keyword" if counts_table == "keyword_counts" else "domain"
+        return [
+            {
+                "bucket": row[0],
+                "engine": row[1],
+                label: row[2],
+                "responses": row[3],
+                "total": row[4],
+                "average": row[5],
+                "hit_rate": row[6],
+            }
+            for row in cursor
+        ]
+
+
+def _utc_iso(timestamp: datetime) -> str:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc).isoformat()
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import queue
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .blobs import RawOptions
+from .cache import ResponseSource
+from .engines.base import Engine, EngineResponse
+from .engines.factory import EngineFactory
+from .journal import RunJournal, TaskJournal
+from .matching import MatchOptions
+from .telemetry import telemetry
+from .evaluator import EvaluationResult, WorkUnit, build_result, plan_work_units, run_unit, validate_inputs
+
+Job = Callable[[], None]
+Waiter = Tuple["_TaskState", int]
+
+
+@dataclass
+class _TaskState:
+    index: int
+    task: Dict[str, Any]
+    engines: Mapping[str, Engine]
+    units: List[WorkUnit]
+    responses: List[Optional[EngineResponse]]
+    remaining: int
+    journal: Optional[TaskJournal] = None
+    failed: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class _Lane:
+    """Worker pool for one provider that serves pending tasks round-robin."""
+
+    def __init__(self, provider: str, concurrency: int) -> None:
+        self.provider = provider
+        self._pending: "OrderedDict[int, Deque[Job]]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"titer-{provider}-{slot}", daemon=True)
+            for slot in range(concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, task_index: int, job: Job) -> None:
+        with self._cond:
+            self._pending.setdefault(task_index, deque()).append(job)
+            self._cond.notify()
+
+    def close(self, cancel: bool = False) -> None:
+        with self._cond:
+            self._closed = True
+            if cancel:
+                self._pending.clear()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _take(self) -> Job | None:
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            task_index, jobs = self._pending.popitem(last=False)
+            job = jobs.popleft()
+            # Re-queue the task at the back so the next free worker serves a different task.
+            if jobs:
+                self._pending[task_index] = jobs
+            return job
+
+    def _work(self) -> None:
+        while True:
+            job = self._take()
+            if job is None:
+                return
+            try:
+                job()
+            except BaseException:  # noqa: BLE001 - jobs report their own errors; keep the worker alive
+                continue
+
+
+class BatchScheduler:
+    """Run work units from many tasks on independent per-provider lanes.
+
+    Every task is expanded into work units as soon as it is read. Units are queued on
+    the lane of their provider (``openai``, ``gemini``, ...), each lane has its own
+    concurrency limit, and results are reassembled per task as their last unit finishes.
+
+    With ``share_units``, a unit identical to one that is still queued or running (same
+    engine, prompt and run, from another task) is not queued again: it waits for that
+    job, which hands its response to every task that asked for it.
+    """
+
+    def __init__(
+        self,
+        default_concurrency: int = 1,
+        provider_concurrency: Mapping[str, int] | None = None,
+        cache: ResponseSource | None = None,
+        journal: RunJournal | None = None,
+        match_options: MatchOptions | None = None,
+        raw_options: RawOptions | None = None,
+        share_units: bool = False,
+    ) -> None:
+        if default_concurrency < 1:
+            raise ValueError("Concurrency must be at least 1.")
+        for provider, limit in (provider_concurrency or {}).items():
+            if limit < 1:
+                raise ValueError(f"Concurrency for provider '{provider}' must be at least 1.")
+        self.default_concurrency = default_concurrency
+        self.provider_concurrency = dict(provider_concurrency or {})
+        self.cache = cache
+        self.journal = journal
+        self.match_options = match_options
+        self.raw_options = raw_options
+        self.share_units = share_units
+        self._factory = EngineFactory.shared()
+        self._lanes: Dict[str, _Lane] = {}
+        self._share_lock = threading.Lock()
+        self._waiters: Dict[WorkUnit, List[Waiter]] = {}
+
+    def run(self, tasks: Iterable[Dict[str, Any]]) -> Iterator[Tuple[int, EvaluationResult]]:
+        """Yield ``(task_index, result)`` pairs in completion order."""
+        done: "queue.Queue[Tuple[int, EvaluationResult | None, BaseException | None]]" = queue.Queue()
+        submitted = 0
+        finished = 0
+        failed = False
+        try:
+            for index, task in enumerate(tasks):
+                self._submit_task(index, task, done)
+                submitted += 1
+                while True:
+                    try:
+                        item = done.get_nowait()
+                    except queue.Empty:
+                        break
+                    finished += 1
+                    yield self._unpack(item)
+            while finished < submitted:
+                finished += 1
+                yield self._unpack(done.get())
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._close(cancel=failed or finished < submitted)
+
+    def _submit_task(self, index: int, task: Dict[str, Any], done: "queue.Queue[Any]") -> None:
+        validate_inputs(task["prompts"], task["engines"], task["runs"], 1)
+        units = plan_work_units(task["prompts"], task["engines"], task["runs"])
+        engines = {name: self._factory.create(name) for name in task["engines"]}
+        journal = self.journal.for_task(index) if self.journal else None
+        responses = journal.lookup(units) if journal else [None] * len(units)
+        pending = [position for position, response in enumerate(responses) if response is None]
+        state = _TaskState(
+            index=index,
+            task=task,
+            engines=engines,
+            units=units,
+            responses=responses,
+            remaining=len(pending),
+            journal=journal,
+        )
+        if not pending:
+            # Everything was replayed from the journal.
+            self._complete(state, done)
+            return
+        for position in pending:
+            unit = units[position]
+            if self.share_units:
+                with self._share_lock:
+                    waiters = self._waiters.get(unit)
+                    if waiters is not None:
+                        waiters.append((state, position))
+                        continue
+                    self._waiters[unit] = [(state, position)]
+            lane = self._lane(unit.engine.split("/", 1)[0])
+            lane.submit(index, self._make_job(state, position, done))
+
+    def _make_job(self, state: _TaskState, position: int, done: "queue.Queue[Any]") -> Job:
+        unit = state.units[position]
+        engine = state.engines[unit.engine]
+
+        def job() -> None:
+            try:
+                if not self.share_units:
+                    if not state.failed:
+                        self._run_for(unit, engine, [(state, position)], done)
+                    return
+                with self._share_lock:
+                    waiters = self._waiters[unit]
+                    if all(waiter.failed for waiter, _ in waiters):
+                        # Later tasks asking for this unit queue a fresh job.
+                        del self._waiters[unit]
+                        return
+                self._run_for(unit, engine, waiters, done)
+            except BaseException as exc:  # noqa: BLE001 - surfaced on the consumer thread
+                self._fail(state, exc, done)
+
+        return job
+
+    def _run_for(self, unit: WorkUnit, engine: Engine, waiters: List[Waiter], done: "queue.Queue[Any]") -> None:
+        # Only the first task's journal records the call as it is made; the others are
+        # recorded below, once every waiter is known.
+        first, _ = waiters[0]
+        try:
+            response = run_unit(engine, unit, self.cache, first.journal)
+            error: BaseException | None = None
+        except BaseException as exc:  # noqa: BLE001 - surfaced on the consumer thread
+            error = exc
+        if self.share_units:
+            with self._share_lock:
+                waiters = self._waiters.pop(unit)
+        for index, (state, position) in enumerate(waiters):
+            if error is not None:
+                self._fail(state, error, done)
+                continue
+            if state.failed:
+                continue
+            try:
+                if index:
+                    telemetry.shared(engine.name)
+                    if state.journal is not None:
+                        state.journal.record(unit, response)
+                with state.lock:
+                    state.responses[position] = response
+                    state.remaining -= 1
+                    complete = state.remaining == 0
+                if complete:
+                    self._complete(state, done)
+            except BaseException as exc:  # noqa: BLE001 - surfaced on the consumer thread
+                self._fail(state, exc, done)
+
+    def _fail(self, state: _TaskState, error: BaseException, done: "queue.Queue[Any]") -> None:
+        # Report each task's first error once; its remaining units are skipped.
+        with state.lock:
+            already_failed, state.failed = state.failed, True
+        if not already_failed:
+            done.put((state.index, None, error))
+
+    def _complete(self, state: _TaskState, done: "queue.Queue[Any]") -> None:
+        task = state.task
+        try:
+            result = build_result(
+                task["prompts"],
+                task["engines"],
+                task["keywords"],
+                task["domain_wildcards"],
+                task["runs"],
+                state.engines,
+                state.units,
+                state.responses,  # type: ignore[arg-type]
+                self.match_options,
+                self.raw_options,
+            )
+        except BaseException as exc:  # noqa: BLE001 - surfaced on the consumer thread
+            self._fail(state, exc, done)
+            return
+        done.put((state.index, result, None))
+
+    def _lane(self, provider: str) -> _Lane:
+        lane = self._lanes.get(provider)
+        if lane is None:
+            concurrency = self.provider_concurrency.get(provider, self.default_concurrency)
+            lane = self._lanes[provider] = _Lane(provider, concurrency)
+        return lane
+
+    def _close(self, cancel: bool) -> None:
+        for lane in self._lanes.values():
+            lane.close(cancel=cancel)
+        self._lanes.clear()
+
+    @staticmethod
+    def _unpack(item: Tuple[int, EvaluationResult | None, BaseException | None]) -> Tuple[int, EvaluationResult]:
+        index, result, error = item
+        if error is not None:
+            raise error
+        assert result is not None
+        return index, result
+
+
+def parse_provider_concurrency(values: Iterable[str]) -> Dict[str, int]:
+    """Parse ``provider=N`` pairs as given on the command line."""
+    limits: Dict[str, int] = {}
+    for value in values:
+        provider, sep, limit = value.partition("=")
+        provider = provider.strip()
+        if not sep or not provider:
+            raise ValueError(f"Expected '<provider>=<limit>', got '{value}'.")
+        try:
+            limits[provider] = int(limit)
+        except ValueError as exc:
+            raise ValueError(f"Invalid concurrency limit in '{value}'.") from exc
+    return limits
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from .engines.ratelimit import is_rate_limit_error, retry_after_seconds
+from .evaluator import EvaluationResult
+from .writers import ResultWriter
+
+if TYPE_CHECKING:
+    import gspread
+
+T = TypeVar("T")
+
+MAX_CELL_CHARS = 45000
+# Sheets recommends keeping request payloads around 2 MB.
+DEFAULT_CHUNK_ROWS = 500
+DEFAULT_CHUNK_BYTES = 2_000_000
+
+
+class SheetsResultWriter(ResultWriter):
+    """Write result rows to a worksheet in chunks instead of one whole-table update.
+
+    The worksheet is cleared and sized once, when the header is known: to exactly
+    ``expected_rows`` data rows if given, otherwise it grows by doubling as rows arrive.
+    Rows are buffered and sent as ``ws.update`` calls on explicit ranges, each capped at
+    ``chunk_rows`` rows and ``chunk_bytes`` of cell text. Explicit ranges (rather than
+    appends) keep a retried request from writing a row twice. Rate-limit errors (429)
+    are retried with exponential backoff, honouring ``Retry-After``.
+
+    With ``flush_seconds`` set, buffered rows are also pushed whenever that much time
+    has passed since the last push, so the sheet fills in while the batch runs.
+    """
+
+    def __init__(
+        self,
+        worksheet: "gspread.Worksheet",
+        expected_rows: Optional[int] = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+        flush_seconds: Optional[float] = None,
+        max_retries: int = 6,
+        backoff_seconds: float = 2.0,
+    ) -> None:
+        self.worksheet = worksheet
+        self.expected_rows = expected_rows
+        self.chunk_rows = chunk_rows
+        self.chunk_bytes = chunk_bytes
+        self.flush_seconds = flush_seconds
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.rows_written = 0
+        self._fieldnames: Optional[List[str]] = None
+        self._pending: List[List[str]] = []
+        self._pending_bytes = 0
+        self._next_row = 1
+        self._grid_rows = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, result: EvaluationResult) -> None:
+        self.write_row(result.as_row())
+
+    def write_row(self, row: Dict[str, Any]) -> None:
+        if self._fieldnames is None:
+            self._start(list(row.keys()))
+        prepared = prepare_sheet_row(row, self._fieldnames)  # type: ignore[arg-type]
+        self._pending.append(prepared)
+        self._pending_bytes += sum(len(cell) for cell in prepared)
+        if len(self._pending) >= self.chunk_rows or self._pending_bytes >= self.chunk_bytes:
+            self.flush()
+        elif self.flush_seconds is not None and time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self) -> None:
+        while self._pending:
+            chunk = self._take_chunk()
+            self._ensure_grid(self._next_row + len(chunk) - 1)
+            start = self._next_row
+            self._call(lambda: self.worksheet.update(values=chunk, range_name=f"A{start}"))
+            self._next_row += len(chunk)
+        self.rows_written = max(self._next_row - 2, 0)
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+
+    def _start(self, fieldnames: List[str]) -> None:
+        self._fieldnames = fieldnames
+        self._call(self.worksheet.clear)
+        rows = 1 + (self.expected_rows if self.expected_rows else self.chunk_rows)
+        self._resize(rows)
+        # The header goes out with the first chunk of rows.
+        self._pending.append(list(fieldnames))
+        self._pending_bytes += sum(len(name) for name in fieldnames)
+
+    def _take_chunk(self) -> List[List[str]]:
+        size = 0
+        count = 0
+        for row in self._pending:
+            row_bytes = sum(len(cell) for cell in row)
+            if count and (count >= self.chunk_rows or size + row_bytes > self.chunk_bytes):
+                break
+            size += row_bytes
+            count += 1
+        chunk, self._pending = self._pending[:count], self._pending[count:]
+        self._pending_bytes -= size
+        return chunk
+
+    def _ensure_grid(self, last_row: int) -> None:
+        if last_row > self._grid_rows:
+            self._resize(max(last_row, self._grid_rows * 2))
+
+    def _resize(self, rows: int) -> None:
+        cols = len(self._fieldnames or []) or None
+        self._call(lambda: self.worksheet.resize(rows=rows, cols=cols))
+        self._grid_rows = rows
+
+    def _call(self, request: Callable[[], T]) -> T:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return request()
+            except Exception as exc:
+                if attempt >= self.max_retries or not is_rate_limit_error(exc):
+                    raise
+                delay = retry_after_seconds(exc)
+                if delay is None:
+                    delay = self.backoff_seconds * (2**attempt) * random.uniform(0.5, 1.0)
+                time.sleep(delay)
+        raise AssertionError("unreachable")
+
+
+def prepare_sheet_row(row: Dict[str, Any], fieldnames: Sequence[str], max_len: int = MAX_CELL_CHARS) -> List[str]:
+    """Render one row as strings, truncating cells that would exceed the Sheets cell limit."""
+    prepared: List[str] = []
+    for field in fieldnames:
+        value = row.get(field, "")
+        text = "" if value is None else str(value)
+        if len(text) > max_len:
+            text = text[: max_len - 3] + "..."
+        prepared.append(text)
+    return prepared
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+CONFIDENCE_LEVELS = (0.90, 0.95, 0.99)
+
+# Two-sided Student t critical values for 1..30 degrees of freedom.
+_T_TABLE: Dict[float, tuple[float, ...]] = {
+    0.90: (
+        6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833, 1.812,
+        1.796, 1.782, 1.771, 1.761, 1.753, 1.746, 1.740, 1.734, 1.729, 1.725,
+        1.721, 1.717, 1.714, 1.711, 1.708, 1.706, 1.703, 1.701, 1.699, 1.697,
+    ),
+    0.95: (
+        12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+    ),
+    0.99: (
+        63.657, 9.925, 5.841, 4.604, 4.032, 3.707, 3.499, 3.355, 3.250, 3.169,
+        3.106, 3.055, 3.012, 2.977, 2.947, 2.921, 2.898, 2.878, 2.861, 2.845,
+        2.831, 2.819, 2.807, 2.797, 2.787, 2.779, 2.771, 2.763, 2.756, 2.750,
+    ),
+}
+_Z = {0.90: 1.645, 0.95: 1.960, 0.99: 2.576}
+
+
+def t_critical(confidence: float, df: int) -> float:
+    """Two-sided Student t critical value; the normal value beyond 30 degrees of freedom."""
+    if confidence not in _T_TABLE:
+        raise ValueError(f"Unsupported confidence level {confidence}; choose from {', '.join(map(str, CONFIDENCE_LEVELS))}.")
+    if df < 1:
+        return math.inf
+    table = _T_TABLE[confidence]
+    return table[df - 1] if df <= len(table) else _Z[confidence]
+
+
+class RunningStats:
+    """Streaming mean, variance, minimum and maximum (Welford's algorithm)."""
+
+    __slots__ = ("count", "mean", "_m2", "minimum", "maximum")
+
+    def __init__(self, values: Iterable[float] = ()) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        for value in values:
+            self.add(value)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (``n - 1`` denominator); 0 with fewer than two values."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def ci_halfwidth(self, confidence: float = 0.95) -> float:
+        """Half-width of the t confidence interval of the mean; infinite below two values."""
+        if self.count < 2:
+            return math.inf
+        return t_critical(confidence, self.count - 1) * self.std / math.sqrt(self.count)
+
+
+@dataclass(frozen=True)
+class AdaptiveRuns:
+    """Sequential sampling policy: keep adding runs until the averages are stable.
+
+    An (engine, prompt) pair stops after ``min_runs`` once the confidence interval of
+    every keyword and domain count meets a target: half-width at most ``ci_width``, or
+    at most ``rel_error`` times the mean (either target is enough when both are set).
+    It never gets more than ``max_runs``.
+    """
+
+    max_runs: int
+    ci_width: Optional[float] = None
+    rel_error: Optional[float] = None
+    min_runs: int = 2
+    confidence: float = 0.95
+
+    def __post_init__(self) -> None:
+        if self.ci_width is None and self.rel_error is None:
+            raise ValueError("Adaptive runs need a target CI half-width or relative error.")
+        if self.min_runs < 2 or self.max_runs < self.min_runs:
+            raise ValueError("Adaptive runs need 2 <= min_runs <= max_runs.")
+        t_critical(self.confidence, 1)
+
+    def converged(self, stats: RunningStats) -> bool:
+        if stats.count < self.min_runs:
+            return False
+        halfwidth = stats.ci_halfwidth(self.confidence)
+        if self.ci_width is not None and halfwidth <= self.ci_width:
+            return True
+        return self.rel_error is not None and halfwidth <= self.rel_error * abs(stats.mean)
+
+
+BREAKDOWN_CONFIDENCE = 0.95
+ALL_PROMPTS = "*"
+
+
+class Breakdown:
+    """Running statistics of per-response mention counts by engine, prompt and term.
+
+    Every response adds one observation per keyword and domain pattern, to its own
+    (engine, prompt) entry and to the engine's all-prompts entry (prompt ``"*"``).
+    Memory grows with the number of entries, not with the number of responses.
+    """
+
+    def __init__(self, confidence: float = BREAKDOWN_CONFIDENCE) -> None:
+        t_critical(confidence, 1)
+        self.confidence = confidence
+        self._stats: Dict[tuple[str, str, str, str], RunningStats] = {}
+
+    def add(self, engine: str, prompt: str, keyword_counts: Mapping[str, int], domain_counts: Mapping[str, int]) -> None:
+        for scope in (prompt, ALL_PROMPTS):
+            for kind, counts in (("keyword", keyword_counts), ("domain", domain_counts)):
+                for name, count in counts.items():
+                    key = (engine, scope, kind, name)
+                    stats = self._stats.get(key)
+                    if stats is None:
+                        stats = self._stats[key] = RunningStats()
+                    stats.add(count)
+
+    def as_list(self) -> List[Dict[str, Any]]:
+        """One entry per (engine, prompt, kind, name); CI bounds are ``None`` below two responses."""
+        entries: List[Dict[str, Any]] = []
+        engine_order: Dict[str, int] = {}
+        for engine, *_ in self._stats:
+            engine_order.setdefault(engine, len(engine_order))
+        # Keep first-seen order (task order of prompts and terms), engine rollups first.
+        ordered = sorted(self._stats.items(), key=lambda item: (engine_order[item[0][0]], item[0][1] != ALL_PROMPTS))
+        for (engine, prompt, kind, name), stats in ordered:
+            halfwidth = stats.ci_halfwidth(self.confidence)
+            bounded = math.isfinite(halfwidth)
+            entries.append(
+                {
+                    "engine": engine,
+                    "prompt": prompt,
+                    "kind": kind,
+                    "name": name,
+                    "n": stats.count,
+                    "mean": stats.mean,
+                    "std": stats.std,
+                    "ci_low": stats.mean - halfwidth if bounded else None,
+                    "ci_high": stats.mean + halfwidth if bounded else None,
+                    "confidence": self.confidence,
+                    "min": stats.minimum,
+                    "max": stats.maximum,
+                }
+            )
+        return entries
+
@@ -1,33 +1,196 @@
 from __future__ import annotations
 
+import asyncio
 import csv
+import functools
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Sequence
-import gspread
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
 
+from .blobs import RawOptions
+from .cache import ResponseSource, SharedResponses
 from .env import load_project_env
-from .evaluator import EvaluationResult, run_evaluation
+from .evaluator import EvaluationResult, arun_evaluation, run_evaluation
+from .journal import RunJournal
+from .matching import MatchOptions
+from .scheduler import BatchScheduler
+from .stats import AdaptiveRuns
+from .sheets import MAX_CELL_CHARS, SheetsResultWriter, prepare_sheet_row
+
+if TYPE_CHECKING:
+    import gspread
+
+
+def run_tasks(
+    tasks: Iterable[Dict[str, Any]],
+    concurrency: int = 1,
+    use_async: bool = False,
+    lanes: bool = False,
+    provider_concurrency: Mapping[str, int] | None = None,
+    cache: ResponseSource | None = None,
+    journal: RunJournal | None = None,
+    match_options: MatchOptions | None = None,
+    raw_options: RawOptions | None = None,
+    share_window: int | None = None,
+    adaptive: AdaptiveRuns | None = None,
+) -> List[EvaluationResult]:
+    return list(
+        iter_results(
+            tasks,
+            concurrency=concurrency,
+            use_async=use_async,
+            lanes=lanes,
+            provider_concurrency=provider_concurrency,
+            cache=cache,
+            journal=journal,
+            match_options=match_options,
+            raw_options=raw_options,
+            share_window=share_window,
+            adaptive=adaptive,
+        )
+    )
+
+
+def iter_results(
+    tasks: Iterable[Dict[str, Any]],
+    concurrency: int = 1,
+    use_async: bool = False,
+    lanes: bool = False,
+    provider_concurrency: Mapping[str, int] | None = None,
+    cache: ResponseSource | None = None,
+    journal: RunJournal | None = None,
+    match_options: MatchOptions | None = None,
+    raw_options: RawOptions | None = None,
+    share_window: int | None = None,
+    adaptive: AdaptiveRuns | None = None,
+) -> Iterator[EvaluationResult]:
+    """Yield one result per task, in task order, as soon as each task is done.
+
+    Nothing is retained after a result is yielded, so streaming consumers keep memory
+    flat regardless of how many tasks there are; the only exception is the window of
+    ``share_window`` recent engine responses that later rows may reuse. By default every
+    row is sampled independently; with ``share_window`` set (e.g. to
+    ``DEFAULT_SHARE_WINDOW``), identical (engine, prompt, run) units across rows are
+    called once and scored against each row's own keywords and domains.
+    With ``adaptive``, each row samples up to ``adaptive.max_runs`` runs instead of its
+    ``runs`` value.
+    """
+    if share_window is not None:
+        cache = SharedResponses(cache, share_window)
+    if lanes:
+        if use_async:
+            raise ValueError("Provider lanes run on worker threads and cannot be combined with async mode.")
+        if adaptive is not None:
+            raise ValueError("Adaptive runs are planned round by round and cannot be combined with provider lanes.")
+        scheduler = BatchScheduler(
+            default_concurrency=concurrency,
+            provider_concurrency=provider_concurrency,
+            cache=cache,
+            journal=journal,
+            match_options=match_options,
+            raw_options=raw_options,
+            share_units=share_window is not None,
+        )
+        yield from _in_task_order(scheduler.run(tasks))
+    elif use_async:
+        yield from _iter_async(tasks, concurrency, cache, journal, match_options, raw_options, adaptive)
+    else:
+        for index, task in enumerate(tasks):
+            yield run_evaluation(
+                prompts=task["prompts"],
+                engine_names=task["engines"],
+                keywords=task["keywords"],
+                domain_wildcards=task["domain_wildcards"],
+                runs=task["runs"],
+                concurrency=concurrency,
+                cache=cache,
+                journal=journal.for_task(index) if journal else None,
+                match_options=match_options,
+                raw_options=raw_options,
+                adaptive=adaptive,
+            )
 
 
-def run_tasks(tasks: Sequence[Dict[str, Any]]) -> List[EvaluationResult]:
+async def arun_tasks(
+    tasks: Iterable[Dict[str, Any]],
+    concurrency: int = 16,
+    cache: ResponseSource | None = None,
+    journal: RunJournal | None = None,
+    match_options: MatchOptions | None = None,
+    raw_options: RawOptions | None = None,
+    share_window: int | None = None,
+    adaptive: AdaptiveRuns | None = None,
+) -> List[EvaluationResult]:
+    """Run every task on one event loop so async SDK clients can be reused between rows."""
+    if share_window is not None:
+        cache = SharedResponses(cache, share_window)
     results: List[EvaluationResult] = []
-    for task in tasks:
-        result = run_evaluation(
-            prompts=task["prompts"],
-            engine_names=task["engines"],
-            keywords=task["keywords"],
-            domain_wildcards=task["domain_wildcards"],
-            runs=task["runs"],
-        )
-        results.append(result)
+    for index, task in enumerate(tasks):
+        results.append(await _arun_task(index, task, concurrency, cache, journal, match_options, raw_options, adaptive))
     return results
 
 
-def run_task_file(input_path: Path, output_path: Path) -> List[EvaluationResult]:
+async def _arun_task(
+    index: int,
+    task: Dict[str, Any],
+    concurrency: int,
+    cache: ResponseSource | None,
+    journal: RunJournal | None,
+    match_options: MatchOptions | None,
+    raw_options: RawOptions | None,
+    adaptive: AdaptiveRuns | None = None,
+) -> EvaluationResult:
+    return await arun_evaluation(
+        prompts=task["prompts"],
+        engine_names=task["engines"],
+        keywords=task["keywords"],
+        domain_wildcards=task["domain_wildcards"],
+        runs=task["runs"],
+        concurrency=concurrency,
+        cache=cache,
+        journal=journal.for_task(index) if journal else None,
+        match_options=match_options,
+        raw_options=raw_options,
+        adaptive=adaptive,
+    )
+
+
+def _iter_async(
+    tasks: Iterable[Dict[str, Any]],
+    concurrency: int,
+    cache: ResponseSource | None,
+    journal: RunJournal | None,
+    match_options: MatchOptions | None,
+    raw_options: RawOptions | None,
+    adaptive: AdaptiveRuns | None = None,
+) -> Iterator[EvaluationResult]:
+    # Drive every task on the same loop so async SDK clients are reused between rows.
+    loop = asyncio.new_event_loop()
+    try:
+        for index, task in enumerate(tasks):
+            yield loop.run_until_complete(
+                _arun_task(index, task, concurrency, cache, journal, match_options, raw_options, adaptive)
+            )
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def _in_task_order(completed: Iterable[Tuple[int, EvaluationResult]]) -> Iterator[EvaluationResult]:
+    """Re-sequence ``(index, result)`` pairs, holding back only results that finished early."""
+    waiting: Dict[int, EvaluationResult] = {}
+    next_index = 0
+    for index, result in completed:
+        waiting[index] = result
+        while next_index in waiting:
+            yield waiting.pop(next_index)
+            next_index += 1
+
+
+def run_task_file(input_path: Path, output_path: Path, concurrency: int = 1) -> List[EvaluationResult]:
     tasks = load_tasks_from_csv(input_path)
-    results = run_tasks(tasks)
+    results = run_tasks(tasks, concurrency=concurrency)
     if results:
         write_results_to_csv(output_path, [result.as_row() for result in results])
     return results
@@ -45,11 +208,25 @@ def load_tasks_from_sheet(
     worksheet: str | None = None,
     service_account_path: Path | None = None,
 ) -> List[Dict[str, Any]]:
+    return list(iter_tasks_from_sheet(sheet_ref, worksheet=worksheet, service_account_path=service_account_path))
+
+
+def iter_tasks_from_sheet(
+    sheet_ref: str,
+    worksheet: str | None = None,
+    service_account_path: Path | None = None,
+    page_rows: int = 500,
+) -> Iterator[Dict[str, Any]]:
+    """Yield parsed task rows lazily, reading the worksheet ``page_rows`` rows per request.
+
+    The first tasks are available after two small requests instead of one request for
+    the whole sheet, so a batch can start while the rest of a large sheet is still being
+    read. Completely blank rows are skipped.
+    """
     client = _get_gspread_client(service_account_path)
     sheet = _open_sheet(client, sheet_ref)
     ws = sheet.worksheet(worksheet) if worksheet else sheet.sheet1
-    records = ws.get_all_records(default_blank="")
-    return _parse_task_rows(records)
+    yield from _iter_task_rows(_iter_sheet_records(ws, page_rows))
 
 
 def write_results_to_csv(path: Path, rows: Sequence[Dict[str, Any]]) -> None:
@@ -75,6 +252,29 @@ def write_results_to_sheet(
     if not rows:
         raise ValueError("No rows to write to Google Sheets.")
 
+    sheet, ws = open_output_worksheet(
+        sheet_ref,
+        worksheet=worksheet,
+        service_account_path=service_account_path,
+        create_if_missing=create_if_missing,
+        share_public=share_public,
+        place_first=place_first,
+    )
+    with SheetsResultWriter(ws, expected_rows=len(rows)) as writer:
+        for row in rows:
+            writer.write_row(row)
+    return sheet.url
+
+
+def open_output_worksheet(
+    sheet_ref: str | None,
+    worksheet: str | None = None,
+    service_account_path: Path | None = None,
+    create_if_missing: bool = True,
+    share_public: bool = False,
+    place_first: bool = False,
+) -> Tuple[gspread.Spreadsheet, gspread.Worksheet]:
+    """Open (or create) the output spreadsheet and worksheet for a :class:`SheetsResultWriter`."""
     client = _get_gspread_client(service_account_path)
     if sheet_ref:
         sheet = _open_sheet(client, sheet_ref, create_if_missing=create_if_missing)
@@ -90,12 +290,7 @@ def write_results_to_sheet(
     ws = _get_or_create_worksheet(sheet, worksheet)
     if place_first:
         _move_worksheet_to_front(sheet, ws)
-    fieldnames = list(rows[0].keys())
-    data_rows = _prepare_sheet_rows(rows, fieldnames)
-    data = [fieldnames] + data_rows
-    ws.clear()
-    ws.update(values=data)
-    return sheet.url
+    return sheet, ws
 
 
 def _parse_list(value: Any) -> List[str]:
@@ -136,25 +331,45 @@ def _parse_prompt(value: Any) -> List[str]:
 
 
 def _parse_task_rows(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    tasks: List[Dict[str, Any]] = []
+    return list(_iter_task_rows(rows))
+
+
+def _iter_task_rows(rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
     for index, row in enumerate(rows):
         try:
             prompts = _parse_prompt(row.get("prompt"))
             if not prompts:
                 # Backwards compatibility: fall back to "prompts" column.
                 prompts = _parse_prompt(row.get("prompts"))
-            tasks.append(
-                {
-                    "prompts": prompts,
-                    "engines": _parse_list(row.get("engines")),
-                    "keywords": _parse_list(row.get("keywords")),
-                    "domain_wildcards": _parse_list(row.get("domain_wildcards")),
-                    "runs": int(row.get("runs", "1") or 1),
-                }
-            )
+            task = {
+                "prompts": prompts,
+                "engines": _parse_list(row.get("engines")),
+                "keywords": _parse_list(row.get("keywords")),
+                "domain_wildcards": _parse_list(row.get("domain_wildcards")),
+                "runs": int(row.get("runs", "1") or 1),
+            }
         except Exception as exc:
             raise ValueError(f"Failed to load task row {index}: {exc}") from exc
-    return tasks
+        yield task
+
+
+def _iter_sheet_records(ws: gspread.Worksheet, page_rows: int) -> Iterator[Dict[str, Any]]:
+    """Yield worksheet rows as header-keyed dicts (like ``get_all_records``), one page at a time."""
+    header = ws.row_values(1)
+    if not header:
+        return
+    start = 2
+    while start <= ws.row_count:
+        end = min(start + page_rows - 1, ws.row_count)
+        page = ws.get(f"{start}:{end}")
+        for values in page:
+            if not any(str(value).strip() for value in values):
+                continue
+            padded = list(values) + [""] * (len(header) - len(values))
+            yield dict(zip(header, padded))
+        # The values API leaves out empty rows, so a short or even empty page says
+        # nothing about the rows after it; only the sheet's row count ends the read.
+        start = end + 1
 
 
 def _get_gspread_client(service_account_path: Path | None = None) -> gspread.Client:
@@ -165,7 +380,19 @@ def _get_gspread_client(service_account_path: Path | None = None) -> gspread.Cli
         raise FileNotFoundError(
             f"service account file not found at {path}. Provide the path or place it in the project root."
         )
-    return gspread.service_account(filename=str(path))
+    return _cached_gspread_client(str(path.resolve()))
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_gspread_client(path: str) -> gspread.Client:
+    """One authenticated client per service account file for the whole process.
+
+    Reading tasks and writing results then share the OAuth token (refreshed by the
+    client when it expires) and the HTTP session instead of authenticating twice.
+    """
+    import gspread  # Imported lazily: only Sheets input/output needs it.
+
+    return gspread.service_account(filename=path)
 
 
 def _open_sheet(client: gspread.Client, sheet_ref: str, create_if_missing: bool = False) -> gspread.Spreadsheet:
@@ -198,16 +425,8 @@ def _move_worksheet_to_front(sheet: gspread.Spreadsheet, ws: gspread.Worksheet)
         pass
 
 
-def _prepare_sheet_rows(rows: Sequence[Dict[str, Any]], fieldnames: Sequence[str], max_len: int = 45000) -> List[List[str]]:
+def _prepare_sheet_rows(
+    rows: Sequence[Dict[str, Any]], fieldnames: Sequence[str], max_len: int = MAX_CELL_CHARS
+) -> List[List[str]]:
     """Ensure no cell exceeds Sheets limits by truncating long content."""
-    prepared: List[List[str]] = []
-    for row in rows:
-        prepared_row: List[str] = []
-        for field in fieldnames:
-            value = row.get(field, "")
-            text = "" if value is None else str(value)
-            if len(text) > max_len:
-                text = text[: max_len - 3] + "..."
-            prepared_row.append(text)
-        prepared.append(prepared_row)
-    return prepared
+    return [prepare_sheet_row(row, fieldnames, max_len) for row in rows]
@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+QUANTILES = (0.5, 0.95, 0.99)
+METRICS_FORMATS = ("prometheus", "openmetrics")
+
+_current_call: contextvars.ContextVar[Optional["CallStats"]] = contextvars.ContextVar("titer_call", default=None)
+_current_unit: contextvars.ContextVar[Optional["CallStats"]] = contextvars.ContextVar("titer_unit", default=None)
+
+
+@dataclass
+class CallStats:
+    """What one engine call cost. ``bytes`` is the size of the serialized raw payload.
+
+    A unit answered without a call is ``cached`` when it came from the response cache
+    and ``shared`` when it reused another task's response from the same batch.
+    """
+
+    engine: str
+    latency_s: float = 0.0
+    retries: int = 0
+    throttled: int = 0
+    tokens: Optional[int] = None
+    bytes: int = 0
+    cached: bool = False
+    shared: bool = False
+    error: Optional[str] = None
+
+    def as_timing(self) -> Dict[str, Any]:
+        return {
+            "latency_ms": round(self.latency_s * 1000, 3),
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "tokens": self.tokens,
+            "bytes": self.bytes,
+            "cached": self.cached,
+            "shared": self.shared,
+        }
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+
+
+@dataclass
+class _EngineStats:
+    latencies: List[float] = field(default_factory=list)
+    calls: int = 0
+    errors: int = 0
+    cached: int = 0
+    shared: int = 0
+    retries: int = 0
+    throttled: int = 0
+    tokens: int = 0
+    bytes: int = 0
+
+
+class Telemetry:
+    """Process-wide collector of per-call and per-stage measurements.
+
+    Disabled by default, in which case every hook is a cheap no-op. Engine calls are
+    measured by :meth:`unit` around ``Engine.run``/``arun``; the rate limiter reports
+    retries, 429s and usage tokens for the call in progress through a context variable,
+    so this works the same from worker threads and asyncio tasks. Stages (scoring,
+    output writes, ...) are timed with :meth:`stage`.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.unit_timings = False
+        self._lock = threading.Lock()
+        self._engines: Dict[str, _EngineStats] = defaultdict(_EngineStats)
+        self._stages: Dict[str, StageStats] = defaultdict(StageStats)
+        self._span_hook: Optional[Callable[[CallStats], Any]] = None
+
+    def configure(
+        self,
+        enabled: bool = True,
+        unit_timings: bool = False,
+        span_hook: Optional[Callable[[CallStats], Any]] = None,
+    ) -> None:
+        self.enabled = enabled or unit_timings or span_hook is not None
+        self.unit_timings = unit_timings
+        self._span_hook = span_hook
+
+    def reset(self) -> None:
+        with self._lock:
+            self._engines.clear()
+            self._stages.clear()
+
+    @contextmanager
+    def unit(self, engine: str) -> Iterator["_Probe"]:
+        """Measure one work unit; engine calls made through the probe are timed."""
+        if not self.enabled:
+            yield _NULL_PROBE
+            return
+        probe = _Probe(self, CallStats(engine=engine, cached=True))
+        token = _current_unit.set(probe.stats)
+        try:
+            yield probe
+        except BaseException as exc:
+            probe.stats.error = type(exc).__name__
+            probe.stats.cached = False
+            raise
+        finally:
+            _current_unit.reset(token)
+            self._record(probe.stats)
+
+    def shared(self, engine: str) -> None:
+        """Count a work unit answered with a response another task's unit already fetched."""
+        if self.enabled:
+            self._record(CallStats(engine=engine, shared=True))
+
+    def stage(self, name: str) -> ContextManager[None]:
+        """Time a block as stage ``name`` (wall clock and CPU time of the calling thread).
+
+        Stages nest: ``engine`` includes the ``serialize`` and ``extract`` work done
+        inside the engine call, and wall times of concurrent calls add up.
+        """
+        if not self.enabled:
+            return _NO_STAGE
+        return self._timed(name)
+
+    def timed_iter(self, items: Iterable[T], name: str) -> Iterator[T]:
+        """Yield from ``items``, timing each step of a lazy source as stage ``name``."""
+        iterator = iter(items)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    @contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.thread_time() - cpu
+            with self._lock:
+                stats = self._stages[name]
+                stats.calls += 1
+                stats.wall_s += wall
+                stats.cpu_s += cpu
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            engines = {name: _engine_summary(stats) for name, stats in sorted(self._engines.items())}
+            stages = {
+                name: {"calls": stats.calls, "wall_s": stats.wall_s, "cpu_s": stats.cpu_s}
+                for name, stats in sorted(self._stages.items())
+            }
+        return {"engines": engines, "stages": stages}
+
+    def format_summary(self) -> str:
+        summary = self.summary()
+        width = max([32, *(len(name) for name in summary["engines"]), *(len(name) for name in summary["stages"])])
+        lines = [
+            f"{'engine':<{width}} {'calls':>6} {'errors':>6} {'cached':>6} {'shared':>6} {'retries':>7} {'429s':>5} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'tokens':>9} {'MB':>7}"
+        ]
+        for name, stats in summary["engines"].items():
+            lines.append(
+                f"{name:<{width}} {stats['calls']:>6} {stats['errors']:>6} {stats['cached']:>6} {stats['shared']:>6} "
+                f"{stats['retries']:>7} "
+                f"{stats['throttled']:>5} {stats['p50_ms']:>8.0f} {stats['p95_ms']:>8.0f} {stats['p99_ms']:>8.0f} "
+                f"{stats['tokens']:>9} {stats['bytes'] / 1e6:>7.2f}"
+            )
+        if summary["stages"]:
+            lines.append("")
+            lines.append(f"{'stage':<{width}} {'calls':>6} {'wall s':>9} {'cpu s':>9}")
+            for name, stats in summary["stages"].items():
+                lines.append(f"{name:<{width}} {stats['calls']:>6} {stats['wall_s']:>9.3f} {stats['cpu_s']:>9.3f}")
+        return "\n".join(lines)
+
+    def write_metrics(self, path: Path, metrics_format: str = "prometheus") -> None:
+        """Write a node_exporter textfile (or OpenMetrics file), replacing it atomically."""
+        text = self.render_metrics(metrics_format)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.replace(tmp_name, path)
+
+    def render_metrics(self, metrics_format: str = "prometheus") -> str:
+        if metrics_format not in METRICS_FORMATS:
+            raise ValueError(f"Unsupported metrics format '{metrics_format}'.")
+        openmetrics = metrics_format == "openmetrics"
+        with self._lock:
+            engines = {
+                name: _EngineStats(**{**vars(stats), "latencies": list(stats.latencies)})
+                for name, stats in self._engines.items()
+            }
+            stages = {name: StageStats(**vars(stats)) for name, stats in self._stages.items()}
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family("titer_engine_call_seconds", "summary", "Engine call latency in seconds.")
+        for name, stats in sorted(engines.items()):
+            label = _label(name)
+            latencies = sorted(stats.latencies)
+            for quantile in QUANTILES:
+                lines.append(
+                    f'titer_engine_call_seconds{{engine="{label}",quantile="{quantile}"}} '
+                    f"{_percentile(latencies, quantile):.6f}"
+                )
+            lines.append(f'titer_engine_call_seconds_sum{{engine="{label}"}} {sum(latencies):.6f}')
+            lines.append(f'titer_engine_call_seconds_count{{engine="{label}"}} {len(latencies)}')
+        counters = (
+            ("titer_engine_calls", "Work units by engine, including cache hits and shared units.", "calls"),
+            ("titer_engine_errors", "Failed engine calls.", "errors"),
+            ("titer_engine_cache_hits", "Work units answered from the response cache.", "cached"),
+            ("titer_engine_shared_units", "Work units answered with another task's response from the same batch.", "shared"),
+            ("titer_engine_retries", "Retried engine calls.", "retries"),
+            ("titer_engine_throttled", "Rate-limit (429/quota) errors.", "throttled"),
+            ("titer_engine_tokens", "Usage tokens reported by the provider.", "tokens"),
+            ("titer_engine_response_bytes", "Serialized raw payload bytes.", "bytes"),
+        )
+        for metric, help_text, attribute in counters:
+            # OpenMetrics counters are declared without the _total suffix.
+            family(metric if openmetrics else f"{metric}_total", "counter", help_text)
+            for name, stats in sorted(engines.items()):
+                lines.append(f'{metric}_total{{engine="{_label(name)}"}} {getattr(stats, attribute)}')
+        family("titer_stage_seconds" if openmetrics else "titer_stage_seconds_total", "counter", "Wall time per stage.")
+        for name, stage in sorted(stages.items()):
+            lines.append(f'titer_stage_seconds_total{{stage="{_label(name)}"}} {stage.wall_s:.6f}')
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def _record(self, stats: CallStats) -> None:
+        with self._lock:
+            engine = self._engines[stats.engine]
+            engine.calls += 1
+            engine.errors += stats.error is not None
+            engine.cached += stats.cached
+            engine.shared += stats.shared
+            engine.retries += stats.retries
+            engine.throttled += stats.throttled
+            engine.tokens += stats.tokens or 0
+            engine.bytes += stats.bytes
+            if not (stats.cached or stats.shared):
+                engine.latencies.append(stats.latency_s)
+        if self._span_hook is not None:
+            self._span_hook(stats)
+
+
+class _Probe:
+    def __init__(self, telemetry: Telemetry | None, stats: CallStats | None) -> None:
+        self.telemetry = telemetry
+        self.stats = stats
+
+    def call(self, fn: Callable[[str], T], prompt: str) -> T:
+        if self.stats is None:
+            return fn(prompt)
+        token = _current_call.set(self.stats)
+        start = time.perf_counter()
+        try:
+            with self.telemetry.stage("engine"):  # type: ignore[union-attr]
+                result = fn(prompt)
+        finally:
+            self._finish(start)
+            _current_call.reset(token)
+        self._measure(result)
+        return result
+
+    async def acall(self, fn: Callable[[str], Awaitable[T]], prompt: str) -> T:
+        if self.stats is None:
+            return await fn(prompt)
+        token = _current_call.set(self.stats)
+        start = time.perf_counter()
+        try:
+            with self.telemetry.stage("engine"):  # type: ignore[union-attr]
+                result = await fn(prompt)
+        finally:
+            self._finish(start)
+            _current_call.reset(token)
+        self._measure(result)
+        return result
+
+    def timing(self) -> Optional[Dict[str, Any]]:
+        if self.stats is None or self.telemetry is None or not self.telemetry.unit_timings:
+            return None
+        return self.stats.as_timing()
+
+    def _finish(self, start: float) -> None:
+        self.stats.cached = False  # type: ignore[union-attr]
+        self.stats.latency_s = time.perf_counter() - start  # type: ignore[union-attr]
+
+    def _measure(self, result: Any) -> None:
+        raw = getattr(result, "raw", None)
+        if raw is not None:
+            self.stats.bytes = len(json.dumps(raw, default=str))  # type: ignore[union-attr]
+
+
+_NULL_PROBE = _Probe(None, None)
+_NO_STAGE: ContextManager[None] = nullcontext()
+
+
+def note_retry(throttled: bool) -> None:
+    """Called by the rate limiter before it retries the call in progress."""
+    stats = _current_call.get()
+    if stats is not None:
+        stats.retries += 1
+        stats.throttled += throttled
+
+
+def note_shared() -> None:
+    """Called by :class:`~titer.cache.SharedResponses` when the unit in progress reuses a response."""
+    stats = _current_unit.get()
+    if stats is not None:
+        stats.cached = False
+        stats.shared = True
+
+
+def note_tokens(tokens: Optional[int]) -> None:
+    """Called by the rate limiter with the usage tokens of the call in progress."""
+    stats = _current_call.get()
+    if stats is not None and tokens is not None:
+        stats.tokens = (stats.tokens or 0) + tokens
+
+
+def opentelemetry_span_hook() -> Callable[[CallStats], Any]:
+    """Emit one ``titer.engine_call`` span per work unit (needs ``opentelemetry-api``)."""
+    from opentelemetry import trace
+
+    tracer = trace.get_tracer("titer")
+
+    def _hook(stats: CallStats) -> None:
+        end = time.time_ns()
+        span = tracer.start_span(
+            "titer.engine_call",
+            start_time=end - int(stats.latency_s * 1e9),
+            attributes={
+                "titer.engine": stats.engine,
+                "titer.retries": stats.retries,
+                "titer.throttled": stats.throttled,
+                "titer.tokens": stats.tokens or 0,
+                "titer.bytes": stats.bytes,
+                "titer.cached": stats.cached,
+                "titer.shared": stats.shared,
+            },
+        )
+        if stats.error:
+            span.set_attribute("error.type", stats.error)
+        span.end(end_time=end)
+
+    return _hook
+
+
+def _engine_summary(stats: _EngineStats) -> Dict[str, Any]:
+    latencies = sorted(stats.latencies)
+    return {
+        "calls": stats.calls,
+        "errors": stats.errors,
+        "cached": stats.cached,
+        "shared": stats.shared,
+        "retries": stats.retries,
+        "throttled": stats.throttled,
+        "tokens": stats.tokens,
+        "bytes": stats.bytes,
+        **{f"p{int(quantile * 100)}_ms": _percentile(latencies, quantile) * 1000 for quantile in QUANTILES},
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def _percentile(ordered: List[float], quantile: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(quantile * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+telemetry = Telemetry()
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import csv
+import json
+import sys
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import IO, Any, Optional, Sequence
+
+from .evaluator import EvaluationResult
+from .matching import MatchOptions
+from .results_db import ResultStore
+from .telemetry import telemetry
+
+
+class ResultWriter(ABC):
+    """Sink that receives each result as soon as its task finishes."""
+
+    @abstractmethod
+    def write(self, result: EvaluationResult) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Flush and release the underlying resource."""
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class CsvResultWriter(ResultWriter):
+    """Write ``as_row()`` rows to a CSV file, one flushed row per task."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._handle: Optional[IO[str]] = None
+        self._writer: Optional[csv.DictWriter] = None
+
+    def write(self, result: EvaluationResult) -> None:
+        row = result.as_row()
+        if self._writer is None:
+            # Open on the first row so an empty batch leaves no file behind, as before.
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = self.path.open("w", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._handle, fieldnames=list(row.keys()))
+            self._writer.writeheader()
+        self._writer.writerow(row)
+        self._handle.flush()  # type: ignore[union-attr]
+
+    def close(self) -> None:
+        if self._handle is not None and not self._handle.closed:
+            self._handle.close()
+
+
+class JsonlResultWriter(ResultWriter):
+    """Write ``as_dict()`` payloads as newline-delimited JSON to a file or stream."""
+
+    def __init__(self, path: Optional[Path] = None, stream: Optional[IO[str]] = None) -> None:
+        if path is None and stream is None:
+            raise ValueError("Provide a path or a stream for JSONL output.")
+        self._owns_handle = stream is None
+        if path is not None and stream is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            stream = path.open("w", encoding="utf-8")
+        self._handle: IO[str] = stream  # type: ignore[assignment]
+
+    def write(self, result: EvaluationResult) -> None:
+        self.write_payload(result.as_dict())
+
+    def write_payload(self, payload: Any) -> None:
+        self._handle.write(json.dumps(payload, default=str) + "\n")
+        self._handle.flush()
+
+    def close(self) -> None:
+        if self._owns_handle and not self._handle.closed:
+            self._handle.close()
+        elif not self._owns_handle:
+            self._handle.flush()
+
+
+class SqliteResultWriter(ResultWriter):
+    """Store each result in a :class:`ResultStore`, one transaction per task."""
+
+    def __init__(self, path: Path, match_options: Optional[MatchOptions] = None, label: Optional[str] = None) -> None:
+        self.store = ResultStore(path)
+        self.match_options = match_options
+        self.run_id = self.store.start_run(label)
+        self._task_index = 0
+
+    def write(self, result: EvaluationResult) -> None:
+        self.store.add_result(self.run_id, self._task_index, result, self.match_options)
+        self._task_index += 1
+
+    def close(self) -> None:
+        self.store.close()
+
+
+class FanOutWriter(ResultWriter):
+    """Forward each result to several writers."""
+
+    def __init__(self, writers: Sequence[ResultWriter]) -> None:
+        self.writers = list(writers)
+
+    def write(self, result: EvaluationResult) -> None:
+        with telemetry.stage("write"):
+            for writer in self.writers:
+                writer.write(result)
+
+    def close(self) -> None:
+        # Buffered sinks (Sheets) send their last rows here.
+        with telemetry.stage("write"):
+            for writer in self.writers:
+                writer.close()
+
+
+def stdout_ndjson_writer() -> JsonlResultWriter:
+    return JsonlResultWriter(stream=sys.stdout)
@@ -0,0 +1,207 @@
+"""Local stand-in for the OpenAI Batch API and Gemini batch mode.
+
+Serves just the routes the SDKs call through ``--base-url``: file upload, job
+creation, status, cancel and result download. Submitted JSONL lines are kept for
+inspection. Each job reports its final state on the ``polls_to_finish``-th status
+check. Results come back in reverse order, so a wrong ``custom_id``/``key`` mapping
+shows up as a response scored under the wrong prompt.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+
+def answer(prompt: str) -> str:
+    return f"About {prompt}: vector search"
+
+
+def cite(prompt: str) -> str:
+    return f"https://docs.example.com/{prompt.replace(' ', '-')}"
+
+
+class BatchStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.polls_to_finish = 2
+        # Jobs end as "completed" / BATCH_STATE_SUCCEEDED unless expire is set.
+        self.expire = False
+        self.fail_prompts: Set[str] = set()
+        self.files: Dict[str, List[Mapping[str, Any]]] = {}
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def submitted(self, kind: str) -> List[Mapping[str, Any]]:
+        """Every JSONL line submitted in ``kind`` ("openai" or "gemini") jobs, in order."""
+        return [line for job in self.jobs.values() if job["kind"] == kind for line in self.files[job["input"]]]
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def next_id(self, prefix: str) -> str:
+        with self._lock:
+            return f"{prefix}{next(self._ids)}"
+
+    def poll(self, job_id: str) -> Tuple[bool, bool]:
+        """Count a status check of ``job_id``; returns (done, expired)."""
+        job = self.jobs[job_id]
+        with self._lock:
+            job["polls"] += 1
+            done = job["cancelled"] or job["polls"] >= self.polls_to_finish
+        return done, done and self.expire and not job["cancelled"]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: BatchStandIn
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        path = self.path.split("?")[0]
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if path == "/v1/files":
+            # Multipart upload; the JSONL lines are the only lines that start with a JSON object.
+            file_id = self.server.next_id("file-in-")
+            self.server.files[file_id] = [json.loads(line) for line in body.splitlines() if line.startswith(b"{")]
+            upload = {"id": file_id, "object": "file", "bytes": len(body), "created_at": 0, "filename": "batch.jsonl"}
+            self._json({**upload, "purpose": "batch", "status": "processed"})
+        elif path == "/v1/batches":
+            job_id = self.server.next_id("batch_")
+            self.server.jobs[job_id] = {"kind": "openai", "input": json.loads(body)["input_file_id"], "polls": 0, "cancelled": False}
+            self._json(self._openai_job(job_id, "validating"))
+        elif match := re.fullmatch(r"/v1/batches/([^/]+)/cancel", path):
+            self.server.jobs[match.group(1)]["cancelled"] = True
+            self._json(self._openai_job(match.group(1), "cancelling"))
+        elif path == "/upload/v1beta/files":
+            session = self.server.next_id("session-")
+            self._json({}, {"x-goog-upload-url": f"{self.server.url}/upload-session/{session}", "x-goog-upload-status": "active"})
+        elif path.startswith("/upload-session/"):
+            name = self.server.next_id("files/in-")
+            self.server.files[name] = [json.loads(line) for line in body.splitlines() if line.strip()]
+            self._json({"file": {"name": name, "mimeType": "jsonl", "sizeBytes": str(len(body))}}, {"x-goog-upload-status": "final"})
+        elif match := re.fullmatch(r"/v1beta/models/([^:]+):batchGenerateContent", path):
+            name = self.server.next_id("batches/g-")
+            source = json.loads(body)["batch"]["inputConfig"]["fileName"]
+            self.server.jobs[name] = {"kind": "gemini", "input": source, "polls": 0, "cancelled": False, "model": match.group(1)}
+            self._json(self._gemini_job(name, "BATCH_STATE_PENDING"))
+        elif match := re.fullmatch(r"/v1beta/(batches/[^/:]+):cancel", path):
+            self.server.jobs[match.group(1)]["cancelled"] = True
+            self._json({})
+        else:
+            self._json({"error": {"message": f"no route {path}"}}, status=404)
+
+    def do_GET(self) -> None:
+        path = self.path.split("?")[0]
+        if match := re.fullmatch(r"/v1/batches/([^/]+)", path):
+            done, expired = self.server.poll(match.group(1))
+            job = self.server.jobs[match.group(1)]
+            state = "cancelled" if job["cancelled"] else "expired" if expired else "completed" if done else "in_progress"
+            self._json(self._openai_job(match.group(1), state))
+        elif match := re.fullmatch(r"/v1/files/file-(out|err)-([^/]+)/content", path):
+            self._jsonl(self._openai_results(match.group(2), failed=match.group(1) == "err"))
+        elif match := re.fullmatch(r"/v1beta/(batches/[^/:]+)", path):
+            done, expired = self.server.poll(match.group(1))
+            job = self.server.jobs[match.group(1)]
+            if job["cancelled"]:
+                state = "BATCH_STATE_CANCELLED"
+            else:
+                state = "BATCH_STATE_EXPIRED" if expired else "BATCH_STATE_SUCCEEDED" if done else "BATCH_STATE_RUNNING"
+            self._json(self._gemini_job(match.group(1), state))
+        elif match := re.fullmatch(r"/v1beta/files/out-([^:]+):download", path):
+            self._jsonl(self._gemini_results("batches/" + match.group(1)))
+        else:
+            self._json({"error": {"message": f"no route {path}"}}, status=404)
+
+    def _openai_job(self, job_id: str, state: str) -> Dict[str, Any]:
+        job = self.server.jobs[job_id]
+        total = len(self.server.files[job["input"]])
+        finished = state == "completed"
+        failed = sum(line["body"]["input"] in self.server.fail_prompts for line in self.server.files[job["input"]]) if finished else 0
+        return {
+            "id": job_id,
+            "object": "batch",
+            "endpoint": "/v1/responses",
+            "input_file_id": job["input"],
+            "completion_window": "24h",
+            "status": state,
+            "created_at": 0,
+            "output_file_id": f"file-out-{job_id}" if finished else None,
+            "error_file_id": f"file-err-{job_id}" if failed else None,
+            "request_counts": {"total": total, "completed": total - failed if finished else 0, "failed": failed},
+        }
+
+    def _openai_results(self, job_id: str, failed: bool) -> List[Dict[str, Any]]:
+        lines: List[Dict[str, Any]] = []
+        for request in self.server.files[self.server.jobs[job_id]["input"]]:
+            prompt = request["body"]["input"]
+            if (prompt in self.server.fail_prompts) != failed:
+                continue
+            if failed:
+                response = {"status_code": 400, "request_id": "req", "body": {"error": {"message": f"bad prompt {prompt!r}"}}}
+            else:
+                text = {"type": "output_text", "text": answer(prompt), "annotations": [_url_citation(prompt)]}
+                message = {"type": "message", "id": "msg", "status": "completed", "role": "assistant", "content": [text]}
+                body = {"id": "resp", "object": "response", "model": request["body"]["model"], "output": [message]}
+                response = {"status_code": 200, "request_id": "req", "body": body}
+            lines.append({"id": "line", "custom_id": request["custom_id"], "response": response, "error": None})
+        return lines[::-1]
+
+    def _gemini_job(self, name: str, state: str) -> Dict[str, Any]:
+        metadata: Dict[str, Any] = {
+            "@type": "type.googleapis.com/google.ai.generativelanguage.v1main.GenerateContentBatch",
+            "model": self.server.jobs[name]["model"],
+            "state": state,
+        }
+        if state == "BATCH_STATE_SUCCEEDED":
+            metadata["output"] = {"responsesFile": "files/out-" + name.split("/", 1)[1]}
+        return {"name": name, "metadata": metadata}
+
+    def _gemini_results(self, name: str) -> List[Dict[str, Any]]:
+        lines: List[Dict[str, Any]] = []
+        for request in self.server.files[self.server.jobs[name]["input"]]:
+            prompt = request["request"]["contents"][0]["parts"][0]["text"]
+            if prompt in self.server.fail_prompts:
+                lines.append({"key": request["key"], "error": {"code": 400, "message": f"bad prompt {prompt!r}"}})
+                continue
+            grounding = {"groundingChunks": [{"web": {"uri": cite(prompt), "title": "docs"}}]}
+            candidate = {"content": {"role": "model", "parts": [{"text": answer(prompt)}]}, "groundingMetadata": grounding}
+            lines.append({"key": request["key"], "response": {"candidates": [candidate]}})
+        return lines[::-1]
+
+    def _json(self, payload: Any, headers: Optional[Mapping[str, str]] = None, status: int = 200) -> None:
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+    def _jsonl(self, lines: List[Dict[str, Any]]) -> None:
+        self._send(200, "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8"), "application/octet-stream")
+
+    def _send(self, status: int, data: bytes, content_type: str, headers: Optional[Mapping[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _url_citation(prompt: str) -> Dict[str, Any]:
+    return {"type": "url_citation", "url": cite(prompt), "title": "docs", "start_index": 0, "end_index": 5}
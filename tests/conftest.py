@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterator, List
+
+import pytest
+
+from titer.engines.base import Engine, EngineResponse
+from titer.engines.factory import EngineFactory
+
+
+class BrokenEngine(Engine):
+    """Engine whose every call fails, for error-path tests."""
+
+    def __init__(self, model: str) -> None:
+        self.name = f"broken/{model}"
+
+    def run(self, prompt: str) -> EngineResponse:
+        raise RuntimeError(f"{self.name} is down")
+
+
+RegisterProvider = Callable[[str, Callable[[str], Engine]], str]
+
+
+@pytest.fixture
+def register_provider() -> Iterator[RegisterProvider]:
+    """Register test providers on the shared factory; they are removed after the test."""
+    factory = EngineFactory.shared()
+    registered: List[str] = []
+
+    def register(provider: str, builder: Callable[[str], Engine]) -> str:
+        factory.register(provider, builder)
+        registered.append(provider)
+        return provider
+
+    yield register
+    for provider in registered:
+        factory.unregister(provider)
+
+
+@pytest.fixture
+def broken_provider(register_provider: RegisterProvider) -> str:
+    return register_provider("broken", BrokenEngine)
+
+
+def make_task(prompts: List[str], engines: List[str], keywords: List[str] | None = None, runs: int = 2) -> Dict[str, Any]:
+    return {
+        "prompts": prompts,
+        "engines": engines,
+        "keywords": keywords if keywords is not None else ["vector", "search"],
+        "domain_wildcards": ["*.example.com"],
+        "runs": runs,
+    }
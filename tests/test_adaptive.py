@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+import math
+import statistics
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from titer.engines.base import Engine, EngineResponse
+from titer.stats import AdaptiveRuns, RunningStats
+from titer.task_runner import run_tasks
+from titer.writers import JsonlResultWriter
+
+from conftest import RegisterProvider, make_task
+
+# Mentions of "vector" per run: "steady" settles down, "noisy" never does.
+SEQUENCES = {"steady": [4, 6, 5, 5, 5, 5, 5, 5, 5, 5], "noisy": [0, 10] * 5}
+# Two-sided 95% Student t critical values for 1..9 degrees of freedom.
+T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262]
+
+
+class ScriptedEngine(Engine):
+    def __init__(self, model: str) -> None:
+        self.name = f"scripted/{model}"
+        self.calls: Dict[str, int] = defaultdict(int)
+
+    def run(self, prompt: str) -> EngineResponse:
+        count = SEQUENCES[prompt][self.calls[prompt]]
+        self.calls[prompt] += 1
+        return EngineResponse(content="vector " * count, cites=["https://docs.example.com/a"], raw={})
+
+
+@pytest.fixture
+def scripted(register_provider: RegisterProvider) -> str:
+    return f"{register_provider('scripted', ScriptedEngine)}/m"
+
+
+def _expected_stop(values: List[int], ci_width: float, min_runs: int, max_runs: int) -> int:
+    for runs in range(min_runs, max_runs + 1):
+        sample = values[:runs]
+        halfwidth = T_95[runs - 2] * statistics.stdev(sample) / math.sqrt(runs)
+        if halfwidth <= ci_width:
+            return runs
+    return max_runs
+
+
+def test_ci_halfwidth_uses_student_t() -> None:
+    stats = RunningStats([4, 6, 5, 5])
+    assert stats.ci_halfwidth(0.95) == pytest.approx(3.182 * statistics.stdev([4, 6, 5, 5]) / 2, rel=1e-3)
+
+
+def test_stops_once_the_interval_is_narrow_enough(scripted: str) -> None:
+    policy = AdaptiveRuns(max_runs=10, ci_width=1.0)
+    result = run_tasks([make_task(["steady"], [scripted], keywords=["vector"])], adaptive=policy)[0]
+    stop = _expected_stop(SEQUENCES["steady"], 1.0, policy.min_runs, policy.max_runs)
+    assert 2 < stop < 10
+    assert result.runs_used == [{"engine": scripted, "prompt": "steady", "runs": stop}]
+    assert len(result.raw_responses) == stop
+    assert result.keyword_counts["vector"] == pytest.approx(sum(SEQUENCES["steady"][:stop]) / stop)
+
+
+def test_max_runs_caps_a_pair_that_never_converges(scripted: str) -> None:
+    policy = AdaptiveRuns(max_runs=6, ci_width=1.0)
+    task = make_task(["steady", "noisy"], [scripted], keywords=["vector"])
+    result = run_tasks([task], adaptive=policy)[0]
+    runs = {entry["prompt"]: entry["runs"] for entry in result.runs_used or []}
+    assert runs == {"steady": 5, "noisy": 6}
+    assert sorted(record["prompt"] for record in result.raw_responses).count("noisy") == 6
+
+
+def test_runs_used_is_written_with_the_result(scripted: str, tmp_path: Path) -> None:
+    policy = AdaptiveRuns(max_runs=4, ci_width=1.0)
+    result = run_tasks([make_task(["noisy"], [scripted], keywords=["vector"])], adaptive=policy)[0]
+    path = tmp_path / "results.jsonl"
+    with JsonlResultWriter(path) as writer:
+        writer.write(result)
+    stored = json.loads(path.read_text(encoding="utf-8"))
+    assert stored["runs_used"] == [{"engine": scripted, "prompt": "noisy", "runs": 4}]
+    assert json.loads(result.as_row()["runs_used"]) == stored["runs_used"]
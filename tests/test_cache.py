@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import gzip
+import os
+import time
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from titer.cache import CACHE_ONLY, CacheMissError, ResponseCache, SharedResponses
+from titer.cli import cli
+from titer.engines.base import EngineResponse
+from titer.engines.fake_engine import FakeEngine
+
+
+def _response(text: str, size: int = 0) -> EngineResponse:
+    # Random padding does not compress, so entry sizes on disk follow ``size``.
+    return EngineResponse(content=text, cites=["https://a.example.com/x"], raw={"pad": os.urandom(size // 2).hex()})
+
+
+def test_round_trip_and_run_index(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path)
+    engine = FakeEngine(profile="tiny")
+    calls = []
+
+    def call() -> EngineResponse:
+        calls.append(1)
+        return _response(f"call {len(calls)}")
+
+    first = cache.fetch(engine, "prompt", 0, call)
+    again = cache.fetch(engine, "prompt", 0, call)
+    other_run = cache.fetch(engine, "prompt", 1, call)
+    assert (first.content, again.content, other_run.content) == ("call 1", "call 1", "call 2")
+    assert again.cites == first.cites and again.raw == first.raw
+
+
+@pytest.mark.parametrize("damage", ["truncate", "garbage", "wrong shape"])
+def test_corrupt_entries_are_misses_and_removed(tmp_path: Path, damage: str) -> None:
+    cache = ResponseCache(tmp_path)
+    engine = FakeEngine(profile="tiny")
+    key = cache.key(engine, "prompt", 0)
+    cache.put(key, _response("stored", size=2048))
+    path = cache._path(key)
+    if damage == "truncate":
+        path.write_bytes(path.read_bytes()[: path.stat().st_size // 2])
+    elif damage == "garbage":
+        path.write_bytes(b"not gzip")
+    else:
+        path.write_bytes(gzip.compress(b'{"created": 0}'))
+    assert cache.get(key) is None
+    assert not path.exists()
+    assert cache.fetch(engine, "prompt", 0, lambda: _response("fresh")).content == "fresh"
+
+
+def test_expired_entries_are_misses(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path, ttl_seconds=60)
+    engine = FakeEngine(profile="tiny")
+    key = cache.key(engine, "prompt", 0)
+    cache.put(key, _response("old"))
+    assert cache.get(key) is not None
+    real_time = time.time
+    try:
+        time.time = lambda: real_time() + 120  # type: ignore[assignment]
+        assert cache.get(key) is None
+    finally:
+        time.time = real_time  # type: ignore[assignment]
+    assert not any(tmp_path.glob("*/*.json.gz"))
+
+
+def test_eviction_keeps_recently_used_entries(tmp_path: Path) -> None:
+    probe = ResponseCache(tmp_path / "probe")
+    probe.put("00" * 32, _response("probe", size=20_000))
+    entry_size = next((tmp_path / "probe").glob("*/*.json.gz")).stat().st_size
+
+    cache = ResponseCache(tmp_path / "cache", max_bytes=int(entry_size * 3.5))
+    engine = FakeEngine(profile="tiny")
+    keys = [cache.key(engine, f"prompt {index}", 0) for index in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, _response(key, size=20_000))
+        stamp = time.time() - 100 + age
+        os.utime(cache._path(key), (stamp, stamp))
+    assert cache.get(keys[0]) is not None  # Refreshes the oldest entry.
+    cache.put(cache.key(engine, "prompt 3", 0), _response("new", size=20_000))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+
+
+def test_cache_only_raises_on_miss(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path, mode=CACHE_ONLY)
+    with pytest.raises(CacheMissError):
+        cache.fetch(FakeEngine(profile="tiny"), "prompt", 0, lambda: _response("never"))
+
+
+def test_cache_only_miss_is_a_clean_cli_error(tmp_path: Path) -> None:
+    result = CliRunner().invoke(
+        cli,
+        ["run", "--prompt", "p", "--engine", "fake/tiny", "--cache-only", "--cache-dir", str(tmp_path)],
+    )
+    assert result.exit_code == 1
+    assert "No cached response for fake/tiny" in result.output
+    assert not isinstance(result.exception, CacheMissError)
+
+
+def test_shared_responses_call_each_unit_once() -> None:
+    shared = SharedResponses(window=2)
+    engine = FakeEngine(profile="tiny")
+    calls = []
+
+    def call() -> EngineResponse:
+        calls.append(1)
+        return _response("shared")
+
+    for _ in range(3):
+        shared.fetch(engine, "prompt", 0, call)
+    assert (len(calls), shared.calls, shared.shared) == (1, 1, 2)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from titer.engines.base import Engine
+from titer.engines.factory import EngineFactory
+
+from conftest import BrokenEngine
+
+
+@pytest.fixture
+def factory(monkeypatch: pytest.MonkeyPatch) -> Any:
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    with EngineFactory() as factory:
+        yield factory
+
+
+def _async_clients(engine: Engine) -> tuple[Any, Any]:
+    async def pair() -> tuple[Any, Any]:
+        return engine._get_async_client(), engine._get_async_client()  # type: ignore[attr-defined]
+
+    return asyncio.run(pair())
+
+
+@pytest.mark.parametrize("name", ["openai/gpt-4.1", "gemini/gemini-2.5-flash"])
+def test_async_clients_are_per_event_loop(factory: EngineFactory, name: str) -> None:
+    engine = factory.create(name)
+    first, again = _async_clients(engine)
+    second, _ = _async_clients(engine)
+    assert first is again
+    assert first is not second
+
+
+def test_engines_are_cached_and_share_clients(factory: EngineFactory) -> None:
+    flash = factory.create("gemini/gemini-2.5-flash")
+    assert factory.create("gemini/gemini-2.5-flash") is flash
+    pro = factory.create("gemini/gemini-2.5-pro")
+    assert pro.client is flash.client  # type: ignore[attr-defined]
+
+
+def test_unknown_provider_and_bad_names(factory: EngineFactory) -> None:
+    with pytest.raises(ValueError, match="Unsupported provider"):
+        factory.create("nope/model")
+    with pytest.raises(ValueError):
+        factory.create("no-slash")
+
+
+def test_unregister_drops_builder_and_engines() -> None:
+    factory = EngineFactory()
+    factory.register("broken", BrokenEngine)
+    engine = factory.create("broken/a")
+    assert factory.create("broken/a") is engine
+    factory.unregister("broken")
+    with pytest.raises(ValueError, match="Unsupported provider 'broken'"):
+        factory.create("broken/a")
+    factory.register("broken", BrokenEngine)
+    assert factory.create("broken/a") is not engine
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from titer.engines.base import Engine, EngineResponse
+from titer.evaluator import WorkUnit
+from titer.journal import RunJournal
+from titer.task_runner import run_tasks
+
+from conftest import RegisterProvider, make_task
+
+
+class CountingEngine(Engine):
+    """Deterministic engine that records its calls and can be switched off."""
+
+    calls: List[str] = []
+    down = False
+
+    def __init__(self, model: str) -> None:
+        self.name = f"counting/{model}"
+
+    def run(self, prompt: str) -> EngineResponse:
+        if CountingEngine.down:
+            raise RuntimeError(f"{self.name} is down")
+        CountingEngine.calls.append(prompt)
+        return EngineResponse(content=f"vector search for {prompt}", cites=["https://docs.example.com/a"], raw={})
+
+
+@pytest.fixture
+def counting_provider(register_provider: RegisterProvider) -> str:
+    CountingEngine.calls = []
+    CountingEngine.down = False
+    return register_provider("counting", CountingEngine)
+
+
+def test_records_survive_reopen_and_torn_line(tmp_path: Path) -> None:
+    path = tmp_path / "run.jsonl"
+    units = [WorkUnit(engine="fake/tiny", prompt="q", run=run) for run in range(2)]
+    with RunJournal(path) as journal:
+        for unit in units:
+            journal.for_task(0).record(unit, EngineResponse(content=f"run {unit.run}", cites=["https://a.example.com"], raw={"n": unit.run}))
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write('{"task": 0, "run": 2, "engi')  # interrupted write
+
+    with RunJournal(path) as journal:
+        assert journal.completed_units == 2
+        replayed = journal.for_task(0).lookup(units + [WorkUnit(engine="fake/tiny", prompt="q", run=2)])
+        assert [response.content if response else None for response in replayed] == ["run 0", "run 1", None]
+        assert replayed[1].raw == {"n": 1} and replayed[1].cites == ["https://a.example.com"]
+        journal.for_task(1).record(units[0], EngineResponse(content="later", cites=[], raw={}))
+    with RunJournal(path) as journal:
+        assert journal.completed_units == 3
+        assert journal.for_task(1).lookup(units[:1])[0].content == "later"  # type: ignore[union-attr]
+
+
+@pytest.mark.parametrize("lanes", [False, True])
+def test_resume_replays_finished_units(tmp_path: Path, counting_provider: str, broken_provider: str, lanes: bool) -> None:
+    engine = f"{counting_provider}/model"
+    tasks = [make_task(["a", "b"], [engine]), make_task(["c"], [engine, f"{broken_provider}/model"])]
+    path = tmp_path / "run.jsonl"
+    with RunJournal(path) as journal, pytest.raises(RuntimeError, match="is down"):
+        run_tasks(tasks, lanes=lanes, journal=journal, share_window=None)
+    with RunJournal(path) as journal:
+        journaled = journal.completed_units
+    assert 0 < journaled <= len(CountingEngine.calls)
+
+    # The resumed run only calls the engine for the units the journal does not have.
+    tasks[1] = make_task(["c"], [engine])
+    before = len(CountingEngine.calls)
+    with RunJournal(path) as journal:
+        resumed = run_tasks(tasks, lanes=lanes, journal=journal, share_window=None)
+    assert len(CountingEngine.calls) - before == 6 - journaled
+
+    CountingEngine.down = True
+    with RunJournal(path) as journal:
+        assert journal.completed_units == 6
+        replayed = run_tasks(tasks, lanes=lanes, journal=journal, share_window=None)
+    CountingEngine.down = False
+    fresh = run_tasks(tasks, lanes=lanes, share_window=None)
+    assert [result.keyword_counts for result in replayed] == [result.keyword_counts for result in resumed]
+    assert [result.keyword_counts for result in resumed] == [result.keyword_counts for result in fresh]
+    assert [result.domain_counts for result in resumed] == [result.domain_counts for result in fresh]
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import random
+import re
+from fnmatch import fnmatchcase
+
+import pytest
+
+from titer.matching import DomainMatcher, KeywordMatcher
+
+# Letters re.IGNORECASE equates beyond plain lower-casing, next to their ASCII partners.
+_TRICKY = "sSſkKKiIıİµμΜσςΣθϑϴßẞ"
+_ALPHABET = "ab ." + _TRICKY
+
+
+def _reference(keywords: list[str], text: str) -> dict[str, int]:
+    return {kw: len(re.findall(re.escape(kw), text, re.IGNORECASE)) for kw in keywords}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_keyword_counts_match_re_ignorecase(seed: int) -> None:
+    rng = random.Random(seed)
+    keywords = ["".join(rng.choice(_ALPHABET) for _ in range(rng.randint(1, 3))) for _ in range(8)]
+    matcher = KeywordMatcher(keywords)
+    for _ in range(25):
+        text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 40)))
+        assert matcher.count(text) == _reference(matcher.keywords, text), (keywords, text)
+
+
+@pytest.mark.parametrize(
+    ("keyword", "text"),
+    [("kiss", "KİSS Kiſſ kıss"), ("µm", "5 μm and 3 ΜM"), ("θ", "ϑ ϴ Θ"), ("ß", "ẞ ß ss")],
+)
+def test_case_insensitive_equivalences(keyword: str, text: str) -> None:
+    assert KeywordMatcher([keyword]).count(text) == _reference([keyword], text)
+
+
+def test_overlapping_keywords_and_whole_word() -> None:
+    text = "Vector databases: a vector database, vectors."
+    assert KeywordMatcher(["vector", "vector database"]).count(text) == {"vector": 3, "vector database": 2}
+    assert KeywordMatcher(["vector"], whole_word=True).count(text) == {"vector": 2}
+
+
+def test_casefold_matches_full_folding() -> None:
+    assert KeywordMatcher(["strasse"], casefold=True).count("Straße, STRASSE") == {"strasse": 2}
+    assert KeywordMatcher(["strasse"]).count("Straße") == {"strasse": 0}
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_domain_matches_equal_fnmatch(seed: int) -> None:
+    rng = random.Random(seed)
+    labels = ["a", "b", "docs", "example", "com", ""]
+    pieces = labels[:-1] + ["*", "?", "[ab]", "*."]
+    patterns = [
+        ".".join(rng.choice(pieces) for _ in range(rng.randint(1, 3))).replace("*..", "*.")
+        for _ in range(10)
+    ] + ["*.example.com", "Example.COM", "*.example.com"]
+    matcher = DomainMatcher(patterns)
+    for _ in range(50):
+        host = ".".join(rng.choice(labels) for _ in range(rng.randint(1, 4)))
+        expected = tuple(i for i, pattern in enumerate(patterns) if fnmatchcase(host, pattern.lower()))
+        assert matcher.match(host) == expected, (patterns, host)
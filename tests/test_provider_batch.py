@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import itertools
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence
+
+import pytest
+from click.testing import CliRunner, Result
+
+from titer import provider_batch
+from titer.cli import cli
+from titer.engines.base import Engine, EngineResponse
+from titer.engines.batch import BatchOutcome, BatchRequest, BatchStatus, ProviderBatch
+from titer.engines.factory import EngineFactory
+from titer.engines.transport import http_transport
+from titer.journal import RunJournal
+from titer.provider_batch import ProviderBatchRunner
+
+from batch_standin import BatchStandIn, answer, cite
+from conftest import RegisterProvider, make_task
+
+
+class FakeBatch(ProviderBatch):
+    """Batch API that finishes every job on its ``polls_to_finish``-th successful poll.
+
+    The first ``flaky_polls`` status checks of each job fail, like a dropped connection.
+    """
+
+    ids = itertools.count()
+    cancelled: List[str] = []
+    polls_to_finish = 2
+    flaky_polls = 0
+
+    def __init__(self, engine: "BatchedEngine") -> None:
+        self.engine = engine
+        self.jobs: Dict[str, Sequence[BatchRequest]] = {}
+        self.polls: Dict[str, int] = {}
+        self.failed_polls: Dict[str, int] = {}
+
+    def submit(self, requests: Sequence[BatchRequest]) -> str:
+        job_id = f"job-{next(self.ids)}"
+        self.jobs[job_id] = list(requests)
+        self.polls[job_id] = 0
+        return job_id
+
+    def status(self, job_id: str) -> BatchStatus:
+        if self.failed_polls.get(job_id, 0) < FakeBatch.flaky_polls:
+            self.failed_polls[job_id] = self.failed_polls.get(job_id, 0) + 1
+            raise ConnectionError("connection reset by peer")
+        self.polls[job_id] += 1
+        done = self.polls[job_id] >= FakeBatch.polls_to_finish
+        return BatchStatus(state="ended" if done else "running", done=done)
+
+    def results(self, job_id: str) -> Iterator[BatchOutcome]:
+        for custom_id, prompt in self.jobs[job_id]:
+            yield custom_id, self.engine.run(prompt)
+
+    def cancel(self, job_id: str) -> None:
+        FakeBatch.cancelled.append(job_id)
+
+
+class BatchedEngine(Engine):
+    def __init__(self, model: str) -> None:
+        self.name = f"batched/{model}"
+        self._batch = FakeBatch(self)
+
+    def run(self, prompt: str) -> EngineResponse:
+        return EngineResponse(content=f"vector answer to {prompt}", cites=["https://docs.example.com/a"], raw={})
+
+    def provider_batch(self) -> ProviderBatch:
+        return self._batch
+
+
+@pytest.fixture
+def batched_provider(register_provider: RegisterProvider) -> str:
+    FakeBatch.cancelled = []
+    FakeBatch.polls_to_finish = 2
+    FakeBatch.flaky_polls = 0
+    return register_provider("batched", BatchedEngine)
+
+
+def _submitted(engine: str) -> List[str]:
+    batch = EngineFactory.shared().create(engine).provider_batch()
+    return [prompt for requests in batch.jobs.values() for _, prompt in requests]  # type: ignore[attr-defined]
+
+
+def test_batched_and_direct_units_are_scored(batched_provider: str) -> None:
+    tasks = [make_task(["q0", "q1"], [f"{batched_provider}/m", "fake/tiny"]), make_task(["q1"], [f"{batched_provider}/m"])]
+    results = list(ProviderBatchRunner(poll_interval=0.01, concurrency=2).run(tasks))
+    assert [len(result.raw_responses) for result in results] == [8, 2]
+    assert results[1].keyword_counts == {"vector": 1.0, "search": 0.0}
+    assert FakeBatch.cancelled == []
+
+
+@pytest.mark.parametrize(("share_units", "submitted"), [(False, ["q0", "q0", "q0", "q1", "q1"]), (True, ["q0", "q1"])])
+def test_identical_units_are_merged_only_when_shared(batched_provider: str, share_units: bool, submitted: List[str]) -> None:
+    engine = f"{batched_provider}/m"
+    # The first row repeats a prompt, and later rows repeat earlier ones.
+    tasks = [make_task(prompts, [engine], runs=1) for prompts in (["q0", "q0"], ["q0", "q1"], ["q1"])]
+    results = list(ProviderBatchRunner(poll_interval=0.01, share_units=share_units).run(tasks))
+    assert sorted(_submitted(engine)) == submitted
+    assert [len(result.raw_responses) for result in results] == [2, 2, 1]
+
+
+def test_failed_polls_are_retried(batched_provider: str) -> None:
+    FakeBatch.flaky_polls = 2
+    tasks = [make_task(["q0"], [f"{batched_provider}/m"])]
+    messages: List[str] = []
+    results = list(ProviderBatchRunner(poll_interval=0.01, progress=messages.append).run(tasks))
+    assert len(results[0].raw_responses) == 2
+    assert sum("status check failed" in message for message in messages) == 2
+    assert FakeBatch.cancelled == []
+
+
+def test_unreachable_job_is_left_running(batched_provider: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(provider_batch, "MAX_POLL_RETRIES", 2)
+    FakeBatch.flaky_polls = 3
+    tasks = [make_task(["q0"], [f"{batched_provider}/m", "fake/tiny"])]
+    with pytest.raises(RuntimeError, match="2 of 4 work units.*connection reset by peer.*left running"):
+        list(ProviderBatchRunner(poll_interval=0.01).run(tasks))
+    assert FakeBatch.cancelled == []
+
+
+def test_timeout_cancels_running_jobs(batched_provider: str) -> None:
+    FakeBatch.polls_to_finish = 100
+    tasks = [make_task(["q0"], [f"{batched_provider}/m"])]
+    with pytest.raises(TimeoutError):
+        list(ProviderBatchRunner(poll_interval=0.01, timeout=0.05).run(tasks))
+    assert len(FakeBatch.cancelled) == 1
+
+
+def test_direct_failure_does_not_cancel_batch_jobs(tmp_path: Path, batched_provider: str, broken_provider: str) -> None:
+    tasks = [make_task(["q0", "q1"], [f"{batched_provider}/m", f"{broken_provider}/m"])]
+    with RunJournal(tmp_path / "run.jsonl") as journal:
+        runner = ProviderBatchRunner(journal=journal, poll_interval=0.01, concurrency=2)
+        with pytest.raises(RuntimeError, match="4 of 8 work units got no response.*is down"):
+            list(runner.run(tasks))
+    assert FakeBatch.cancelled == []
+    # Every batched response was kept, so a resumed run only retries the direct units.
+    with RunJournal(tmp_path / "run.jsonl") as journal:
+        assert journal.completed_units == 4
+
+
+PROMPTS = ["best vector db", "hybrid search"]
+
+
+@pytest.fixture
+def standin(monkeypatch: pytest.MonkeyPatch) -> Iterator[BatchStandIn]:
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    server = BatchStandIn()
+    yield server
+    server.stop()
+    http_transport.configure({})
+
+
+def _run_batch(server: BatchStandIn, tmp_path: Path, rows: List[str], *args: str) -> Result:
+    task_file = tmp_path / "tasks.csv"
+    task_file.write_text("prompts,engines,keywords,domain_wildcards,runs\n" + "\n".join(rows) + "\n")
+    return CliRunner().invoke(
+        cli,
+        [
+            "batch", "--task-file", str(task_file), "--output-jsonl", str(tmp_path / "out.jsonl"), "--stdout", "none",
+            "--mode", "provider-batch", "--batch-poll-interval", "0.01",
+            "--base-url", f"openai={server.url}/v1", "--base-url", f"gemini={server.url}/",
+            *args,
+        ],
+    )
+
+
+def test_jobs_round_trip_through_the_batch_endpoints(tmp_path: Path, standin: BatchStandIn) -> None:
+    engines = "openai/gpt-4.1|gemini/gemini-2.5-flash"
+    result = _run_batch(standin, tmp_path, [f"{prompt},{engines},vector|hybrid,*.example.com,2" for prompt in PROMPTS])
+    assert result.exit_code == 0, result.output
+
+    openai_lines = standin.submitted("openai")
+    assert [line["body"]["input"] for line in openai_lines] == ["best vector db"] * 2 + ["hybrid search"] * 2
+    assert len({line["custom_id"] for line in openai_lines}) == 4
+    assert openai_lines[0]["method"] == "POST" and openai_lines[0]["url"] == "/v1/responses"
+    assert openai_lines[0]["body"]["model"] == "gpt-4.1" and openai_lines[0]["body"]["tools"] == [{"type": "web_search"}]
+    gemini_lines = standin.submitted("gemini")
+    assert [line["request"]["contents"][0]["parts"][0]["text"] for line in gemini_lines] == ["best vector db"] * 2 + ["hybrid search"] * 2
+    assert len({line["key"] for line in gemini_lines}) == 4
+    assert gemini_lines[0]["request"]["tools"] == [{"googleSearch": {}}]
+    # Provider states are reported as each job moves on.
+    assert "in_progress" in result.output and "completed" in result.output
+    assert "JOB_STATE_RUNNING" in result.output and "JOB_STATE_SUCCEEDED" in result.output
+
+    records = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text().splitlines()]
+    # Results came back in reverse order; each response still lands on its own prompt.
+    for prompt, record in zip(PROMPTS, records):
+        assert [response["prompt"] for response in record["raw_responses"]] == [prompt] * 4
+        for response in record["raw_responses"]:
+            assert response["content"] == answer(prompt)
+            assert cite(prompt) in response["cites"]
+    assert [record["keyword_counts"] for record in records] == [{"vector": 4.0, "hybrid": 0.0}, {"vector": 2.0, "hybrid": 2.0}]
+    assert [record["domain_counts"] for record in records] == [{"*.example.com": 2.0}] * 2
+
+
+@pytest.mark.parametrize("engine", ["openai/gpt-4.1", "gemini/gemini-2.5-flash"])
+def test_failed_lines_are_reported_and_the_rest_kept(tmp_path: Path, standin: BatchStandIn, engine: str) -> None:
+    standin.fail_prompts = {"hybrid search"}
+    journal = tmp_path / "run.jsonl"
+    rows = [f"{prompt},{engine},vector,*.example.com,2" for prompt in PROMPTS]
+    result = _run_batch(standin, tmp_path, rows, "--journal", str(journal))
+    assert isinstance(result.exception, RuntimeError)
+    assert "2 of 4 work units got no response" in str(result.exception)
+    assert "batch request failed: bad prompt 'hybrid search'" in str(result.exception)
+    assert [json.loads(line)["prompt"] for line in journal.read_text().splitlines()] == ["best vector db"] * 2
+
+    # A resumed run submits only the failed requests.
+    standin.fail_prompts = set()
+    result = _run_batch(standin, tmp_path, rows, "--resume", str(journal))
+    assert result.exit_code == 0, result.output
+    assert len(standin.jobs) == 2
+    assert len(standin.files[list(standin.jobs.values())[-1]["input"]]) == 2
+
+
+@pytest.mark.parametrize(("engine", "state"), [("openai/gpt-4.1", "expired"), ("gemini/gemini-2.5-flash", "JOB_STATE_EXPIRED")])
+def test_expired_jobs_fail_their_requests(tmp_path: Path, standin: BatchStandIn, engine: str, state: str) -> None:
+    standin.expire = True
+    result = _run_batch(standin, tmp_path, [f"best vector db,{engine},vector,*.example.com,2"])
+    assert isinstance(result.exception, RuntimeError)
+    assert "2 of 2 work units got no response" in str(result.exception)
+    assert f"no result (job ended as {state})" in str(result.exception)
+    assert not any(job["cancelled"] for job in standin.jobs.values())
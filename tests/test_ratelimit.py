@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+from typing import List
+
+import pytest
+from click.testing import CliRunner
+
+from titer.cli import cli
+from titer.engines.ratelimit import (
+    MAX_RETRY_AFTER_SECONDS,
+    AdaptiveConcurrency,
+    RateLimitRegistry,
+    is_rate_limit_error,
+    is_transient_error,
+    parse_rate_limit,
+)
+from titer.engines.transport import TransportOptions
+
+
+class StatusError(Exception):
+    def __init__(self, message: str, status_code: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RateLimitError(Exception):
+    pass
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "Rate limit reached for gpt-4.1",
+        "error code: rate_limit_exceeded",
+        "429 RESOURCE_EXHAUSTED. You exceeded your current quota",
+        "Too Many Requests",
+        "Quota exceeded for quota metric 'Read requests'",
+    ],
+)
+def test_throttling_messages(message: str) -> None:
+    assert is_rate_limit_error(Exception(message))
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "Failed to generate content",
+        "moderate content flagged",
+        "This model's maximum context length exceeded",
+        "accurate results are not available",
+        "prompt has 14290 tokens",
+    ],
+)
+def test_unrelated_messages(message: str) -> None:
+    assert not is_rate_limit_error(Exception(message))
+
+
+def test_status_and_type_decide_before_the_message() -> None:
+    assert is_rate_limit_error(RateLimitError("slow down"))
+    assert is_rate_limit_error(StatusError("whatever", 429))
+    assert not is_rate_limit_error(StatusError("rate limit in the text", 400))
+    assert is_transient_error(StatusError("bad gateway", 502))
+    assert not is_transient_error(StatusError("bad request", 400))
+
+
+def _limiter(max_retries: int = 3):  # type: ignore[no-untyped-def]
+    registry = RateLimitRegistry()
+    return registry.for_engine("openai", "gpt-4.1", max_retries=max_retries, backoff_seconds=0.0)
+
+
+def test_limiter_retries_throttled_and_transient_errors() -> None:
+    errors: List[Exception] = [StatusError("throttled", 429), StatusError("unavailable", 503)]
+
+    def call() -> str:
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert _limiter().call(call) == "ok"
+
+
+def test_limiter_does_not_retry_other_errors() -> None:
+    attempts = []
+
+    def call() -> str:
+        attempts.append(1)
+        raise StatusError("maximum context length exceeded", 400)
+
+    with pytest.raises(StatusError):
+        _limiter().call(call)
+    assert len(attempts) == 1
+
+
+def test_adaptive_concurrency_halves_on_throttling() -> None:
+    concurrency = AdaptiveConcurrency(max_limit=8, cooldown_seconds=0.0)
+    concurrency.acquire()
+    concurrency.release(throttled=True)
+    assert concurrency.limit == 4
+    for _ in range(4):
+        concurrency.acquire()
+        concurrency.release()
+    assert concurrency.limit == 5
+
+
+def test_parse_rate_limit() -> None:
+    key, policy = parse_rate_limit("gemini/gemini-2.5-flash=rpm:10,tpm:1000,concurrency:2")
+    assert key == "gemini/gemini-2.5-flash"
+    assert (policy.requests_per_minute, policy.tokens_per_minute, policy.max_concurrency) == (10, 1000, 2)
+    with pytest.raises(ValueError):
+        parse_rate_limit("gemini=burst:3")
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        "openai=concurrency:0",
+        "openai=rpm:0",
+        "openai=rpm:-5",
+        "openai=tpm:-1",
+        "openai=concurrency:2.5",
+        "openai=concurrency:4,min-concurrency:8",
+        "openai=min-concurrency:65",
+        "openai=rpm:nan",
+    ],
+)
+def test_parse_rate_limit_rejects_bad_values(spec: str) -> None:
+    with pytest.raises(ValueError):
+        parse_rate_limit(spec)
+
+
+def test_bad_rate_limit_is_a_usage_error() -> None:
+    result = CliRunner().invoke(
+        cli, ["run", "--prompt", "q", "--engine", "fake/tiny", "--rate-limit", "fake=concurrency:0"]
+    )
+    assert result.exit_code == 2
+    assert "Invalid value for '--rate-limit'" in result.output and "must be positive" in result.output
+
+
+def test_retry_after_is_capped() -> None:
+    class Response:
+        headers = {"retry-after": "86400"}
+
+    error = StatusError("throttled", 429)
+    error.response = Response()  # type: ignore[attr-defined]
+    assert _limiter()._backoff(error, 0) == MAX_RETRY_AFTER_SECONDS
+
+
+def test_async_acquire_waits_for_a_release() -> None:
+    concurrency = AdaptiveConcurrency(max_limit=1)
+
+    async def scenario() -> List[str]:
+        events: List[str] = []
+        await concurrency.aacquire()
+
+        async def second() -> None:
+            await concurrency.aacquire()
+            events.append("acquired")
+
+        task = asyncio.create_task(second())
+        await asyncio.sleep(0.01)
+        events.append("released")
+        concurrency.release()
+        await asyncio.wait_for(task, 1.0)
+        return events
+
+    assert asyncio.run(scenario()) == ["released", "acquired"]
+
+
+def test_openai_clients_leave_retries_to_the_limiter() -> None:
+    assert TransportOptions().openai_client_kwargs()["max_retries"] == 0
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from titer.blobs import RawOptions
+from titer.evaluator import EvaluationResult
+from titer.matching import MatchOptions
+from titer.rescore import rescore_stored
+from titer.task_runner import run_tasks
+from titer.writers import CsvResultWriter, JsonlResultWriter
+
+from conftest import make_task
+
+
+def _stored(tmp_path: Path, match_options: MatchOptions) -> tuple[List[EvaluationResult], List[Path]]:
+    tasks = [
+        make_task(["q0", "q1"], ["fake/tiny", "fake/typical"], keywords=["Vector", "search engine"]),
+        make_task(["q2"], ["fake/typical"], runs=3),
+        make_task(["q3"], ["fake/tiny"], keywords=["index"]),
+    ]
+    results = run_tasks(tasks, match_options=match_options, raw_options=RawOptions(breakdown=True))
+    paths = [tmp_path / "results.csv", tmp_path / "results.jsonl"]
+    for path, writer_class in zip(paths, (CsvResultWriter, JsonlResultWriter)):
+        with writer_class(path) as writer:
+            for result in results:
+                writer.write(result)
+    return results, paths
+
+
+@pytest.mark.parametrize("match_options", [MatchOptions(), MatchOptions(whole_word=True, casefold=True)])
+def test_rescoring_with_original_settings_reproduces_scores(tmp_path: Path, match_options: MatchOptions) -> None:
+    results, paths = _stored(tmp_path, match_options)
+    for path in paths:
+        rescored = list(rescore_stored([path], match_options=match_options))
+        assert [result.keyword_counts for result in rescored] == [result.keyword_counts for result in results]
+        assert [result.domain_counts for result in rescored] == [result.domain_counts for result in results]
+        assert [result.breakdown for result in rescored] == [result.breakdown for result in results]
+        assert [result.timestamp for result in rescored] == [result.timestamp for result in results]
+
+
+def test_workers_match_a_single_process(tmp_path: Path) -> None:
+    _, paths = _stored(tmp_path, MatchOptions())
+    options = {"keywords": ["vector", "retrieval"], "domain_wildcards": ["docs.*", "*.example.com"], "chunk_rows": 1}
+    single = list(rescore_stored(paths, workers=1, **options))
+    parallel = list(rescore_stored(paths, workers=2, **options))
+    assert len(single) == 6
+    assert [result.as_dict() for result in parallel] == [result.as_dict() for result in single]
+    assert all(result.keywords == ["vector", "retrieval"] for result in single)
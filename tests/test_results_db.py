@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from titer.blobs import RawOptions
+from titer.cli import cli
+from titer.matching import DomainMatcher, KeywordMatcher
+from titer.results_db import ResultStore
+from titer.task_runner import run_tasks
+
+from conftest import make_task
+
+
+def test_round_trip_matches_results(tmp_path: Path) -> None:
+    tasks = [
+        make_task(["q0", "q1"], ["fake/tiny", "fake/typical"]),
+        make_task(["q2"], ["fake/tiny"], keywords=["vector", "index"]),
+    ]
+    results = run_tasks(tasks, share_window=None)
+    path = tmp_path / "results.db"
+    with ResultStore(path) as store:
+        run_id = store.start_run("nightly")
+        for index, result in enumerate(results):
+            store.add_result(run_id, index, result)
+
+    expected_keywords: Counter = Counter()
+    expected_domains: Counter = Counter()
+    responses: Counter = Counter()
+    for result in results:
+        keywords = KeywordMatcher(result.keywords)
+        domains = DomainMatcher(result.domain_wildcards)
+        for record in result.raw_responses:
+            responses[record["engine"]] += 1
+            for keyword, count in keywords.count(record["content"]).items():
+                expected_keywords[(record["engine"], keyword)] += count
+            for pattern, count in domains.count(record["cites"]).items():
+                expected_domains[(record["engine"], pattern)] += count
+
+    # Reopened from disk, the store answers from what was written.
+    with ResultStore(path) as store:
+        assert store.list_runs() == [
+            {"run_id": run_id, "started_at": store.list_runs()[0]["started_at"], "label": "nightly", "tasks": 2}
+        ]
+        keyword_rows = store.keyword_trend(bucket="all")
+        domain_rows = store.domain_trend(bucket="all")
+        tiny_rows = store.keyword_trend(engines=["fake/tiny"], keywords=["index"], bucket="all")
+
+    assert {(row["engine"], row["keyword"]): row["total"] for row in keyword_rows} == dict(expected_keywords)
+    assert {(row["engine"], row["domain"]): row["total"] for row in domain_rows} == dict(expected_domains)
+    # "index" was only asked for in the second task: one prompt, two runs.
+    assert [(row["engine"], row["keyword"], row["responses"]) for row in tiny_rows] == [("fake/tiny", "index", 2)]
+    for row in domain_rows:
+        assert row["responses"] == responses[row["engine"]]
+        assert row["average"] == row["total"] / row["responses"]
+
+
+@pytest.mark.parametrize("command", ["run", "batch"])
+def test_output_db_rejects_no_records(tmp_path: Path, command: str) -> None:
+    db = tmp_path / "results.db"
+    if command == "run":
+        args = ["run", "--prompt", "q", "--engine", "fake/tiny", "--keyword", "vector", "--domain", "*.example.com"]
+    else:
+        task_file = tmp_path / "tasks.csv"
+        task_file.write_text("prompts,engines,keywords,domain_wildcards,runs\nq,fake/tiny,vector,*.example.com,1\n")
+        args = ["batch", "--task-file", str(task_file)]
+    result = CliRunner().invoke(cli, [*args, "--output-db", str(db), "--no-records"])
+    assert result.exit_code == 2
+    assert "--no-records" in result.output
+    assert not db.exists()
+
+
+def test_add_result_needs_records(tmp_path: Path) -> None:
+    result = run_tasks([make_task(["q"], ["fake/tiny"])], raw_options=RawOptions(records=False))[0]
+    with ResultStore(tmp_path / "results.db") as store, pytest.raises(ValueError, match="no-records"):
+        store.add_result(store.start_run(), 0, result)
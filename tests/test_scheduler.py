@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from titer.blobs import RAW_BLOB, BlobStore, RawOptions
+from titer.scheduler import BatchScheduler, parse_provider_concurrency
+from titer.task_runner import run_tasks
+
+from conftest import make_task
+
+
+def _run_with_deadline(call: Any, seconds: float = 30.0) -> Any:
+    """Run ``call`` on a thread so a hang fails the test instead of blocking it."""
+    outcome: List[Any] = []
+
+    def target() -> None:
+        try:
+            outcome.append(("ok", call()))
+        except BaseException as exc:  # noqa: BLE001
+            outcome.append(("error", exc))
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert outcome, "scheduler did not finish"
+    kind, value = outcome[0]
+    if kind == "error":
+        raise value
+    return value
+
+
+def test_lanes_match_sequential_run() -> None:
+    tasks = [
+        make_task(["q0", "shared"], ["fake/tiny", "fake/typical"]),
+        make_task(["q1", "shared"], ["fake/tiny"], keywords=["vector", "index"]),
+        make_task(["q2"], ["fake/typical"], runs=3),
+    ]
+    sequential = run_tasks(tasks, share_window=None)
+    laned = _run_with_deadline(lambda: run_tasks(tasks, lanes=True, concurrency=3, share_window=None))
+    assert [result.keyword_counts for result in laned] == [result.keyword_counts for result in sequential]
+    assert [result.domain_counts for result in laned] == [result.domain_counts for result in sequential]
+
+
+def test_engine_error_is_raised(broken_provider: str) -> None:
+    tasks = [make_task(["q0"], ["fake/tiny"]), make_task(["q1"], [f"{broken_provider}/model"])]
+    with pytest.raises(RuntimeError, match="is down"):
+        _run_with_deadline(lambda: run_tasks(tasks, lanes=True, share_window=None))
+
+
+def test_error_after_the_engine_call_is_raised(tmp_path: Path) -> None:
+    # Storing the raw payload fails while the result is built, after every call succeeded.
+    (tmp_path / "notadir").write_text("")
+    raw_options = RawOptions(mode=RAW_BLOB, store=BlobStore(tmp_path / "notadir" / "sub"))
+    scheduler = BatchScheduler(default_concurrency=2, raw_options=raw_options)
+    with pytest.raises(NotADirectoryError):
+        _run_with_deadline(lambda: list(scheduler.run([make_task(["q0"], ["fake/tiny"])])))
+
+
+def test_shared_units_are_called_once() -> None:
+    tasks = [make_task(["same"], ["fake/tiny"], keywords=[keyword]) for keyword in ("vector", "search", "index")]
+    scheduler = BatchScheduler(default_concurrency=1, share_units=True)
+    results = dict(_run_with_deadline(lambda: list(scheduler.run(tasks))))
+    assert sorted(results) == [0, 1, 2]
+    contents = {tuple(record["content"] for record in result.raw_responses) for result in results.values()}
+    assert len(contents) == 1
+
+
+def test_parse_provider_concurrency() -> None:
+    assert parse_provider_concurrency(["gemini=2", " openai = 8"]) == {"gemini": 2, "openai": 8}
+    with pytest.raises(ValueError):
+        parse_provider_concurrency(["gemini"])
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+from titer.task_runner import _iter_sheet_records, _iter_task_rows
+
+HEADER = ["prompts", "engines", "keywords", "domain_wildcards", "runs"]
+
+
+class FakeWorksheet:
+    """Worksheet whose ``get`` drops empty rows, like the Sheets values API."""
+
+    def __init__(self, rows: Dict[int, List[str]], row_count: int) -> None:
+        self.rows = rows
+        self.row_count = row_count
+        self.requests: List[str] = []
+
+    def row_values(self, row: int) -> List[str]:
+        return list(self.rows.get(row, []))
+
+    def get(self, a1_range: str) -> List[List[str]]:
+        self.requests.append(a1_range)
+        start, end = (int(part) for part in a1_range.split(":"))
+        return [list(self.rows[row]) for row in range(start, end + 1) if any(self.rows.get(row, []))]
+
+
+def _task_row(prompt: str) -> List[str]:
+    return [prompt, "fake/tiny", "vector", "*.example.com", "1"]
+
+
+def test_rows_after_a_long_blank_block_are_read() -> None:
+    rows = {1: HEADER, 2: _task_row("first"), 3: ["", "", ""], 4: ["  "], 11: _task_row("after gap"), 23: _task_row("last")}
+    ws = FakeWorksheet(rows, row_count=25)
+    records = list(_iter_sheet_records(ws, page_rows=3))
+    assert [record["prompts"] for record in records] == ["first", "after gap", "last"]
+    assert ws.requests[0] == "2:4" and ws.requests[-1] == "23:25"
+
+    tasks = list(_iter_task_rows(iter(records)))
+    assert [task["prompts"] for task in tasks] == [["first"], ["after gap"], ["last"]]
+
+
+def test_short_rows_are_padded_and_empty_sheet_yields_nothing() -> None:
+    ws = FakeWorksheet({1: HEADER, 2: ["only a prompt"]}, row_count=2)
+    assert list(_iter_sheet_records(ws, page_rows=10)) == [dict(zip(HEADER, ["only a prompt", "", "", "", ""]))]
+    assert list(_iter_sheet_records(FakeWorksheet({}, row_count=100), page_rows=10)) == []
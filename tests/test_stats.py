@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import statistics
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pytest
+from click.testing import CliRunner
+
+from titer.cli import cli
+from titer.matching import DomainMatcher, KeywordMatcher
+from titer.stats import ALL_PROMPTS, Breakdown
+
+
+def test_breakdown_groups_by_engine_prompt_and_term() -> None:
+    breakdown = Breakdown()
+    breakdown.add("a/m", "q0", {"vector": 2}, {"*.example.com": 1})
+    breakdown.add("b/m", "q0", {"vector": 0}, {"*.example.com": 0})
+    breakdown.add("a/m", "q1", {"vector": 4}, {"*.example.com": 3})
+    breakdown.add("a/m", "q0", {"vector": 6}, {"*.example.com": 1})
+
+    entries = {(e["engine"], e["prompt"], e["kind"], e["name"]): e for e in breakdown.as_list()}
+    assert list(entries) == [
+        ("a/m", "*", "keyword", "vector"),
+        ("a/m", "*", "domain", "*.example.com"),
+        ("a/m", "q0", "keyword", "vector"),
+        ("a/m", "q0", "domain", "*.example.com"),
+        ("a/m", "q1", "keyword", "vector"),
+        ("a/m", "q1", "domain", "*.example.com"),
+        ("b/m", "*", "keyword", "vector"),
+        ("b/m", "*", "domain", "*.example.com"),
+        ("b/m", "q0", "keyword", "vector"),
+        ("b/m", "q0", "domain", "*.example.com"),
+    ]
+    rollup = entries[("a/m", ALL_PROMPTS, "keyword", "vector")]
+    assert (rollup["n"], rollup["mean"], rollup["min"], rollup["max"]) == (3, 4.0, 2, 6)
+    assert rollup["std"] == pytest.approx(statistics.stdev([2, 4, 6]))
+    pair = entries[("a/m", "q0", "domain", "*.example.com")]
+    assert (pair["n"], pair["mean"], pair["std"], pair["ci_low"], pair["ci_high"]) == (2, 1.0, 0.0, 1.0, 1.0)
+    # A single response has no interval.
+    single = entries[("b/m", "q0", "keyword", "vector")]
+    assert (single["n"], single["ci_low"], single["ci_high"]) == (1, None, None)
+
+
+def test_cli_breakdown_totals_match_records(tmp_path: Path) -> None:
+    args = ["run", "--prompt", "q0", "--prompt", "q1", "--engine", "fake/tiny", "--engine", "fake/typical"]
+    args += ["--keyword", "vector", "--keyword", "search", "--domain", "*.example.com", "--runs", "3", "--breakdown"]
+    result = CliRunner().invoke(cli, args)
+    assert result.exit_code == 0, result.output
+    data = json.loads(result.output)
+
+    keywords = KeywordMatcher(data["keywords"])
+    domains = DomainMatcher(data["domain_wildcards"])
+    observed: Dict[Tuple[str, str, str, str], List[int]] = defaultdict(list)
+    for record in data["raw_responses"]:
+        counts = [("keyword", keywords.count(record["content"])), ("domain", domains.count(record["cites"]))]
+        for scope in (record["prompt"], ALL_PROMPTS):
+            for kind, by_name in counts:
+                for name, count in by_name.items():
+                    observed[(record["engine"], scope, kind, name)].append(count)
+
+    entries = {(e["engine"], e["prompt"], e["kind"], e["name"]): e for e in data["breakdown"]}
+    assert entries.keys() == observed.keys()
+    for key, counts in observed.items():
+        entry = entries[key]
+        assert entry["n"] == len(counts) == (6 if key[1] == ALL_PROMPTS else 3)
+        assert entry["mean"] == pytest.approx(statistics.fmean(counts))
+        assert (entry["min"], entry["max"]) == (min(counts), max(counts))
+    # Each engine's all-prompts mean is its per-run average over the prompts.
+    for engine in ("fake/tiny", "fake/typical"):
+        rollup = entries[(engine, ALL_PROMPTS, "keyword", "vector")]
+        per_prompt = [entries[(engine, prompt, "keyword", "vector")]["mean"] for prompt in ("q0", "q1")]
+        assert rollup["mean"] == pytest.approx(statistics.fmean(per_prompt))
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from titer.cache import DEFAULT_SHARE_WINDOW, ResponseCache
+from titer.provider_batch import ProviderBatchRunner
+from titer.task_runner import run_tasks
+from titer.telemetry import telemetry
+
+from conftest import make_task
+
+
+@pytest.fixture
+def enabled_telemetry() -> Iterator[None]:
+    telemetry.reset()
+    telemetry.configure(enabled=True)
+    yield
+    telemetry.configure(enabled=False)
+    telemetry.reset()
+
+
+def _counts() -> dict:
+    stats = telemetry.summary()["engines"]["fake/tiny"]
+    return {key: stats[key] for key in ("calls", "cached", "shared")}
+
+
+def test_rows_are_sampled_independently_by_default(enabled_telemetry: None) -> None:
+    tasks = [make_task(["same"], ["fake/tiny"], keywords=[keyword]) for keyword in ("vector", "search")]
+    run_tasks(tasks)
+    assert _counts() == {"calls": 4, "cached": 0, "shared": 0}
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_shared_units_are_counted_in_lane_mode(enabled_telemetry: None, concurrency: int) -> None:
+    tasks = [make_task(["same"], ["fake/tiny"], keywords=[keyword]) for keyword in ("vector", "search", "index")]
+    run_tasks(tasks, lanes=True, concurrency=concurrency, share_window=DEFAULT_SHARE_WINDOW)
+    # Whether a repeat waited on the queued job or was served from the window, it is shared.
+    assert _counts() == {"calls": 6, "cached": 0, "shared": 4}
+
+
+@pytest.mark.parametrize(("share_units", "shared"), [(False, 0), (True, 4)])
+def test_provider_batch_shares_units_only_when_asked(enabled_telemetry: None, share_units: bool, shared: int) -> None:
+    tasks = [make_task(["same"], ["fake/tiny"], keywords=[keyword]) for keyword in ("vector", "search", "index")]
+    list(ProviderBatchRunner(poll_interval=0.01, share_units=share_units).run(tasks))
+    assert _counts() == {"calls": 6, "cached": 0, "shared": shared}
+
+
+def test_shared_units_are_not_cache_hits(enabled_telemetry: None, tmp_path: Path) -> None:
+    tasks = [make_task(["same"], ["fake/tiny"], keywords=[keyword]) for keyword in ("vector", "search", "index")]
+    run_tasks(tasks, share_window=DEFAULT_SHARE_WINDOW)
+    assert _counts() == {"calls": 6, "cached": 0, "shared": 4}
+    metrics = telemetry.render_metrics()
+    assert 'titer_engine_shared_units_total{engine="fake/tiny"} 4' in metrics
+    assert 'titer_engine_cache_hits_total{engine="fake/tiny"} 0' in metrics
+
+    # Units the shared window misses but the response cache has are still cache hits.
+    cache = ResponseCache(tmp_path)
+    run_tasks(tasks[:1], cache=cache)
+    telemetry.reset()
+    run_tasks(tasks, cache=cache, share_window=DEFAULT_SHARE_WINDOW)
+    assert _counts() == {"calls": 6, "cached": 2, "shared": 4}
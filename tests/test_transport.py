@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import importlib.util
+
+import pytest
+from click.testing import CliRunner
+
+from titer.cli import cli
+from titer.engines.transport import TransportSettings
+
+
+def test_environment_values_are_parsed() -> None:
+    environ = {"TITER_MAX_CONNECTIONS": "8", "TITER_READ_TIMEOUT": "2.5", "TITER_HTTP2": "off", "TITER_OPENAI_BASE_URL": "http://x/v1"}
+    options = TransportSettings().for_provider("openai", environ)
+    assert (options.max_connections, options.read_timeout, options.http2, options.base_url) == (8, 2.5, False, "http://x/v1")
+
+
+@pytest.mark.parametrize(
+    ("name", "value"),
+    [
+        ("TITER_READ_TIMEOUT", "soon"),
+        ("TITER_CONNECT_TIMEOUT", "-1"),
+        ("TITER_TOTAL_TIMEOUT", "inf"),
+        ("TITER_MAX_CONNECTIONS", "0"),
+        ("TITER_MAX_KEEPALIVE_CONNECTIONS", "2.5"),
+        ("TITER_HTTP2", "maybe"),
+    ],
+)
+def test_bad_environment_values_name_the_variable(name: str, value: str) -> None:
+    settings = TransportSettings()
+    with pytest.raises(ValueError, match=name):
+        settings.configure({}, environ={name: value})
+    with pytest.raises(ValueError, match=name):
+        settings.for_provider("openai", {name: value})
+
+
+def test_cli_options_override_bad_environment_values() -> None:
+    settings = TransportSettings()
+    settings.configure({"read_timeout": 5.0}, environ={"TITER_READ_TIMEOUT": "soon"})
+    assert settings.for_provider("openai", {"TITER_READ_TIMEOUT": "soon"}).read_timeout == 5.0
+
+
+@pytest.mark.skipif(importlib.util.find_spec("h2") is not None, reason="needs 'h2' to be missing")
+def test_http2_without_h2_fails_at_startup(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("TITER_HTTP2", "1")
+    result = CliRunner().invoke(cli, ["run", "--prompt", "q", "--engine", "fake/tiny"])
+    assert result.exit_code == 2
+    assert "TITER_HTTP2" in result.output and "'h2'" in result.output
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import csv
+import json
+import sqlite3
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from titer.evaluator import EvaluationResult
+from titer.task_runner import run_tasks
+from titer.writers import CsvResultWriter, FanOutWriter, JsonlResultWriter, SqliteResultWriter
+
+from conftest import make_task
+
+
+@pytest.fixture
+def results() -> List[EvaluationResult]:
+    tasks = [make_task(["q0", "q1"], ["fake/tiny", "fake/typical"]), make_task(["q2"], ["fake/tiny"], runs=1)]
+    return run_tasks(tasks)
+
+
+def test_csv_rows_read_back(tmp_path: Path, results: List[EvaluationResult]) -> None:
+    path = tmp_path / "out" / "results.csv"
+    with CsvResultWriter(path) as writer:
+        for result in results:
+            writer.write(result)
+    with path.open(newline="", encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    assert rows == [{key: str(value) for key, value in result.as_row().items()} for result in results]
+    assert json.loads(rows[0]["keyword_counts"]) == results[0].keyword_counts
+
+
+def test_empty_csv_leaves_no_file(tmp_path: Path) -> None:
+    with CsvResultWriter(tmp_path / "results.csv"):
+        pass
+    assert not (tmp_path / "results.csv").exists()
+
+
+def test_jsonl_lines_read_back(tmp_path: Path, results: List[EvaluationResult]) -> None:
+    path = tmp_path / "results.jsonl"
+    with JsonlResultWriter(path) as writer:
+        for result in results:
+            writer.write(result)
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert lines == [json.loads(json.dumps(result.as_dict(), default=str)) for result in results]
+
+
+def test_sqlite_schema_and_rows(tmp_path: Path, results: List[EvaluationResult]) -> None:
+    path = tmp_path / "results.db"
+    with FanOutWriter([SqliteResultWriter(path, label="weekly")]) as writer:
+        for result in results:
+            writer.write(result)
+    with sqlite3.connect(path) as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert {"runs", "engines", "prompts", "keywords", "domains", "tasks", "units", "keyword_counts", "domain_counts"} <= tables
+        assert conn.execute("SELECT label FROM runs").fetchall() == [("weekly",)]
+        tasks = conn.execute("SELECT task_index, runs, result FROM tasks ORDER BY task_index").fetchall()
+        units = conn.execute("SELECT COUNT(*) FROM units").fetchone()[0]
+        keyword_rows = conn.execute("SELECT COUNT(*) FROM keyword_counts").fetchone()[0]
+    assert [(index, runs) for index, runs, _ in tasks] == [(0, 2), (1, 1)]
+    assert json.loads(tasks[0][2])["keyword_counts"] == results[0].keyword_counts
+    assert "raw_responses" not in json.loads(tasks[0][2])
+    assert units == sum(len(result.raw_responses) for result in results)
+    # Every unit has a row per keyword, zeros included.
+    assert keyword_rows == sum(len(result.raw_responses) * len(result.keywords) for result in results)